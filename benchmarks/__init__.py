@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+
+"""Performance benchmarks of oemof.solph.
+
+Run the benchmarks from the root directory of the repository, e.g.::
+
+    python -m benchmarks.suite --timesteps 24 168 --buses 2 8
+    python benchmarks/flow_bounds.py --flows 1000 --timesteps 8760
+
+SPDX-License-Identifier: MIT
+
+"""
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark for setting the bounds of the flow variable.
+
+Compares the element-wise bound assignment used up to v0.4.1 with the bulk
+assignment of :meth:`oemof.solph.models.Model._add_parent_block_variables`
+and checks that both produce the same bounds.
+
+Usage::
+
+    python benchmarks/flow_bounds.py --flows 1000 --timesteps 8760
+
+SPDX-License-Identifier: MIT
+
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import pyomo.environ as po
+from oemof import solph
+
+
+def create_energysystem(flows, timesteps):
+    """Energy system with `flows` bounded and `flows` fixed flows."""
+    rng = np.random.RandomState(42)
+    es = solph.EnergySystem(
+        timeindex=pd.date_range('1/1/2020', periods=timesteps, freq='H'))
+    bus = solph.Bus(label='bus')
+    es.add(bus)
+    for n in range(flows // 2):
+        es.add(solph.Source(
+            label='source_{0}'.format(n),
+            outputs={bus: solph.Flow(nominal_value=10,
+                                     max=rng.rand(timesteps),
+                                     min=0.1)}))
+        es.add(solph.Sink(
+            label='sink_{0}'.format(n),
+            inputs={bus: solph.Flow(nominal_value=5,
+                                    fix=list(rng.rand(timesteps)))}))
+    return es
+
+
+def elementwise_bounds(om):
+    """The element-wise bound assignment as it was used up to v0.4.1."""
+    om.flow = po.Var(om.FLOWS, om.TIMESTEPS, within=po.Reals)
+
+    for (o, i) in om.FLOWS:
+        if om.flows[o, i].nominal_value is not None:
+            if om.flows[o, i].fix[om.TIMESTEPS[1]] is not None:
+                for t in om.TIMESTEPS:
+                    om.flow[o, i, t].value = (
+                        om.flows[o, i].fix[t] *
+                        om.flows[o, i].nominal_value)
+                    om.flow[o, i, t].fix()
+            else:
+                for t in om.TIMESTEPS:
+                    om.flow[o, i, t].setub(
+                        om.flows[o, i].max[t] *
+                        om.flows[o, i].nominal_value)
+
+                if not om.flows[o, i].nonconvex:
+                    for t in om.TIMESTEPS:
+                        om.flow[o, i, t].setlb(
+                            om.flows[o, i].min[t] *
+                            om.flows[o, i].nominal_value)
+                elif (o, i) in om.UNIDIRECTIONAL_FLOWS:
+                    for t in om.TIMESTEPS:
+                        om.flow[o, i, t].setlb(0)
+        else:
+            if (o, i) in om.UNIDIRECTIONAL_FLOWS:
+                for t in om.TIMESTEPS:
+                    om.flow[o, i, t].setlb(0)
+
+
+def bounds(var):
+    return [(v.lb, v.ub, v.value, v.fixed) for v in var.values()]
+
+
+def run(flows, timesteps):
+    es = create_energysystem(flows, timesteps)
+
+    results = {}
+
+    om = solph.Model(es, auto_construct=False)
+    om._add_parent_block_sets()
+    start = time.perf_counter()
+    om.flow = po.Var(om.FLOWS, om.TIMESTEPS, within=po.Reals)
+    var_creation = time.perf_counter() - start
+
+    for name, method in [
+            ('elementwise', elementwise_bounds),
+            ('bulk', solph.Model._add_parent_block_variables)]:
+        om = solph.Model(es, auto_construct=False)
+        om._add_parent_block_sets()
+        start = time.perf_counter()
+        method(om)
+        results[name] = (time.perf_counter() - start, bounds(om.flow))
+
+    assert results['elementwise'][1] == results['bulk'][1]
+
+    print('{0:>12}: {1:8.3f} s'.format('var creation', var_creation))
+    for name, (seconds, _) in results.items():
+        print('{0:>12}: {1:8.3f} s'.format(name, seconds))
+    print('{0:>12}: {1:8.2f}'.format(
+        'speedup', results['elementwise'][0] / results['bulk'][0]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--flows', type=int, default=200)
+    parser.add_argument('--timesteps', type=int, default=8760)
+    args = parser.parse_args()
+    run(args.flows, args.timesteps)
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark for building the constraints of GenericCHPs.
+
+Compares the alpha calculation and the rule-based constraints used up to
+v0.4.1 with the closed-form alphas of
+:meth:`oemof.solph.components.GenericCHP._calculate_alphas` and the
+constraints built from precomputed parameters in
+:class:`oemof.solph.components.GenericCHPBlock`, and checks that both produce
+the same constraints.
+
+Usage::
+
+    python benchmarks/generic_chp.py --chps 4 --timesteps 8760
+
+SPDX-License-Identifier: MIT
+
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import pyomo.environ as po
+from oemof import solph
+from oemof.solph.components import GenericCHPBlock
+from pyomo.repn import generate_standard_repn
+
+
+def create_energysystem(chps, timesteps):
+    """Energy system with `chps` GenericCHPs, every second one motoric."""
+    rng = np.random.RandomState(42)
+    es = solph.EnergySystem(
+        timeindex=pd.date_range('1/1/2020', periods=timesteps, freq='H'))
+    bgas = solph.Bus(label='gas')
+    bel = solph.Bus(label='el')
+    bth = solph.Bus(label='heat')
+    es.add(bgas, bel, bth)
+    for n in range(chps):
+        p_max = 150 + 10 * rng.rand(timesteps)
+        fuel = {'H_L_FG_share_max': 0.18 + 0.01 * rng.rand(timesteps)}
+        if n % 2:
+            fuel['H_L_FG_share_min'] = np.full(timesteps, 0.41)
+        es.add(solph.components.GenericCHP(
+            label='chp_{0}'.format(n),
+            fuel_input={bgas: solph.Flow(**fuel)},
+            electrical_output={bel: solph.Flow(
+                P_max_woDH=p_max,
+                P_min_woDH=p_max / 2,
+                Eta_el_max_woDH=0.5 + 0.03 * rng.rand(timesteps),
+                Eta_el_min_woDH=0.44 + 0.03 * rng.rand(timesteps))},
+            heat_output={bth: solph.Flow(Q_CW_min=np.full(timesteps, 10.))},
+            Beta=np.full(timesteps, 0.122), back_pressure=bool(n % 2)))
+    return es
+
+
+def loop_alphas(n):
+    """The alpha calculation as it was used up to v0.4.1."""
+    alphas = [[], []]
+    eb = list(n.electrical_output.keys())[0]
+    for i in range(len(n.electrical_output[eb].P_min_woDH)):
+        A = np.array([[1, n.electrical_output[eb].P_min_woDH[i]],
+                      [1, n.electrical_output[eb].P_max_woDH[i]]])
+        b = np.array([n.electrical_output[eb].P_min_woDH[i]
+                      / n.electrical_output[eb].Eta_el_min_woDH[i],
+                      n.electrical_output[eb].P_max_woDH[i]
+                      / n.electrical_output[eb].Eta_el_max_woDH[i]])
+        x = np.linalg.solve(A, b)
+        alphas[0].append(x[0])
+        alphas[1].append(x[1])
+    n._alphas = alphas
+
+
+def rule_based_block(block, group):
+    """The rule-based constraints as they were used up to v0.4.1."""
+    m = block.parent_block()
+    block.GENERICCHPS = po.Set(initialize=[n for n in group])
+    for name in ['H_F', 'H_L_FG_max', 'H_L_FG_min', 'P_woDH', 'P', 'Q']:
+        setattr(block, name, po.Var(block.GENERICCHPS, m.TIMESTEPS,
+                                    within=po.NonNegativeReals))
+    block.Y = po.Var(block.GENERICCHPS, m.TIMESTEPS, within=po.Binary)
+
+    def fuel(n):
+        return list(n.fuel_input.values())[0]
+
+    def el(n):
+        return list(n.electrical_output.values())[0]
+
+    def heat(n):
+        return list(n.heat_output.values())[0]
+
+    def has_min(n):
+        return getattr(fuel(n), 'H_L_FG_share_min', None) is not None
+
+    rules = {
+        'H_flow': lambda b, n, t: (
+            block.H_F[n, t] - m.flow[list(n.fuel_input.keys())[0], n, t]
+            == 0),
+        'Q_flow': lambda b, n, t: (
+            block.Q[n, t] - m.flow[n, list(n.heat_output.keys())[0], t]
+            == 0),
+        'P_flow': lambda b, n, t: (
+            block.P[n, t] - m.flow[n, list(n.electrical_output.keys())[0], t]
+            == 0),
+        'H_F_1': lambda b, n, t: (
+            -block.H_F[n, t] + n.alphas[0][t] * block.Y[n, t]
+            + n.alphas[1][t] * block.P_woDH[n, t] == 0),
+        'H_F_2': lambda b, n, t: (
+            -block.H_F[n, t] + n.alphas[0][t] * block.Y[n, t]
+            + n.alphas[1][t] * (block.P[n, t] + n.Beta[t] * block.Q[n, t])
+            == 0),
+        'H_F_3': lambda b, n, t: (
+            block.H_F[n, t] - block.Y[n, t] * (
+                el(n).P_max_woDH[t] / el(n).Eta_el_max_woDH[t]) <= 0),
+        'H_F_4': lambda b, n, t: (
+            block.H_F[n, t] - block.Y[n, t] * (
+                el(n).P_min_woDH[t] / el(n).Eta_el_min_woDH[t]) >= 0),
+        'H_L_FG_max_def': lambda b, n, t: (
+            -block.H_L_FG_max[n, t]
+            + block.H_F[n, t] * fuel(n).H_L_FG_share_max[t] == 0),
+        'Q_max_res': lambda b, n, t: (
+            (block.P[n, t] + block.Q[n, t] + block.H_L_FG_max[n, t]
+             + heat(n).Q_CW_min[t] * block.Y[n, t] - block.H_F[n, t] == 0)
+            if n.back_pressure is True else
+            (block.P[n, t] + block.Q[n, t] + block.H_L_FG_max[n, t]
+             + heat(n).Q_CW_min[t] * block.Y[n, t] - block.H_F[n, t] <= 0)),
+        'H_L_FG_min_def': lambda b, n, t: (
+            -block.H_L_FG_min[n, t]
+            + block.H_F[n, t] * fuel(n).H_L_FG_share_min[t] == 0
+            if has_min(n) else po.Constraint.Skip),
+        'Q_min_res': lambda b, n, t: (
+            block.P[n, t] + block.Q[n, t] + block.H_L_FG_min[n, t]
+            + heat(n).Q_CW_min[t] * block.Y[n, t] - block.H_F[n, t] >= 0
+            if has_min(n) else po.Constraint.Skip),
+    }
+    for name, rule in rules.items():
+        setattr(block, name, po.Constraint(block.GENERICCHPS, m.TIMESTEPS,
+                                           rule=rule))
+
+
+def standard_constraints(block):
+    """The constraints of `block` as comparable tuples."""
+    names = {}
+    for var in [block.parent_block().flow] + list(
+            block.component_objects(po.Var)):
+        names.update({id(v): (var.local_name, str(index))
+                      for index, v in var.items()})
+
+    result = {}
+    for constraint in block.component_objects(po.Constraint):
+        for index, c in constraint.items():
+            repn = generate_standard_repn(c.body)
+            terms = sorted(
+                (names[id(v)], coef) for v, coef in
+                zip(repn.linear_vars, repn.linear_coefs) if coef != 0)
+            result[constraint.local_name, str(index)] = (
+                c.lower, c.upper, repn.constant, terms)
+    return result
+
+
+def run(chps, timesteps):
+    es = create_energysystem(chps, timesteps)
+    group = [n for n in es.nodes
+             if isinstance(n, solph.components.GenericCHP)]
+
+    results = {}
+    for name, alphas, build in [
+            ('rule-based', loop_alphas, rule_based_block),
+            ('arrays', solph.components.GenericCHP._calculate_alphas,
+             GenericCHPBlock._create)]:
+        om = solph.Model(es, auto_construct=False)
+        om._add_parent_block_sets()
+        om._add_parent_block_variables()
+        om.GenericCHPBlock = GenericCHPBlock()
+        start = time.perf_counter()
+        for n in group:
+            alphas(n)
+        alpha_time = time.perf_counter() - start
+        start = time.perf_counter()
+        build(om.GenericCHPBlock, group)
+        om.GenericCHPBlock.construct()
+        results[name] = (alpha_time, time.perf_counter() - start,
+                         standard_constraints(om.GenericCHPBlock))
+
+    assert results['rule-based'][2] == results['arrays'][2]
+
+    print('{0:>12} {1:>10} {2:>10}'.format('', 'alphas', 'block'))
+    for name, (alpha_time, block_time, _) in results.items():
+        print('{0:>12}: {1:8.3f} s {2:8.3f} s'.format(
+            name, alpha_time, block_time))
+    print('{0:>12}: {1:8.2f}   {2:8.2f}'.format(
+        'speedup', results['rule-based'][0] / results['arrays'][0],
+        results['rule-based'][1] / results['arrays'][1]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--chps', type=int, default=4)
+    parser.add_argument('--timesteps', type=int, default=8760)
+    args = parser.parse_args()
+    run(args.chps, args.timesteps)
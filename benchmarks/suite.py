@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark suite scaling synthetic energy systems.
+
+For every combination of the given sizes, a synthetic energy system (see
+:mod:`benchmarks.synthetic`) is created and the time of the model build, of
+writing the lp-file, of solving (optional) and of the result processing as
+well as the peak memory (RSS) are measured. The lp-file is written by pyomo
+and by the native writer (:meth:`oemof.solph.matrix.LinearProblem.write`).
+Every case runs in a separate process, so that the peak memory belongs to the
+case.
+
+Without a solver, all variables are set to their lower bound (or zero) to
+measure the result processing.
+
+Usage::
+
+    python -m benchmarks.suite --timesteps 24 168 8760 --storages 0 10
+    python -m benchmarks.suite --buses 10 --solver cbc --output bench.json
+
+SPDX-License-Identifier: MIT
+
+"""
+
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.synthetic import create_energysystem
+from oemof import solph
+from oemof.solph.instrumentation import peak_memory
+from oemof.solph.profiling import count_components
+from pyomo.core import Var
+
+SIZES = ['timesteps', 'buses', 'transformers', 'storages', 'nonconvex',
+         'dsm']
+
+
+def set_dummy_solution(om):
+    """Set all variables without value to their lower bound or zero."""
+    for v in om.component_data_objects(Var):
+        if v.value is None:
+            v.value = v.lb if v.lb is not None else 0
+
+
+def run_case(config, solver=None):
+    """
+    Measure a single case.
+
+    Parameters
+    ----------
+    config : dict
+        Keyword arguments of :func:`benchmarks.synthetic.create_energysystem`.
+    solver : str
+        Solver to solve the model with, e.g. 'cbc'. Without a solver the
+        solve step is skipped.
+
+    Returns
+    -------
+    dict : the config, the time in seconds of every step, the number of
+        variables and constraints and the peak RSS in bytes
+    """
+    result = dict(config)
+    last = time.perf_counter()
+
+    def lap(step):
+        nonlocal last
+        now = time.perf_counter()
+        result[step] = now - last
+        last = now
+
+    es = create_energysystem(**config)
+    lap('energysystem')
+    om = solph.Model(es)
+    lap('build')
+    with tempfile.TemporaryDirectory() as tmp:
+        om.write(os.path.join(tmp, 'model.lp'),
+                 io_options={'symbolic_solver_labels': False})
+        lap('lp_write')
+        om.to_matrix().write(os.path.join(tmp, 'native.lp'))
+        lap('lp_write_native')
+    if solver is None:
+        set_dummy_solution(om)
+    else:
+        om.solve(solver=solver)
+    lap('solve')
+    om.results()
+    lap('results')
+    result['variables'], result['constraints'] = count_components(om)
+    result['peak_rss'] = peak_memory()
+    return result
+
+
+def run(cases, solver=None):
+    """Run every case in a separate process and return the results."""
+    results = []
+    for config in cases:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(run_case, config, solver).result()
+        print_result(result)
+        results.append(result)
+    return results
+
+
+def print_result(result):
+    sizes = ' '.join('{0}={1}'.format(k, result[k]) for k in SIZES)
+    steps = ' '.join('{0}={1:.3f}s'.format(k, result[k]) for k in [
+        'build', 'lp_write', 'lp_write_native', 'solve', 'results'])
+    rss = result['peak_rss']
+    rss = '-' if rss is None else '{0:.0f}MB'.format(rss / 2 ** 20)
+    print('{0} | vars={1} cons={2} | {3} | rss={4}'.format(
+        sizes, result['variables'], result['constraints'], steps, rss))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    defaults = {'timesteps': [24, 168, 720], 'buses': [2],
+                'transformers': [2], 'storages': [1], 'nonconvex': [1],
+                'dsm': [0]}
+    for size in SIZES:
+        parser.add_argument('--' + size, type=int, nargs='+',
+                            default=defaults[size])
+    parser.add_argument('--dsm-method', default='delay',
+                        choices=['delay', 'interval'])
+    parser.add_argument('--solver', default=None,
+                        help='e.g. cbc or glpk, no solver by default')
+    parser.add_argument('--output', default=None,
+                        help='path of a json file for the results')
+    args = parser.parse_args(args)
+
+    cases = [dict(zip(SIZES, sizes), dsm_method=args.dsm_method)
+             for sizes in itertools.product(*[getattr(args, s)
+                                              for s in SIZES])]
+    results = run(cases, solver=args.solver)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""Synthetic energy systems for benchmarks.
+
+The energy systems consist of a ring of buses. Every bus has a demand, a
+source and a shortage source to keep the problem feasible. Transformers,
+storages, nonconvex sources and DSM sinks are distributed over the buses.
+
+SPDX-License-Identifier: MIT
+
+"""
+
+import numpy as np
+import pandas as pd
+from oemof import solph
+from oemof.solph import custom
+
+
+def create_energysystem(timesteps=24, buses=2, transformers=2, storages=1,
+                        nonconvex=1, dsm=0, dsm_method='delay', seed=42):
+    """
+    Create a synthetic energy system.
+
+    Parameters
+    ----------
+    timesteps : int
+        Number of (hourly) time steps.
+    buses : int
+        Number of buses. Every bus has a demand, a source and a shortage.
+    transformers : int
+        Number of transformers, the n-th connects bus n to bus n + 1.
+    storages : int
+        Number of GenericStorages.
+    nonconvex : int
+        Number of sources with a NonConvex flow.
+    dsm : int
+        Number of SinkDSMs.
+    dsm_method : str
+        Method of the SinkDSMs, 'delay' or 'interval'.
+    seed : int
+        Seed of the random profiles.
+
+    Returns
+    -------
+    EnergySystem
+    """
+    rng = np.random.RandomState(seed)
+    es = solph.EnergySystem(
+        timeindex=pd.date_range('1/1/2020', periods=timesteps, freq='H'))
+
+    def profile(low=0, high=1):
+        return low + (high - low) * rng.rand(timesteps)
+
+    bus = [solph.Bus(label='bus_{0}'.format(n)) for n in range(buses)]
+    es.add(*bus)
+
+    for n, b in enumerate(bus):
+        es.add(solph.Sink(label='demand_{0}'.format(n), inputs={
+            b: solph.Flow(nominal_value=100, fix=profile(0.2, 0.8))}))
+        es.add(solph.Source(label='source_{0}'.format(n), outputs={
+            b: solph.Flow(nominal_value=50, variable_costs=profile(10, 50))}))
+        es.add(solph.Source(label='shortage_{0}'.format(n), outputs={
+            b: solph.Flow(variable_costs=1000)}))
+
+    for n in range(transformers):
+        b_in, b_out = bus[n % buses], bus[(n + 1) % buses]
+        es.add(solph.Transformer(
+            label='transformer_{0}'.format(n),
+            inputs={b_in: solph.Flow()},
+            outputs={b_out: solph.Flow(nominal_value=40, variable_costs=1)},
+            conversion_factors={b_out: 0.9}))
+
+    for n in range(storages):
+        b = bus[n % buses]
+        es.add(solph.components.GenericStorage(
+            label='storage_{0}'.format(n), nominal_storage_capacity=200,
+            initial_storage_level=0.5, loss_rate=0.001,
+            inputs={b: solph.Flow(nominal_value=40, variable_costs=0.5)},
+            outputs={b: solph.Flow(nominal_value=40)},
+            inflow_conversion_factor=0.95, outflow_conversion_factor=0.95))
+
+    for n in range(nonconvex):
+        b = bus[n % buses]
+        es.add(solph.Source(label='plant_{0}'.format(n), outputs={
+            b: solph.Flow(nominal_value=60, min=0.4,
+                          variable_costs=profile(20, 30),
+                          nonconvex=solph.NonConvex(
+                              startup_costs=100, minimum_uptime=2))}))
+
+    for n in range(dsm):
+        b = bus[n % buses]
+        es.add(custom.SinkDSM(
+            label='dsm_{0}'.format(n), inputs={b: solph.Flow()},
+            demand=profile(5, 15), capacity_up=profile(0, 5),
+            capacity_down=profile(0, 5), method=dsm_method, delay_time=3,
+            shift_interval=24, cost_dsm_down=2))
+
+    return es
@@ -94,6 +94,8 @@ setup(
     extras_require={
         "dev": ["pytest", "sphinx", "sphinx_rtd_theme"],
         "dummy": ["oemof"],
+        "highs": ["highspy"],
+        "parquet": ["pyarrow"],
     },
     entry_points={
         "console_scripts": [
@@ -1,9 +1,19 @@
 __version__ = "0.4.2.dev0"
 
+from . import aggregation  # noqa: F401
+from . import cache  # noqa: F401
 from . import constraints  # noqa: F401
 from . import custom  # noqa: F401
+from . import decomposition  # noqa: F401
 from . import helpers  # noqa: F401
+from . import instrumentation  # noqa: F401
+from . import matrix  # noqa: F401
+from . import parallel  # noqa: F401
+from . import rolling_horizon  # noqa: F401
+from . import scenarios  # noqa: F401
+from . import snapshot  # noqa: F401
 from . import views  # noqa: F401
+from . import warmstart  # noqa: F401
 from .components import ExtractionTurbineCHP  # noqa: F401
 from .components import GenericCHP  # noqa: F401
 from .components import GenericStorage  # noqa: F401
@@ -0,0 +1,529 @@
+# -*- coding: utf-8 -*-
+
+"""Time series aggregation into typical periods.
+
+The time horizon of the energy system is split into periods of equal length
+(e.g. days), which are clustered into a small number of typical periods. The
+model is built for the typical periods only. The variable costs are weighted
+by the number of periods represented by every typical period.
+
+The content of storages is linked across the periods following Kotzur et al.
+(2018): Time series aggregation for energy system design: Modeling seasonal
+storage, https://doi.org/10.1016/j.apenergy.2018.01.023. The content within a
+typical period is modelled relative to the content at the start of the
+period. An inter-period content variable for every original period carries
+the content over the whole time horizon.
+
+SPDX-License-Identifier: MIT
+
+"""
+import numpy as np
+import pandas as pd
+from oemof.solph import helpers
+from oemof.solph import processing
+from oemof.solph.components import GenericStorage
+from oemof.solph.models import Model
+from pyomo.core import Constraint
+from pyomo.core import NonNegativeReals
+from pyomo.core import Reals
+from pyomo.core import Set
+from pyomo.core import Var
+from pyomo.core.base.block import SimpleBlock
+
+
+def _squared_distances(data, centers):
+    """Squared euclidean distances of every row of `data` to every center."""
+    return ((data ** 2).sum(axis=1)[:, None] - 2 * data @ centers.T +
+            (centers ** 2).sum(axis=1)[None, :]).clip(min=0)
+
+
+def kmeans(data, n_clusters, seed=0, max_iter=300):
+    """
+    Cluster the rows of `data` with the k-means algorithm.
+
+    The centers are initialised with k-means++.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        Two dimensional array, one row per observation.
+    n_clusters : int
+    seed : int
+        Seed of the random initialisation.
+    max_iter : int
+        Maximum number of iterations.
+
+    Returns
+    -------
+    tuple : (labels, centers)
+        Cluster of every row and the centers of the clusters.
+
+    Examples
+    --------
+    >>> labels, centers = kmeans(np.array([[0.], [0.1], [5.], [5.2]]), 2)
+    >>> labels[0] == labels[1] != labels[2] == labels[3]
+    True
+    """
+    data = np.asarray(data, dtype=float)
+    rng = np.random.RandomState(seed)
+    centers = data[[rng.randint(len(data))]]
+    for _ in range(1, n_clusters):
+        distances = _squared_distances(data, centers).min(axis=1)
+        if distances.sum() > 0:
+            p = distances / distances.sum()
+        else:
+            p = np.full(len(data), 1 / len(data))
+        centers = np.vstack([centers, data[rng.choice(len(data), p=p)]])
+
+    labels = None
+    for _ in range(max_iter):
+        distances = _squared_distances(data, centers)
+        new_labels = distances.argmin(axis=1)
+        if labels is not None and (new_labels == labels).all():
+            break
+        labels = new_labels
+        for k in range(n_clusters):
+            members = labels == k
+            if members.any():
+                centers[k] = data[members].mean(axis=0)
+            else:
+                # move the center of an empty cluster to the worst row
+                worst = distances.min(axis=1).argmax()
+                centers[k] = data[worst]
+                labels[worst] = k
+    return labels, centers
+
+
+def kmedoids(data, n_clusters, max_iter=300):
+    """
+    Cluster the rows of `data` with the k-medoids algorithm.
+
+    The medoids are initialised greedily (BUILD step of the PAM algorithm)
+    and improved by alternating the assignment of the rows and the choice of
+    the medoids, so the result is deterministic.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        Two dimensional array, one row per observation.
+    n_clusters : int
+    max_iter : int
+        Maximum number of iterations.
+
+    Returns
+    -------
+    tuple : (labels, medoids)
+        Cluster of every row and the row number of the medoid of every
+        cluster.
+
+    Examples
+    --------
+    >>> labels, medoids = kmedoids(np.array([[0.], [0.1], [5.], [5.2]]), 2)
+    >>> labels[0] == labels[1] != labels[2] == labels[3]
+    True
+    """
+    data = np.asarray(data, dtype=float)
+    distances = np.sqrt(_squared_distances(data, data))
+
+    medoids = [int(distances.sum(axis=1).argmin())]
+    nearest = distances[medoids[0]]
+    for _ in range(1, n_clusters):
+        gain = np.clip(nearest[None, :] - distances, 0, None).sum(axis=1)
+        gain[medoids] = -1
+        medoids.append(int(gain.argmax()))
+        nearest = np.minimum(nearest, distances[medoids[-1]])
+    medoids = np.array(medoids)
+
+    for _ in range(max_iter):
+        labels = distances[:, medoids].argmin(axis=1)
+        new_medoids = medoids.copy()
+        for k in range(n_clusters):
+            members = np.flatnonzero(labels == k)
+            costs = distances[np.ix_(members, members)].sum(axis=1)
+            new_medoids[k] = members[costs.argmin()]
+        if (new_medoids == medoids).all():
+            break
+        medoids = new_medoids
+    return distances[:, medoids].argmin(axis=1), medoids
+
+
+class TimeSeriesAggregation:
+    """
+    Typical periods of the time series of an energy system.
+
+    All sequences of (at least) the length of the time index, which are
+    attributes of the nodes, the flows or their options (e.g. `fix`, `max`,
+    `min` and `variable_costs`), are split into periods and clustered
+    together. Longer sequences are cut to the length of the time index. Every
+    sequence is scaled to the range 0 to 1 for the clustering.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem
+    period_length : int
+        Number of time steps of a period, e.g. 24 for days of hourly values.
+        The number of time steps has to be a multiple of it.
+    typical_periods : int
+        Number of typical periods.
+    method : str
+        'kmedoids' uses the medoid period (an original period) of every
+        cluster as typical period, 'kmeans' the mean of the periods of a
+        cluster.
+    seed : int
+        Seed of the initialisation of 'kmeans'.
+
+    Attributes
+    ----------
+    order : numpy.ndarray
+        Typical period of every original period.
+    weights : numpy.ndarray
+        Number of original periods represented by every typical period.
+    timeindex : pandas.DatetimeIndex
+        Time index of the typical periods (the first time steps of the
+        original time index).
+    original_timeindex : pandas.DatetimeIndex
+        Time index of the energy system.
+
+    Examples
+    --------
+    >>> aggregation = TimeSeriesAggregation(
+    ...     es, period_length=24, typical_periods=12)  # doctest: +SKIP
+    >>> with aggregation.aggregated():  # doctest: +SKIP
+    ...     om = aggregation.model()
+    """
+    def __init__(self, energysystem, period_length, typical_periods,
+                 method='kmedoids', seed=0):
+        self.energysystem = energysystem
+        self.period_length = period_length
+        self.typical_periods = typical_periods
+        self.method = method
+
+        length = len(energysystem.timeindex)
+        if length % period_length != 0:
+            raise ValueError(
+                "The number of time steps ({0}) has to be a multiple of the "
+                "period length ({1}).".format(length, period_length))
+        self.periods = length // period_length
+        if not 0 < typical_periods <= self.periods:
+            raise ValueError(
+                "The number of typical periods has to be between 1 and the "
+                "number of periods ({0}).".format(self.periods))
+
+        features = []
+        for values in helpers.time_series(energysystem):
+            try:
+                values = np.asarray(values, dtype=float)
+            except (TypeError, ValueError):
+                continue
+            values = np.nan_to_num(values)
+            span = values.max() - values.min()
+            if span > 0:
+                features.append(((values - values.min()) / span).reshape(
+                    self.periods, period_length))
+        if features:
+            features = np.hstack(features)
+        else:
+            features = np.zeros((self.periods, 1))
+
+        if method == 'kmedoids':
+            self.order, self.medoids = kmedoids(features, typical_periods)
+        elif method == 'kmeans':
+            self.order, _ = kmeans(features, typical_periods, seed=seed)
+            self.medoids = None
+        else:
+            raise ValueError("Unknown method {0!r}, use 'kmedoids' or "
+                             "'kmeans'.".format(method))
+        self.weights = np.bincount(self.order, minlength=typical_periods)
+        self.original_timeindex = energysystem.timeindex
+        self.timeindex = energysystem.timeindex[
+            :typical_periods * period_length]
+
+    def aggregate(self, values):
+        """
+        Get the typical periods of a sequence of the original length.
+
+        Examples
+        --------
+        >>> aggregation.aggregate(es_values)  # doctest: +SKIP
+        """
+        periods = np.asarray(values).reshape(self.periods,
+                                             self.period_length)
+        if self.medoids is not None:
+            return periods[self.medoids].ravel()
+        periods = periods.astype(float)
+        return np.vstack([periods[self.order == k].mean(axis=0)
+                          for k in range(self.typical_periods)]).ravel()
+
+    def expand(self, values):
+        """
+        Get a sequence of the original length from the values of the typical
+        periods.
+        """
+        return np.asarray(values).reshape(
+            self.typical_periods, self.period_length)[self.order].ravel()
+
+    def aggregated(self):
+        """
+        Context manager, which temporarily replaces the sequences of the
+        energy system by their typical periods.
+        """
+        return helpers.replaced_time_series(
+            self.energysystem, self.timeindex, self.aggregate)
+
+    def model(self, **kwargs):
+        """
+        Build a Model of the typical periods with linked storages.
+
+        Has to be called within :meth:`aggregated`. The objective weighting
+        is the time increment multiplied by the weight of the typical period.
+        The `kwargs` are passed to the Model.
+        """
+        if len(self.energysystem.timeindex) != len(self.timeindex):
+            raise ValueError(
+                "The model has to be built within the `aggregated()` "
+                "context.")
+        om = Model(self.energysystem, auto_construct=False, **kwargs)
+        weights = np.repeat(self.weights, self.period_length)
+        om.objective_weighting = [om.timeincrement[t] * weights[t]
+                                  for t in range(len(weights))]
+        om._construct()
+
+        storages = [n for n in self.energysystem.nodes
+                    if isinstance(n, GenericStorage)]
+        if storages:
+            om.InterPeriodStorageBlock = InterPeriodStorageBlock()
+            om.InterPeriodStorageBlock._create(storages, self)
+        return om
+
+    def results(self, om):
+        """
+        Get the results of a solved model of the typical periods expanded to
+        the original time index (see :meth:`expand_results`).
+
+        Has to be called within :meth:`aggregated`.
+        """
+        block = getattr(om, 'InterPeriodStorageBlock', None)
+        if block is None:
+            return self.expand_results(processing.results(om), om)
+        # the inter-period content is not indexed by the time steps of the
+        # model and is part of the storage content of the expanded results
+        om.del_component(block)
+        try:
+            results = processing.results(om)
+        finally:
+            om.add_component('InterPeriodStorageBlock', block)
+        return self.expand_results(results, om)
+
+    def expand_results(self, results, om):
+        """
+        Expand the results of a model of the typical periods to the original
+        time index.
+
+        The sequences of every original period are the ones of its typical
+        period. The storage content is the sum of the inter-period content
+        and the content within the typical period.
+        """
+        positions = self.expand(np.arange(len(self.timeindex)))
+        expanded = {}
+        for k, v in results.items():
+            sequences = pd.DataFrame(
+                v['sequences'].to_numpy()[positions],
+                index=self.original_timeindex, columns=v['sequences'].columns)
+            expanded[k] = {'scalars': v['scalars'], 'sequences': sequences}
+
+        block = getattr(om, 'InterPeriodStorageBlock', None)
+        if block is not None:
+            for n, content in block.storage_content().items():
+                expanded[n, None]['sequences']['storage_content'] = content
+        return expanded
+
+
+def solve(energysystem, period_length, typical_periods, method='kmedoids',
+          model_kwargs=None, **solve_kwargs):
+    """
+    Optimise an energy system with typical periods.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem
+    period_length, typical_periods, method :
+        See :class:`TimeSeriesAggregation`.
+    model_kwargs : dict
+        Keyword arguments for the Model, e.g. `constraint_groups`.
+    solve_kwargs :
+        Keyword arguments for :meth:`~oemof.solph.models.BaseModel.solve`.
+
+    Returns
+    -------
+    dict : Results of the original time index in the format of
+        :func:`oemof.solph.processing.results`.
+
+    Examples
+    --------
+    >>> from oemof.solph import aggregation  # doctest: +SKIP
+    >>> results = aggregation.solve(es, period_length=24, typical_periods=12,
+    ...                             solver='cbc')  # doctest: +SKIP
+    """
+    aggregation = TimeSeriesAggregation(energysystem, period_length,
+                                        typical_periods, method=method)
+    with aggregation.aggregated():
+        om = aggregation.model(**(model_kwargs or {}))
+        om.solve(**solve_kwargs)
+        return aggregation.results(om)
+
+
+class InterPeriodStorageBlock(SimpleBlock):
+    r"""
+    Link the content of storages across the periods of a
+    :class:`TimeSeriesAggregation`.
+
+    The storage content :math:`E^{intra}` of the storage blocks is relative
+    to the content at the start of the typical period. The inter-period
+    content :math:`E^{inter}_p` is the content at the start of the original
+    period :math:`p` with the typical period :math:`k(p)`:
+
+    .. math::
+        &
+        E^{inter}_{p+1} = E^{inter}_p \cdot D_{k(p), P-1}
+        + E^{intra}_{k(p), P-1} \\
+        &
+        E_{min, t} \leq E^{inter}_p \cdot D_{k(p), h}
+        + E^{intra}_{k(p), h} \leq E_{max, t}
+        \quad \forall p, h \\
+        &
+        E^{inter}_0 = E_{init}
+
+    :math:`D_{k, h}` is the self-discharge from the start of the typical
+    period to the end of time step :math:`h` and :math:`P` the period length.
+    If the storage is balanced, the inter-period content of the end of the
+    time horizon equals :math:`E_{init}`.
+    """
+    CONSTRAINT_GROUP = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def _create(self, group=None, aggregation=None):
+        if group is None:
+            return None
+
+        m = self.parent_block()
+        length = aggregation.period_length
+        periods = aggregation.periods
+
+        self.order = aggregation.order
+        self.blocks = {}
+        self.decay = {}
+        for n in group:
+            if n.investment:
+                self.blocks[n] = m.GenericInvestmentStorageBlock
+            else:
+                self.blocks[n] = m.GenericStorageBlock
+            loss = np.array([(1 - n.loss_rate[t]) ** m.timeincrement[t]
+                             for t in m.TIMESTEPS], dtype=float)
+            self.decay[n] = np.cumprod(loss.reshape(-1, length), axis=1)
+
+        #  ************* SETS *********************************
+
+        self.STORAGES = Set(initialize=group)
+        self.PERIODS = Set(initialize=range(periods + 1))
+
+        #  ************* VARIABLES *****************************
+
+        self.inter_content = Var(self.STORAGES, self.PERIODS,
+                                 within=NonNegativeReals)
+
+        #  ************* CONSTRAINTS ***************************
+
+        self.intra_start = Constraint(self.STORAGES,
+                                      range(aggregation.typical_periods),
+                                      noruleinit=True)
+        self.inter_balance = Constraint(self.STORAGES, range(periods),
+                                        noruleinit=True)
+        self.inter_init = Constraint(self.STORAGES, noruleinit=True)
+        self.inter_balanced = Constraint(self.STORAGES, noruleinit=True)
+        self.min_content = Constraint(
+            self.STORAGES, range(periods * length), noruleinit=True)
+        self.max_content = Constraint(
+            self.STORAGES, range(periods * length), noruleinit=True)
+
+        for n in group:
+            block = self.blocks[n]
+            content = block.storage_content
+            init = block.init_content[n]
+
+            # the content within a typical period starts at zero: the term of
+            # the previous content is removed from the storage balance
+            for k in range(aggregation.typical_periods):
+                t = k * length
+                factor = (1 - n.loss_rate[t]) ** m.timeincrement[t]
+                if t == 0:
+                    balance = block.balance_first[n]
+                    body = balance.body + init * factor
+                else:
+                    balance = block.balance[n, t]
+                    body = balance.body + content[n, t - 1] * factor
+                balance.deactivate()
+                self.intra_start.add((n, k), body == 0)
+            if n in getattr(block, 'balanced_cstr', {}):
+                block.balanced_cstr[n].deactivate()
+
+            # the bounds of the content apply to the sum of inter-period and
+            # intra-period content
+            for t in m.TIMESTEPS:
+                content[n, t].domain = Reals
+                content[n, t].setlb(None)
+                content[n, t].setub(None)
+                for constraint in ['max_storage_content',
+                                   'min_storage_content']:
+                    if (n, t) in getattr(block, constraint, {}):
+                        getattr(block, constraint)[n, t].deactivate()
+
+            for p in range(periods):
+                k = aggregation.order[p]
+                for h in range(length):
+                    t = k * length + h
+                    total = (self.inter_content[n, p] * self.decay[n][k, h] +
+                             content[n, t])
+                    if n.investment:
+                        capacity = n.investment.existing + block.invest[n]
+                    else:
+                        capacity = n.nominal_storage_capacity
+                    self.min_content.add(
+                        (n, p * length + h),
+                        (capacity * n.min_storage_level[t] <= total))
+                    self.max_content.add(
+                        (n, p * length + h),
+                        (total <= capacity * n.max_storage_level[t]))
+
+                end = k * length + length - 1
+                self.inter_balance.add((n, p), (
+                    self.inter_content[n, p + 1] ==
+                    self.inter_content[n, p] * self.decay[n][k, -1] +
+                    content[n, end]))
+
+            self.inter_init.add(n, (self.inter_content[n, 0] == init))
+            if n.balanced:
+                self.inter_balanced.add(n, (
+                    self.inter_content[n, periods] == init))
+
+    def storage_content(self):
+        """
+        Storage content at the end of every time step of the original time
+        index (inter-period plus intra-period content) of a solved model.
+
+        Returns
+        -------
+        dict : {storage: numpy.ndarray}
+        """
+        m = self.parent_block()
+        result = {}
+        for n in self.STORAGES:
+            inter = np.array([self.inter_content[n, p].value
+                              for p in self.PERIODS][:-1], dtype=float)
+            intra = np.array([self.blocks[n].storage_content[n, t].value
+                              for t in m.TIMESTEPS], dtype=float).reshape(
+                self.decay[n].shape)
+            result[n] = (inter[:, None] * self.decay[n][self.order] +
+                         intra[self.order]).ravel()
+        return result
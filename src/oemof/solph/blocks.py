@@ -15,6 +15,9 @@ SPDX-License-Identifier: MIT
 
 """
 
+import numpy as np
+from oemof.solph.plumbing import linear_expression
+from oemof.solph.plumbing import sequence_to_array
 from pyomo.core import Binary
 from pyomo.core import BuildAction
 from pyomo.core import Constraint
@@ -160,8 +163,9 @@ class Flow(SimpleBlock):
             """Rule definition for build action of max. sum flow constraint.
             """
             for inp, out in self.SUMMED_MAX_FLOWS:
-                lhs = sum(m.flow[inp, out, ts] * m.timeincrement[ts]
-                          for ts in m.TIMESTEPS)
+                lhs = linear_expression(
+                    [m.timeincrement[ts] for ts in m.TIMESTEPS],
+                    [m.flow[inp, out, ts] for ts in m.TIMESTEPS])
                 rhs = (m.flows[inp, out].summed_max *
                        m.flows[inp, out].nominal_value)
                 self.summed_max.add((inp, out), lhs <= rhs)
@@ -172,8 +176,9 @@ class Flow(SimpleBlock):
             """Rule definition for build action of min. sum flow constraint.
             """
             for inp, out in self.SUMMED_MIN_FLOWS:
-                lhs = sum(m.flow[inp, out, ts] * m.timeincrement[ts]
-                          for ts in m.TIMESTEPS)
+                lhs = linear_expression(
+                    [m.timeincrement[ts] for ts in m.TIMESTEPS],
+                    [m.flow[inp, out, ts] for ts in m.TIMESTEPS])
                 rhs = (m.flows[inp, out].summed_min *
                        m.flows[inp, out].nominal_value)
                 self.summed_min.add((inp, out), lhs >= rhs)
@@ -186,10 +191,13 @@ class Flow(SimpleBlock):
             for inp, out in self.POSITIVE_GRADIENT_FLOWS:
                 for ts in m.TIMESTEPS:
                     if ts > 0:
-                        lhs = m.flow[inp, out, ts] - m.flow[inp, out, ts-1]
-                        rhs = self.positive_gradient[inp, out, ts]
+                        lhs = linear_expression(
+                            [1, -1, -1], [m.flow[inp, out, ts],
+                                          m.flow[inp, out, ts-1],
+                                          self.positive_gradient[
+                                              inp, out, ts]])
                         self.positive_gradient_constr.add((inp, out, ts),
-                                                          lhs <= rhs)
+                                                          lhs <= 0)
                     else:
                         pass  # return(Constraint.Skip)
         self.positive_gradient_constr = Constraint(
@@ -203,10 +211,13 @@ class Flow(SimpleBlock):
             for inp, out in self.NEGATIVE_GRADIENT_FLOWS:
                 for ts in m.TIMESTEPS:
                     if ts > 0:
-                        lhs = m.flow[inp, out, ts-1] - m.flow[inp, out, ts]
-                        rhs = self.negative_gradient[inp, out, ts]
+                        lhs = linear_expression(
+                            [1, -1, -1], [m.flow[inp, out, ts-1],
+                                          m.flow[inp, out, ts],
+                                          self.negative_gradient[
+                                              inp, out, ts]])
                         self.negative_gradient_constr.add((inp, out, ts),
-                                                          lhs <= rhs)
+                                                          lhs <= 0)
                     else:
                         pass  # return(Constraint.Skip)
         self.negative_gradient_constr = Constraint(
@@ -228,29 +239,33 @@ class Flow(SimpleBlock):
         """
         m = self.parent_block()
 
-        variable_costs = 0
-        gradient_costs = 0
+        coefficients = []
+        variables = []
+        gradient_coefficients = []
+        gradient_variables = []
+        length = len(m.TIMESTEPS)
+        weighting = sequence_to_array(m.objective_weighting, length)
 
         for i, o in m.FLOWS:
             if m.flows[i, o].variable_costs[0] is not None:
-                for t in m.TIMESTEPS:
-                    variable_costs += (m.flow[i, o, t] *
-                                       m.objective_weighting[t] *
-                                       m.flows[i, o].variable_costs[t])
+                coefficients.extend((weighting * sequence_to_array(
+                    m.flows[i, o].variable_costs, length)).tolist())
+                variables.extend(m.flow[i, o, t] for t in m.TIMESTEPS)
 
             if m.flows[i, o].positive_gradient['ub'][0] is not None:
                 for t in m.TIMESTEPS:
-                    gradient_costs += (self.positive_gradient[i, o, t] *
-                                       m.flows[i, o].positive_gradient[
-                                           'costs'])
+                    gradient_coefficients.append(
+                        m.flows[i, o].positive_gradient['costs'])
+                    gradient_variables.append(self.positive_gradient[i, o, t])
 
             if m.flows[i, o].negative_gradient['ub'][0] is not None:
                 for t in m.TIMESTEPS:
-                    gradient_costs += (self.negative_gradient[i, o, t] *
-                                       m.flows[i, o].negative_gradient[
-                                           'costs'])
+                    gradient_coefficients.append(
+                        m.flows[i, o].negative_gradient['costs'])
+                    gradient_variables.append(self.negative_gradient[i, o, t])
 
-        return variable_costs + gradient_costs
+        return linear_expression(coefficients + gradient_coefficients,
+                                 variables + gradient_variables)
 
 
 class InvestmentFlow(SimpleBlock):
@@ -528,11 +543,11 @@ class InvestmentFlow(SimpleBlock):
             """Rule definition of constraint to fix flow variable
             of investment flow to (normed) actual value
             """
-            expr = (m.flow[i, o, t] == (
-                    (m.flows[i, o].investment.existing + self.invest[i, o]) *
-                    m.flows[i, o].fix[t]))
-
-            return expr
+            fix = m.flows[i, o].fix[t]
+            expr = linear_expression(
+                [1, -fix], [m.flow[i, o, t], self.invest[i, o]],
+                constant=-m.flows[i, o].investment.existing * fix)
+            return expr == 0
         self.fixed = Constraint(self.FIXED_INVESTFLOWS, m.TIMESTEPS,
                                 rule=_investflow_fixed_rule)
 
@@ -540,10 +555,11 @@ class InvestmentFlow(SimpleBlock):
             """Rule definition of constraint setting an upper bound of flow
             variable in investment case.
             """
-            expr = (m.flow[i, o, t] <= (
-                (m.flows[i, o].investment.existing + self.invest[i, o]) *
-                m.flows[i, o].max[t]))
-            return expr
+            maximum = m.flows[i, o].max[t]
+            expr = linear_expression(
+                [1, -maximum], [m.flow[i, o, t], self.invest[i, o]],
+                constant=-m.flows[i, o].investment.existing * maximum)
+            return expr <= 0
         self.max = Constraint(self.NON_FIXED_INVESTFLOWS, m.TIMESTEPS,
                               rule=_max_investflow_rule)
 
@@ -551,10 +567,11 @@ class InvestmentFlow(SimpleBlock):
             """Rule definition of constraint setting a lower bound on flow
             variable in investment case.
             """
-            expr = (m.flow[i, o, t] >= (
-                (m.flows[i, o].investment.existing + self.invest[i, o]) *
-                m.flows[i, o].min[t]))
-            return expr
+            minimum = m.flows[i, o].min[t]
+            expr = linear_expression(
+                [1, -minimum], [m.flow[i, o, t], self.invest[i, o]],
+                constant=-m.flows[i, o].investment.existing * minimum)
+            return expr >= 0
         self.min = Constraint(self.MIN_INVESTFLOWS, m.TIMESTEPS,
                               rule=_min_investflow_rule)
 
@@ -593,18 +610,18 @@ class InvestmentFlow(SimpleBlock):
             return 0
 
         m = self.parent_block()
-        investment_costs = 0
+        coefficients = []
+        variables = []
 
         for i, o in self.CONVEX_INVESTFLOWS:
-            investment_costs += (
-                self.invest[i, o] * m.flows[i, o].investment.ep_costs)
+            coefficients.append(m.flows[i, o].investment.ep_costs)
+            variables.append(self.invest[i, o])
         for i, o in self.NON_CONVEX_INVESTFLOWS:
-            investment_costs += (
-                    self.invest[i, o] *
-                    m.flows[i, o].investment.ep_costs +
-                    self.invest_status[i, o] *
-                    m.flows[i, o].investment.offset)
+            coefficients += [m.flows[i, o].investment.ep_costs,
+                             m.flows[i, o].investment.offset]
+            variables += [self.invest[i, o], self.invest_status[i, o]]
 
+        investment_costs = linear_expression(coefficients, variables)
         self.investment_costs = Expression(expr=investment_costs)
         return investment_costs
 
@@ -638,23 +655,57 @@ class Bus(SimpleBlock):
 
         m = self.parent_block()
 
+        def _busbalance_rule(block):
+            block._add_balances(group)
+        self.balance = Constraint(group, m.TIMESTEPS, noruleinit=True)
+        self.balance_build = BuildAction(rule=_busbalance_rule)
+
+    def _add_balances(self, buses):
+        """Adds the balance constraints of `buses` for all time steps."""
+        m = self.parent_block()
+
         ins = {}
         outs = {}
-        for n in group:
+        for n in buses:
             ins[n] = [i for i in n.inputs]
             outs[n] = [o for o in n.outputs]
 
-        def _busbalance_rule(block):
-            for t in m.TIMESTEPS:
-                for g in group:
-                    lhs = sum(m.flow[i, g, t] for i in ins[g])
-                    rhs = sum(m.flow[g, o, t] for o in outs[g])
-                    expr = (lhs == rhs)
-                    # no inflows no outflows yield: 0 == 0 which is True
-                    if expr is not True:
-                        block.balance.add((g, t), expr)
-        self.balance = Constraint(group, m.TIMESTEPS, noruleinit=True)
-        self.balance_build = BuildAction(rule=_busbalance_rule)
+        for t in m.TIMESTEPS:
+            for g in buses:
+                # no inflows no outflows yield: 0 == 0 which is True
+                if not ins[g] and not outs[g]:
+                    continue
+                # without inflows, the outflows are the body of the
+                # constraint (as for pyomo's `0 == rhs`)
+                sign = -1 if ins[g] else 1
+                expr = linear_expression(
+                    [1] * len(ins[g]) + [sign] * len(outs[g]),
+                    [m.flow[i, g, t] for i in ins[g]] +
+                    [m.flow[g, o, t] for o in outs[g]])
+                self.balance.add((g, t), expr == 0)
+
+    def _add(self, group, changed):
+        """Adds the balance constraints of new buses and replaces the ones of
+        buses with new flows in the created block (see
+        :meth:`~oemof.solph.models.Model.add_nodes`).
+
+        Parameters
+        ----------
+        group : list
+            All buses of the block.
+        changed : list
+            New buses and buses with new flows.
+        """
+        m = self.parent_block()
+        buses = list(self.balance.index_set().subsets())[0]
+        for g in changed:
+            if g in buses:
+                for t in m.TIMESTEPS:
+                    if (g, t) in self.balance:
+                        del self.balance[g, t]
+            else:
+                buses.add(g)
+        self._add_balances(changed)
 
 
 class Transformer(SimpleBlock):
@@ -681,7 +732,7 @@ class Transformer(SimpleBlock):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-    def _create(self, group=None):
+    def _create(self, group=None, coefficients=None):
         """ Creates the linear constraint for the class:`Transformer`
         block.
         Parameters
@@ -694,40 +745,96 @@ class Transformer(SimpleBlock):
             of the transformer. The components inside the list need to hold
             an attribute `conversion_factors` of type dict containing the
             conversion factors for all inputs to outputs.
+        coefficients : list
+            Coefficients of the transformers as returned by
+            :meth:`_coefficients`, e.g. computed by worker processes (see
+            :mod:`oemof.solph.parallel`).
         """
         if group is None:
             return None
 
-        m = self.parent_block()
-
-        in_flows = {n: [i for i in n.inputs.keys()] for n in group}
-        out_flows = {n: [o for o in n.outputs.keys()] for n in group}
-
-        self.relation = Constraint(
-            [(n, i, o, t)
-             for t in m.TIMESTEPS
-             for n in group
-             for o in out_flows[n]
-             for i in in_flows[n]], noruleinit=True)
+        self.relation = Constraint(self._relation_indices(group),
+                                   noruleinit=True)
 
         def _input_output_relation(block):
-            for t in m.TIMESTEPS:
-                for n in group:
-                    for o in out_flows[n]:
-                        for i in in_flows[n]:
-                            try:
-                                lhs = (m.flow[i, n, t] /
-                                       n.conversion_factors[i][t])
-                                rhs = (m.flow[n, o, t] /
-                                       n.conversion_factors[o][t])
-                            except ValueError:
-                                raise ValueError(
-                                    "Error in constraint creation",
-                                    "source: {0}, target: {1}".format(
-                                        n.label, o.label))
-                            block.relation.add((n, i, o, t), (lhs == rhs))
+            block._add_relations(group, coefficients)
         self.relation_build = BuildAction(rule=_input_output_relation)
 
+    @staticmethod
+    def _coefficients(transformers, timeincrement):
+        """Coefficients of the inputs and outputs of every transformer.
+
+        Returns the reciprocal conversion factors of the inputs and the
+        negative ones of the outputs as arrays per time step, in the order of
+        `n.inputs` and `n.outputs`.
+        """
+        length = len(timeincrement)
+        coefficients = []
+        for n in transformers:
+            reciprocal = {}
+            for k in list(n.inputs) + list(n.outputs):
+                try:
+                    with np.errstate(divide='raise'):
+                        reciprocal[k] = 1 / sequence_to_array(
+                            n.conversion_factors[k], length)
+                except FloatingPointError:
+                    raise ValueError(
+                        "Error in constraint creation",
+                        "source: {0}, target: {1}".format(n.label, k.label))
+            coefficients.append({
+                'inputs': [reciprocal[i] for i in n.inputs],
+                'outputs': [-reciprocal[o] for o in n.outputs]})
+        return coefficients
+
+    def _relation_indices(self, transformers):
+        """Indices `(n, i, o, t)` of the relations of `transformers`."""
+        m = self.parent_block()
+        return [(n, i, o, t)
+                for t in m.TIMESTEPS
+                for n in transformers
+                for o in n.outputs.keys()
+                for i in n.inputs.keys()]
+
+    def _add_relations(self, transformers, coefficients=None):
+        """Adds the relation constraints of `transformers`."""
+        m = self.parent_block()
+        if coefficients is None:
+            coefficients = self._coefficients(
+                transformers, sequence_to_array(m.timeincrement,
+                                                len(m.TIMESTEPS)))
+        inputs, outputs = {}, {}
+        for n, c in zip(transformers, coefficients):
+            inputs[n] = dict(zip(n.inputs, (a.tolist() for a in c['inputs'])))
+            outputs[n] = dict(zip(n.outputs,
+                                  (a.tolist() for a in c['outputs'])))
+        for n, i, o, t in self._relation_indices(transformers):
+            expr = linear_expression(
+                [inputs[n][i][t], outputs[n][o][t]],
+                [m.flow[i, n, t], m.flow[n, o, t]])
+            self.relation.add((n, i, o, t), (expr == 0))
+
+    def _add(self, group, changed):
+        """Adds the relations of new transformers and replaces the ones of
+        transformers with new flows in the created block (see
+        :meth:`~oemof.solph.models.Model.add_nodes`).
+
+        Parameters
+        ----------
+        group : list
+            All transformers of the block.
+        changed : list
+            New transformers and transformers with new flows.
+        """
+        changed_nodes = set(changed)
+        for index in [k for k in self.relation.keys()
+                      if k[0] in changed_nodes]:
+            del self.relation[index]
+        indices = self.relation.index_set()
+        for index in self._relation_indices(changed):
+            if index not in indices:
+                indices.add(index)
+        self._add_relations(changed)
+
 
 class NonConvexFlow(SimpleBlock):
     r"""
@@ -932,20 +1039,20 @@ class NonConvexFlow(SimpleBlock):
         def _minimum_flow_rule(block, i, o, t):
             """Rule definition for MILP minimum flow constraints.
             """
-            expr = (self.status[i, o, t] *
-                    m.flows[i, o].min[t] * m.flows[i, o].nominal_value <=
-                    m.flow[i, o, t])
-            return expr
+            expr = linear_expression(
+                [m.flows[i, o].min[t] * m.flows[i, o].nominal_value, -1],
+                [self.status[i, o, t], m.flow[i, o, t]])
+            return expr <= 0
         self.min = Constraint(self.MIN_FLOWS, m.TIMESTEPS,
                               rule=_minimum_flow_rule)
 
         def _maximum_flow_rule(block, i, o, t):
             """Rule definition for MILP maximum flow constraints.
             """
-            expr = (self.status[i, o, t] *
-                    m.flows[i, o].max[t] * m.flows[i, o].nominal_value >=
-                    m.flow[i, o, t])
-            return expr
+            expr = linear_expression(
+                [1, -m.flows[i, o].max[t] * m.flows[i, o].nominal_value],
+                [m.flow[i, o, t], self.status[i, o, t]])
+            return expr <= 0
         self.max = Constraint(self.MIN_FLOWS, m.TIMESTEPS,
                               rule=_maximum_flow_rule)
 
@@ -953,12 +1060,15 @@ class NonConvexFlow(SimpleBlock):
             """Rule definition for startup constraint of nonconvex flows.
             """
             if t > m.TIMESTEPS[1]:
-                expr = (self.startup[i, o, t] >= self.status[i, o, t] -
-                        self.status[i, o, t-1])
+                expr = linear_expression(
+                    [1, -1, -1], [self.status[i, o, t],
+                                  self.status[i, o, t-1],
+                                  self.startup[i, o, t]])
             else:
-                expr = (self.startup[i, o, t] >= self.status[i, o, t] -
-                        m.flows[i, o].nonconvex.initial_status)
-            return expr
+                expr = linear_expression(
+                    [1, -1], [self.status[i, o, t], self.startup[i, o, t]],
+                    constant=-m.flows[i, o].nonconvex.initial_status)
+            return expr <= 0
         self.startup_constr = Constraint(self.STARTUPFLOWS, m.TIMESTEPS,
                                          rule=_startup_rule)
 
@@ -974,13 +1084,15 @@ class NonConvexFlow(SimpleBlock):
             """Rule definition for shutdown constraints of nonconvex flows.
             """
             if t > m.TIMESTEPS[1]:
-                expr = (self.shutdown[i, o, t] >= self.status[i, o, t-1] -
-                        self.status[i, o, t])
+                expr = linear_expression(
+                    [1, -1, -1], [self.status[i, o, t-1],
+                                  self.status[i, o, t],
+                                  self.shutdown[i, o, t]])
             else:
-                expr = (self.shutdown[i, o, t] >=
-                        m.flows[i, o].nonconvex.initial_status -
-                        self.status[i, o, t])
-            return expr
+                expr = linear_expression(
+                    [-1, -1], [self.status[i, o, t], self.shutdown[i, o, t]],
+                    constant=m.flows[i, o].nonconvex.initial_status)
+            return expr <= 0
         self.shutdown_constr = Constraint(self.SHUTDOWNFLOWS, m.TIMESTEPS,
                                           rule=_shutdown_rule)
 
@@ -1041,36 +1153,26 @@ class NonConvexFlow(SimpleBlock):
 
         m = self.parent_block()
 
-        startup_costs = 0
-        shutdown_costs = 0
-        activity_costs = 0
-
-        if self.STARTUPFLOWS:
-            for i, o in self.STARTUPFLOWS:
-                if m.flows[i, o].nonconvex.startup_costs[0] is not None:
-                    startup_costs += sum(
-                        self.startup[i, o, t] *
-                        m.flows[i, o].nonconvex.startup_costs[t]
-                        for t in m.TIMESTEPS)
-            self.startup_costs = Expression(expr=startup_costs)
-
-        if self.SHUTDOWNFLOWS:
-            for i, o in self.SHUTDOWNFLOWS:
-                if m.flows[i, o].nonconvex.shutdown_costs[0] is not None:
-                    shutdown_costs += sum(
-                        self.shutdown[i, o, t] *
-                        m.flows[i, o].nonconvex.shutdown_costs[t]
-                        for t in m.TIMESTEPS)
-            self.shutdown_costs = Expression(expr=shutdown_costs)
-
-        if self.ACTIVITYCOSTFLOWS:
-            for i, o in self.ACTIVITYCOSTFLOWS:
-                if m.flows[i, o].nonconvex.activity_costs[0] is not None:
-                    activity_costs += sum(
-                        self.status[i, o, t] *
-                        m.flows[i, o].nonconvex.activity_costs[t]
-                        for t in m.TIMESTEPS)
-
-            self.activity_costs = Expression(expr=activity_costs)
-
-        return startup_costs + shutdown_costs + activity_costs
+        coefficients = []
+        variables = []
+
+        for costs, flows, var in [
+                ('startup_costs', self.STARTUPFLOWS, 'startup'),
+                ('shutdown_costs', self.SHUTDOWNFLOWS, 'shutdown'),
+                ('activity_costs', self.ACTIVITYCOSTFLOWS, 'status')]:
+            if not flows:
+                continue
+            cost_coefficients = []
+            cost_variables = []
+            for i, o in flows:
+                cost = getattr(m.flows[i, o].nonconvex, costs)
+                if cost[0] is not None:
+                    for t in m.TIMESTEPS:
+                        cost_coefficients.append(cost[t])
+                        cost_variables.append(getattr(self, var)[i, o, t])
+            setattr(self, costs, Expression(
+                expr=linear_expression(cost_coefficients, cost_variables)))
+            coefficients += cost_coefficients
+            variables += cost_variables
+
+        return linear_expression(coefficients, variables)
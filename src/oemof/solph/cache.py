@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+
+"""Cache of built models keyed by the structure of the energy system.
+
+Operational planning often builds the same energy system again and again
+with new time series (e.g. every day with new forecasts). The
+:class:`ModelCache` reuses a built model if only the time series of the
+flows changed: it updates the bounds and the objective of the cached model
+(see :meth:`~oemof.solph.models.Model.update_parameters`) instead of
+building it again.
+
+SPDX-License-Identifier: MIT
+
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from collections import abc
+from collections import namedtuple
+
+import dill
+import numpy as np
+import pandas as pd
+from oemof.network.network import Node
+from oemof.solph.models import Model
+from oemof.solph.plumbing import _Sequence
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+# sequences of flows, which are refreshed in a cached model instead of being
+# part of the structural key (only `variable_costs` for investment and
+# nonconvex flows, as their bounds are part of their constraints)
+REFRESHABLE_FLOW_ATTRIBUTES = ['variable_costs', 'fix', 'min', 'max']
+
+_FILE_NAME = re.compile(r'^[0-9a-f]{64}\.pkl$')
+
+
+def refreshable_attributes(flow):
+    """Names of the attributes of `flow`, which can be refreshed."""
+    if flow.investment or flow.nonconvex:
+        return ['variable_costs']
+    return REFRESHABLE_FLOW_ATTRIBUTES
+
+
+def structural_key(energysystem, **kwargs):
+    """
+    Hash of the structure of an energy system and the model arguments.
+
+    The key covers the type, label and attributes of every node (in the
+    order of `energysystem.nodes`), all attributes of every flow, the number
+    of time steps, the time increment and the keyword arguments of the
+    model. The values of the refreshable sequences of the flows (see
+    :func:`refreshable_attributes`) are left out, so energy systems that
+    differ only in these values have the same key.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem
+    kwargs :
+        Keyword arguments of the model, e.g. `constraint_groups`.
+
+    Returns
+    -------
+    str : hex digest of the key
+    """
+    digest = hashlib.sha256()
+    timeindex = energysystem.timeindex
+    _update(digest, ['timesteps', len(timeindex),
+                     getattr(timeindex, 'freqstr', None),
+                     energysystem.timeincrement])
+    _update(digest, ['model', kwargs])
+    for node in energysystem.nodes:
+        _update(digest, ['node', type(node), node.label, vars(node)])
+    for (o, i), flow in energysystem.flows().items():
+        skipped = refreshable_attributes(flow)
+        _update(digest, ['flow', o.label, i.label, type(flow)])
+        for name, value in sorted(vars(flow).items()):
+            _update(digest, [name, 'refreshed' if name in skipped else value])
+    return digest.hexdigest()
+
+
+def _update(digest, obj, seen=None):
+    """Feeds a canonical representation of `obj` into the hash `digest`."""
+    seen = set() if seen is None else seen
+
+    def token(kind, text=''):
+        digest.update('<{0}:{1}>'.format(kind, text).encode())
+
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+        token(type(obj).__name__, repr(obj))
+    elif isinstance(obj, np.generic):
+        _update(digest, obj.item(), seen)
+    elif isinstance(obj, type):
+        token('type', obj.__module__ + '.' + obj.__qualname__)
+    elif isinstance(obj, Node):
+        # a reference to another node, its attributes have their own entry
+        token('node', type(obj).__qualname__)
+        _update(digest, obj.label, seen)
+    elif isinstance(obj, _Sequence) and obj.constant:
+        token('constant')
+        _update(digest, obj.default, seen)
+    elif isinstance(obj, (_Sequence, np.ndarray, pd.Series, pd.DataFrame)):
+        values = np.asarray(obj)
+        token('array', '{0}{1}'.format(values.dtype, values.shape))
+        if values.dtype.hasobject:
+            _update(digest, values.tolist(), seen)
+        else:
+            digest.update(np.ascontiguousarray(values).tobytes())
+    elif isinstance(obj, abc.Mapping):
+        token('mapping', len(obj))
+        for k, v in sorted(obj.items(), key=lambda kv: _digest(kv[0])):
+            _update(digest, k, seen)
+            _update(digest, v, seen)
+    elif isinstance(obj, abc.Set):
+        token('set', len(obj))
+        for d in sorted(_digest(v) for v in obj):
+            token('item', d)
+    elif isinstance(obj, abc.Iterable):
+        obj = list(obj)
+        token('list', len(obj))
+        for v in obj:
+            _update(digest, v, seen)
+    elif hasattr(obj, '__dict__'):
+        if id(obj) in seen:
+            token('cycle')
+            return
+        seen.add(id(obj))
+        token('object', type(obj).__module__ + '.' + type(obj).__qualname__)
+        _update(digest, vars(obj), seen)
+    else:
+        token(type(obj).__qualname__, repr(obj))
+
+
+def _digest(obj):
+    digest = hashlib.sha256()
+    _update(digest, obj)
+    return digest.hexdigest()
+
+
+def refresh(model, energysystem):
+    """
+    Update a built model with the refreshable sequences of the flows of
+    `energysystem` and use its time index.
+
+    The flows of the energy system are matched with the flows of the model
+    by the labels of their nodes, so both energy systems need to have the
+    same structure (see :func:`structural_key`).
+    """
+    flows = {(o.label, i.label): f
+             for (o, i), f in energysystem.flows().items()}
+    parameters = {}
+    for (o, i), flow in model.flows.items():
+        new = flows[o.label, i.label]
+        changed = {a: getattr(new, a) for a in refreshable_attributes(flow)
+                   if _digest(getattr(new, a)) != _digest(getattr(flow, a))}
+        if changed:
+            parameters[o, i] = changed
+    model.update_parameters(parameters)
+    model.es.timeindex = energysystem.timeindex
+    return model
+
+
+class ModelCache:
+    """
+    Least recently used cache of built models.
+
+    :meth:`model` returns a model of an energy system. If a model of an
+    energy system with the same structure (see :func:`structural_key`) is
+    cached, the cached model is refreshed with the time series of the new
+    energy system (see :func:`refresh`). Otherwise a new model is built and
+    added to the cache.
+
+    A cached model keeps the nodes of the energy system it was built with.
+    Its results are keyed by these nodes, which have the same labels as the
+    nodes of the new energy system.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximal number of cached models. The least recently used model is
+        dropped if a new model is added to a full cache.
+    directory : str
+        Directory to persist the built models in (pickled with :mod:`dill`).
+        On a miss in memory, a model is loaded from this directory, so the
+        cache can be shared between processes and runs. The directory keeps
+        up to `maxsize` models as well. By default nothing is persisted.
+    model_class : type
+        Class of the built models.
+
+    Examples
+    --------
+    >>> cache = ModelCache(maxsize=4)  # doctest: +SKIP
+    >>> for day in days:  # doctest: +SKIP
+    ...     om = cache.model(create_energysystem(day))
+    ...     om.solve(solver='cbc')
+    """
+    def __init__(self, maxsize=8, directory=None, model_class=Model):
+        if maxsize < 1:
+            raise ValueError("The size of the cache has to be at least 1, "
+                             "got {0}.".format(maxsize))
+        self.maxsize = maxsize
+        self.directory = directory
+        self.model_class = model_class
+        self._models = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def model(self, energysystem, **kwargs):
+        """
+        Get a model of the energy system, from the cache if possible.
+
+        The `kwargs` are passed to the model class and are part of the
+        structural key.
+        """
+        key = structural_key(energysystem, **kwargs)
+        model = self._models.pop(key, None)
+        if model is None:
+            model = self._load(key)
+        if model is None:
+            self.misses += 1
+            logging.info("Model cache miss, building the model.")
+            model = self.model_class(energysystem, **kwargs)
+            self._dump(key, model)
+        else:
+            self.hits += 1
+            logging.info("Model cache hit, refreshing the model.")
+            refresh(model, energysystem)
+        self._models[key] = model
+        while len(self._models) > self.maxsize:
+            self._models.popitem(last=False)
+        return model
+
+    def cache_info(self):
+        """Get the hits, misses, maximal and current size of the cache."""
+        return CacheInfo(self.hits, self.misses, self.maxsize,
+                         len(self._models))
+
+    def clear(self):
+        """Drop all models from the cache and its directory."""
+        self._models.clear()
+        for name in self._files():
+            os.remove(os.path.join(self.directory, name))
+
+    def _files(self):
+        """Files of the persisted models, least recently used first."""
+        if self.directory is None:
+            return []
+        names = [n for n in os.listdir(self.directory) if _FILE_NAME.match(n)]
+        return sorted(names, key=lambda n: os.path.getmtime(
+            os.path.join(self.directory, n)))
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        path = os.path.join(self.directory, key + '.pkl')
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                model = dill.load(f)
+        except Exception as e:
+            # e.g. a file truncated by a crashed process: build it again
+            logging.warning("Cannot load the cached model {0}: {1}".format(
+                path, e))
+            return None
+        os.utime(path)
+        return model
+
+    def _dump(self, key, model):
+        if self.directory is None:
+            return
+        # write to a temporary file first, so that other processes never
+        # read a partially written model
+        fd, tmp = tempfile.mkstemp(
+            dir=self.directory, prefix=key, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                dill.dump(model, f)
+            os.replace(tmp, os.path.join(self.directory, key + '.pkl'))
+        except BaseException:
+            os.remove(tmp)
+            raise
+        for name in self._files()[:-self.maxsize]:
+            os.remove(os.path.join(self.directory, name))
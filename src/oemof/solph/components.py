@@ -22,7 +22,9 @@ import numpy as np
 from oemof.network import network
 from oemof.solph.network import Transformer as solph_Transformer
 from oemof.solph.options import Investment
+from oemof.solph.plumbing import linear_expression
 from oemof.solph.plumbing import sequence as solph_sequence
+from oemof.solph.plumbing import sequence_to_array
 from pyomo.core.base.block import SimpleBlock
 from pyomo.environ import Binary
 from pyomo.environ import BuildAction
@@ -356,19 +358,31 @@ class GenericStorageBlock(SimpleBlock):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-    def _create(self, group=None):
+    def _create(self, group=None, coefficients=None):
         """
         Parameters
         ----------
         group : list
             List containing storage objects.
             e.g. groups=[storage1, storage2,..]
+        coefficients : list
+            Coefficients of the storage balances as returned by
+            :meth:`_coefficients`, e.g. computed by worker processes (see
+            :mod:`oemof.solph.parallel`).
         """
         m = self.parent_block()
 
         if group is None:
             return None
 
+        if coefficients is None:
+            coefficients = self._coefficients(
+                group, sequence_to_array(m.timeincrement, len(m.TIMESTEPS)))
+        balance = {
+            n: {k: v.tolist() for k, v in c.items()}
+            for n, c in zip(group, coefficients)
+        }
+
         i = {n: [i for i in n.inputs][0] for n in group}
         o = {n: [o for o in n.outputs][0] for n in group}
 
@@ -424,30 +438,36 @@ class GenericStorageBlock(SimpleBlock):
 
         reduced_timesteps = [x for x in m.TIMESTEPS if x > 0]
 
+        def _storage_balance_expression(block, n, t, previous_content):
+            """
+            Storage balance of storage n in timestep t with the storage
+            content of the previous timestep as linear expression.
+            """
+            return linear_expression(
+                [
+                    1,
+                    balance[n]["previous_content"][t],
+                    balance[n]["inflow"][t],
+                    balance[n]["outflow"][t],
+                ],
+                [
+                    block.storage_content[n, t],
+                    previous_content,
+                    m.flow[i[n], n, t],
+                    m.flow[n, o[n], t],
+                ],
+                constant=balance[n]["constant"][t],
+            )
+
         # storage balance constraint (first time step)
         def _storage_balance_first_rule(block, n):
             """
             Rule definition for the storage balance of every storage n for
             the first timestep.
             """
-            expr = 0
-            expr += block.storage_content[n, 0]
-            expr += (
-                -block.init_content[n]
-                * (1 - n.loss_rate[0]) ** m.timeincrement[0]
+            expr = _storage_balance_expression(
+                block, n, 0, block.init_content[n]
             )
-            expr += (
-                n.fixed_losses_relative[0]
-                * n.nominal_storage_capacity
-                * m.timeincrement[0]
-            )
-            expr += n.fixed_losses_absolute[0] * m.timeincrement[0]
-            expr += (
-                -m.flow[i[n], n, 0] * n.inflow_conversion_factor[0]
-            ) * m.timeincrement[0]
-            expr += (
-                m.flow[n, o[n], 0] / n.outflow_conversion_factor[0]
-            ) * m.timeincrement[0]
             return expr == 0
 
         self.balance_first = Constraint(
@@ -460,24 +480,9 @@ class GenericStorageBlock(SimpleBlock):
             Rule definition for the storage balance of every storage n and
             every timestep but the first (t > 0).
             """
-            expr = 0
-            expr += block.storage_content[n, t]
-            expr += (
-                -block.storage_content[n, t - 1]
-                * (1 - n.loss_rate[t]) ** m.timeincrement[t]
+            expr = _storage_balance_expression(
+                block, n, t, block.storage_content[n, t - 1]
             )
-            expr += (
-                n.fixed_losses_relative[t]
-                * n.nominal_storage_capacity
-                * m.timeincrement[t]
-            )
-            expr += n.fixed_losses_absolute[t] * m.timeincrement[t]
-            expr += (
-                -m.flow[i[n], n, t] * n.inflow_conversion_factor[t]
-            ) * m.timeincrement[t]
-            expr += (
-                m.flow[n, o[n], t] / n.outflow_conversion_factor[t]
-            ) * m.timeincrement[t]
             return expr == 0
 
         self.balance = Constraint(
@@ -516,6 +521,36 @@ class GenericStorageBlock(SimpleBlock):
             self.STORAGES_WITH_INVEST_FLOW_REL, rule=_power_coupled
         )
 
+    @staticmethod
+    def _coefficients(group, timeincrement):
+        """
+        Coefficients of the storage balance of every storage in `group` as
+        arrays with one value per time step.
+        """
+        length = len(timeincrement)
+
+        def values(sequence):
+            return sequence_to_array(sequence, length)
+
+        coefficients = []
+        for n in group:
+            coefficients.append({
+                "previous_content": -(
+                    (1 - values(n.loss_rate)) ** timeincrement
+                ),
+                "inflow": -values(n.inflow_conversion_factor) * timeincrement,
+                "outflow": (
+                    (1 / values(n.outflow_conversion_factor)) * timeincrement
+                ),
+                "constant": (
+                    values(n.fixed_losses_relative)
+                    * n.nominal_storage_capacity
+                    * timeincrement
+                    + values(n.fixed_losses_absolute) * timeincrement
+                ),
+            })
+        return coefficients
+
     def _objective_expression(self):
         r"""
         Objective expression for storages with no investment.
@@ -1068,15 +1103,16 @@ class GenericInvestmentStorageBlock(SimpleBlock):
         if not hasattr(self, "INVESTSTORAGES"):
             return 0
 
-        investment_costs = 0
+        coefficients = []
+        variables = []
 
         for n in self.CONVEX_INVESTSTORAGES:
-            investment_costs += self.invest[n] * n.investment.ep_costs
+            coefficients.append(n.investment.ep_costs)
+            variables.append(self.invest[n])
         for n in self.NON_CONVEX_INVESTSTORAGES:
-            investment_costs += (
-                self.invest[n] * n.investment.ep_costs
-                + self.invest_status[n] * n.investment.offset
-            )
+            coefficients += [n.investment.ep_costs, n.investment.offset]
+            variables += [self.invest[n], self.invest_status[n]]
+        investment_costs = linear_expression(coefficients, variables)
         self.investment_costs = Expression(expr=investment_costs)
 
         return investment_costs
@@ -1189,11 +1225,10 @@ class GenericCHP(network.Transformer):
         """
         Calculate alpha coefficients.
 
-        A system of linear equations is created from passed capacities and
-        efficiencies and solved to calculate both coefficients.
+        The linear system of equations given by the capacities and
+        efficiencies at minimal and maximal load is solved in closed form
+        for all time steps at once.
         """
-        alphas = [[], []]
-
         eb = list(self.electrical_output.keys())[0]
 
         attrs = [
@@ -1202,39 +1237,28 @@ class GenericCHP(network.Transformer):
             self.electrical_output[eb].P_max_woDH,
             self.electrical_output[eb].Eta_el_max_woDH,
         ]
+        attrs = [np.asarray(a, dtype=float) for a in attrs]
 
-        length = [len(a) for a in attrs if not isinstance(a, (int, float))]
-        max_length = max(length)
-
-        if all(len(a) == max_length for a in attrs):
-            if max_length == 0:
-                max_length += 1  # increment dimension for scalars from 0 to 1
-            for i in range(0, max_length):
-                A = np.array(
-                    [
-                        [1, self.electrical_output[eb].P_min_woDH[i]],
-                        [1, self.electrical_output[eb].P_max_woDH[i]],
-                    ]
-                )
-                b = np.array(
-                    [
-                        self.electrical_output[eb].P_min_woDH[i]
-                        / self.electrical_output[eb].Eta_el_min_woDH[i],
-                        self.electrical_output[eb].P_max_woDH[i]
-                        / self.electrical_output[eb].Eta_el_max_woDH[i],
-                    ]
-                )
-                x = np.linalg.solve(A, b)
-                alphas[0].append(x[0])
-                alphas[1].append(x[1])
-        else:
+        if len({a.shape for a in attrs if a.ndim > 0}) > 1:
             error_message = (
                 "Attributes to calculate alphas "
                 + "must be of same dimension."
             )
             raise ValueError(error_message)
+        p_min, eta_min, p_max, eta_max = np.broadcast_arrays(*attrs)
+
+        if np.any(p_max == p_min):
+            raise np.linalg.LinAlgError(
+                "P_max_woDH and P_min_woDH of {0} must differ to calculate "
+                "the alphas.".format(self.label))
 
-        self._alphas = alphas
+        # eliminate alpha_0 from the equations at minimal and maximal load
+        b_min = p_min / eta_min
+        alpha_1 = (p_max / eta_max - b_min) / (p_max - p_min)
+        alpha_0 = b_min - p_min * alpha_1
+
+        self._alphas = [solph_sequence(alpha_0.tolist()),
+                        solph_sequence(alpha_1.tolist())]
 
     @property
     def alphas(self):
@@ -1358,7 +1382,7 @@ class GenericCHPBlock(SimpleBlock):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-    def _create(self, group=None):
+    def _create(self, group=None, coefficients=None):
         """
         Create constraints for GenericCHPBlock.
 
@@ -1367,6 +1391,10 @@ class GenericCHPBlock(SimpleBlock):
         group : list
             List containing `GenericCHP` objects.
             e.g. groups=[ghcp1, gchp2,..]
+        coefficients : list
+            Coefficients of the CHPs as returned by :meth:`_coefficients`,
+            e.g. computed by worker processes (see
+            :mod:`oemof.solph.parallel`).
         """
         m = self.parent_block()
 
@@ -1390,13 +1418,27 @@ class GenericCHPBlock(SimpleBlock):
         self.Q = Var(self.GENERICCHPS, m.TIMESTEPS, within=NonNegativeReals)
         self.Y = Var(self.GENERICCHPS, m.TIMESTEPS, within=Binary)
 
+        # buses and coefficients of all constraints, looked up once per node
+        if coefficients is None:
+            coefficients = self._coefficients(
+                group, sequence_to_array(m.timeincrement, len(m.TIMESTEPS)))
+        parameters = {}
+        for n, c in zip(group, coefficients):
+            parameters[n] = {
+                k: v.tolist() if isinstance(v, np.ndarray) else v
+                for k, v in c.items()
+            }
+            parameters[n]["fuel_bus"] = list(n.fuel_input.keys())[0]
+            parameters[n]["el_bus"] = list(n.electrical_output.keys())[0]
+            parameters[n]["heat_bus"] = list(n.heat_output.keys())[0]
+
         # constraint rules
         def _H_flow_rule(block, n, t):
             """Link fuel consumption to component inflow."""
-            expr = 0
-            expr += self.H_F[n, t]
-            expr += -m.flow[list(n.fuel_input.keys())[0], n, t]
-            return expr == 0
+            return linear_expression(
+                [1, -1],
+                [self.H_F[n, t], m.flow[parameters[n]["fuel_bus"], n, t]]
+            ) == 0
 
         self.H_flow = Constraint(
             self.GENERICCHPS, m.TIMESTEPS, rule=_H_flow_rule
@@ -1404,10 +1446,10 @@ class GenericCHPBlock(SimpleBlock):
 
         def _Q_flow_rule(block, n, t):
             """Link heat flow to component outflow."""
-            expr = 0
-            expr += self.Q[n, t]
-            expr += -m.flow[n, list(n.heat_output.keys())[0], t]
-            return expr == 0
+            return linear_expression(
+                [1, -1],
+                [self.Q[n, t], m.flow[n, parameters[n]["heat_bus"], t]]
+            ) == 0
 
         self.Q_flow = Constraint(
             self.GENERICCHPS, m.TIMESTEPS, rule=_Q_flow_rule
@@ -1415,10 +1457,10 @@ class GenericCHPBlock(SimpleBlock):
 
         def _P_flow_rule(block, n, t):
             """Link power flow to component outflow."""
-            expr = 0
-            expr += self.P[n, t]
-            expr += -m.flow[n, list(n.electrical_output.keys())[0], t]
-            return expr == 0
+            return linear_expression(
+                [1, -1],
+                [self.P[n, t], m.flow[n, parameters[n]["el_bus"], t]]
+            ) == 0
 
         self.P_flow = Constraint(
             self.GENERICCHPS, m.TIMESTEPS, rule=_P_flow_rule
@@ -1426,11 +1468,11 @@ class GenericCHPBlock(SimpleBlock):
 
         def _H_F_1_rule(block, n, t):
             """Set P_woDH depending on H_F."""
-            expr = 0
-            expr += -self.H_F[n, t]
-            expr += n.alphas[0][t] * self.Y[n, t]
-            expr += n.alphas[1][t] * self.P_woDH[n, t]
-            return expr == 0
+            p = parameters[n]
+            return linear_expression(
+                [-1, p["alpha_0"][t], p["alpha_1"][t]],
+                [self.H_F[n, t], self.Y[n, t], self.P_woDH[n, t]]
+            ) == 0
 
         self.H_F_1 = Constraint(
             self.GENERICCHPS, m.TIMESTEPS, rule=_H_F_1_rule
@@ -1438,11 +1480,11 @@ class GenericCHPBlock(SimpleBlock):
 
         def _H_F_2_rule(block, n, t):
             """Determine relation between H_F, P and Q."""
-            expr = 0
-            expr += -self.H_F[n, t]
-            expr += n.alphas[0][t] * self.Y[n, t]
-            expr += n.alphas[1][t] * (self.P[n, t] + n.Beta[t] * self.Q[n, t])
-            return expr == 0
+            p = parameters[n]
+            return linear_expression(
+                [-1, p["alpha_0"][t], p["alpha_1"][t], p["alpha_1_beta"][t]],
+                [self.H_F[n, t], self.Y[n, t], self.P[n, t], self.Q[n, t]]
+            ) == 0
 
         self.H_F_2 = Constraint(
             self.GENERICCHPS, m.TIMESTEPS, rule=_H_F_2_rule
@@ -1450,13 +1492,10 @@ class GenericCHPBlock(SimpleBlock):
 
         def _H_F_3_rule(block, n, t):
             """Set upper value of operating range via H_F."""
-            expr = 0
-            expr += self.H_F[n, t]
-            expr += -self.Y[n, t] * (
-                list(n.electrical_output.values())[0].P_max_woDH[t]
-                / list(n.electrical_output.values())[0].Eta_el_max_woDH[t]
-            )
-            return expr <= 0
+            return linear_expression(
+                [1, -parameters[n]["H_F_max"][t]],
+                [self.H_F[n, t], self.Y[n, t]]
+            ) <= 0
 
         self.H_F_3 = Constraint(
             self.GENERICCHPS, m.TIMESTEPS, rule=_H_F_3_rule
@@ -1464,13 +1503,10 @@ class GenericCHPBlock(SimpleBlock):
 
         def _H_F_4_rule(block, n, t):
             """Set lower value of operating range via H_F."""
-            expr = 0
-            expr += self.H_F[n, t]
-            expr += -self.Y[n, t] * (
-                list(n.electrical_output.values())[0].P_min_woDH[t]
-                / list(n.electrical_output.values())[0].Eta_el_min_woDH[t]
-            )
-            return expr >= 0
+            return linear_expression(
+                [1, -parameters[n]["H_F_min"][t]],
+                [self.H_F[n, t], self.Y[n, t]]
+            ) >= 0
 
         self.H_F_4 = Constraint(
             self.GENERICCHPS, m.TIMESTEPS, rule=_H_F_4_rule
@@ -1478,13 +1514,10 @@ class GenericCHPBlock(SimpleBlock):
 
         def _H_L_FG_max_rule(block, n, t):
             """Set max. flue gas loss as share fuel flow share."""
-            expr = 0
-            expr += -self.H_L_FG_max[n, t]
-            expr += (
-                self.H_F[n, t]
-                * list(n.fuel_input.values())[0].H_L_FG_share_max[t]
-            )
-            return expr == 0
+            return linear_expression(
+                [-1, parameters[n]["H_L_FG_share_max"][t]],
+                [self.H_L_FG_max[n, t], self.H_F[n, t]]
+            ) == 0
 
         self.H_L_FG_max_def = Constraint(
             self.GENERICCHPS, m.TIMESTEPS, rule=_H_L_FG_max_rule
@@ -1492,10 +1525,10 @@ class GenericCHPBlock(SimpleBlock):
 
         def _Q_max_res_rule(block, n, t):
             """Set maximum Q depending on fuel and electrical flow."""
-            expr = 0
-            expr += self.P[n, t] + self.Q[n, t] + self.H_L_FG_max[n, t]
-            expr += list(n.heat_output.values())[0].Q_CW_min[t] * self.Y[n, t]
-            expr += -self.H_F[n, t]
+            expr = linear_expression(
+                [1, 1, 1, parameters[n]["Q_CW_min"][t], -1],
+                [self.P[n, t], self.Q[n, t], self.H_L_FG_max[n, t],
+                 self.Y[n, t], self.H_F[n, t]])
             # back-pressure characteristics or one-segment model
             if n.back_pressure is True:
                 return expr == 0
@@ -1509,18 +1542,12 @@ class GenericCHPBlock(SimpleBlock):
         def _H_L_FG_min_rule(block, n, t):
             """Set min. flue gas loss as fuel flow share."""
             # minimum flue gas losses e.g. for motoric CHPs
-            if getattr(
-                list(n.fuel_input.values())[0], "H_L_FG_share_min", None
-            ):
-                expr = 0
-                expr += -self.H_L_FG_min[n, t]
-                expr += (
-                    self.H_F[n, t]
-                    * list(n.fuel_input.values())[0].H_L_FG_share_min[t]
-                )
-                return expr == 0
-            else:
+            share = parameters[n]["H_L_FG_share_min"]
+            if share is None:
                 return Constraint.Skip
+            return linear_expression(
+                [-1, share[t]], [self.H_L_FG_min[n, t], self.H_F[n, t]]
+            ) == 0
 
         self.H_L_FG_min_def = Constraint(
             self.GENERICCHPS, m.TIMESTEPS, rule=_H_L_FG_min_rule
@@ -1529,23 +1556,58 @@ class GenericCHPBlock(SimpleBlock):
         def _Q_min_res_rule(block, n, t):
             """Set minimum Q depending on fuel and eletrical flow."""
             # minimum restriction for heat flows e.g. for motoric CHPs
-            if getattr(
-                list(n.fuel_input.values())[0], "H_L_FG_share_min", None
-            ):
-                expr = 0
-                expr += self.P[n, t] + self.Q[n, t] + self.H_L_FG_min[n, t]
-                expr += (
-                    list(n.heat_output.values())[0].Q_CW_min[t] * self.Y[n, t]
-                )
-                expr += -self.H_F[n, t]
-                return expr >= 0
-            else:
+            if parameters[n]["H_L_FG_share_min"] is None:
                 return Constraint.Skip
+            return linear_expression(
+                [1, 1, 1, parameters[n]["Q_CW_min"][t], -1],
+                [self.P[n, t], self.Q[n, t], self.H_L_FG_min[n, t],
+                 self.Y[n, t], self.H_F[n, t]]
+            ) >= 0
 
         self.Q_min_res = Constraint(
             self.GENERICCHPS, m.TIMESTEPS, rule=_Q_min_res_rule
         )
 
+    @staticmethod
+    def _coefficients(group, timeincrement):
+        """Coefficients of the constraints of the GenericCHPs in `group`.
+
+        The attributes of the flows are looked up once per node and turned
+        into arrays with one value per time step.
+        """
+        length = len(timeincrement)
+
+        def values(sequence):
+            return sequence_to_array(sequence, length).astype(float)
+
+        coefficients = []
+        for n in group:
+            fuel_flow = list(n.fuel_input.values())[0]
+            el_flow = list(n.electrical_output.values())[0]
+            heat_flow = list(n.heat_output.values())[0]
+            alpha_0, alpha_1 = (values(a) for a in n.alphas)
+            c = {
+                "alpha_0": alpha_0,
+                "alpha_1": alpha_1,
+                "alpha_1_beta": alpha_1 * values(n.Beta),
+                "H_F_max": (
+                    values(el_flow.P_max_woDH)
+                    / values(el_flow.Eta_el_max_woDH)
+                ),
+                "H_F_min": (
+                    values(el_flow.P_min_woDH)
+                    / values(el_flow.Eta_el_min_woDH)
+                ),
+                "H_L_FG_share_max": values(fuel_flow.H_L_FG_share_max),
+                "Q_CW_min": values(heat_flow.Q_CW_min),
+                "H_L_FG_share_min": None,
+            }
+            # minimum flue gas losses e.g. for motoric CHPs
+            if getattr(fuel_flow, "H_L_FG_share_min", None):
+                c["H_L_FG_share_min"] = values(fuel_flow.H_L_FG_share_min)
+            coefficients.append(c)
+        return coefficients
+
     def _objective_expression(self):
         r"""Objective expression for generic CHPs with no investment.
 
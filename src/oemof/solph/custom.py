@@ -25,6 +25,7 @@ from oemof.solph.network import Bus
 from oemof.solph.network import Flow
 from oemof.solph.network import Sink
 from oemof.solph.network import Transformer
+from oemof.solph.plumbing import linear_expression
 from oemof.solph.plumbing import sequence
 from pyomo.core.base.block import SimpleBlock
 from pyomo.environ import Binary
@@ -1193,16 +1194,18 @@ class SinkDSMIntervalBlock(SimpleBlock):
 
         m = self.parent_block()
 
-        dsm_cost = 0
+        coefficients = []
+        variables = []
 
         for t in m.TIMESTEPS:
             for g in self.dsm:
-                dsm_cost += self.dsm_up[g, t] * g.cost_dsm_up
-                dsm_cost += self.dsm_do[g, t] * g.cost_dsm_down
+                coefficients += [g.cost_dsm_up, g.cost_dsm_down]
+                variables += [self.dsm_up[g, t], self.dsm_do[g, t]]
 
-        self.cost = Expression(expr=dsm_cost)
+        self.cost = Expression(
+            expr=linear_expression(coefficients, variables))
 
-        return self.cost
+        return self.cost.expr
 
 
 class SinkDSMDelayBlock(SimpleBlock):
@@ -1281,10 +1284,16 @@ class SinkDSMDelayBlock(SimpleBlock):
         # Set of DSM Components
         self.dsm = Set(initialize=[g for g in group])
 
+        # Pairs of time steps (t, tt) within the delay time of every DSM
+        # component. Only these pairs have a load shift down variable.
+        self.DSM_DO_SHIFTS = Set(dimen=3, initialize=[
+            (g, t, tt) for g in group for t in m.TIMESTEPS
+            for tt in self._shift_timesteps(g, t)])
+
         #  ************* VARIABLES *****************************
 
         # Variable load shift down
-        self.dsm_do = Var(self.dsm, m.TIMESTEPS, m.TIMESTEPS, initialize=0,
+        self.dsm_do = Var(self.DSM_DO_SHIFTS, initialize=0,
                           within=NonNegativeReals)
 
         # Variable load shift up
@@ -1302,46 +1311,15 @@ class SinkDSMDelayBlock(SimpleBlock):
             for t in m.TIMESTEPS:
                 for g in group:
 
-                    # first time steps: 0 + delay time
-                    if t <= g.delay_time:
-
-                        # Generator loads from bus
-                        lhs = m.flow[g.inflow, g, t]
-                        # Demand +- DSM
-                        rhs = g.demand[t] + self.dsm_up[g, t] - sum(
-                            self.dsm_do[g, tt, t]
-                            for tt in range(t + g.delay_time + 1))
-
-                        # add constraint
-                        block.input_output_relation.add((g, t), (lhs == rhs))
-
-                    # main use case
-                    elif (g.delay_time < t <=
-                          m.TIMESTEPS[-1] - g.delay_time):
-
-                        # Generator loads from bus
-                        lhs = m.flow[g.inflow, g, t]
-                        # Demand +- DSM
-                        rhs = g.demand[t] + self.dsm_up[g, t] - sum(
-                            self.dsm_do[g, tt, t]
-                            for tt in range(t - g.delay_time,
-                                            t + g.delay_time + 1))
-
-                        # add constraint
-                        block.input_output_relation.add((g, t), (lhs == rhs))
-
-                    # last time steps: end - delay time
-                    else:
-                        # Generator loads from bus
-                        lhs = m.flow[g.inflow, g, t]
-                        # Demand +- DSM
-                        rhs = g.demand[t] + self.dsm_up[g, t] - sum(
-                            self.dsm_do[g, tt, t]
-                            for tt in range(t - g.delay_time,
-                                            m.TIMESTEPS[-1] + 1))
+                    # Generator loads from bus
+                    lhs = m.flow[g.inflow, g, t]
+                    # Demand +- DSM
+                    rhs = g.demand[t] + self.dsm_up[g, t] - sum(
+                        self.dsm_do[g, tt, t]
+                        for tt in self._shift_timesteps(g, t))
 
-                        # add constraint
-                        block.input_output_relation.add((g, t), (lhs == rhs))
+                    # add constraint
+                    block.input_output_relation.add((g, t), (lhs == rhs))
 
         self.input_output_relation = Constraint(group, m.TIMESTEPS,
                                                 noruleinit=True)
@@ -1353,51 +1331,21 @@ class SinkDSMDelayBlock(SimpleBlock):
             """
             Equation 7 by Zerrahn, Schill:
             Every upward load shift has to be compensated by downward load
-            shifts in a defined time frame. Slightly modified equations for
-            the first and last time steps due to variable initialization.
+            shifts in a defined time frame. The time frame is shortened in the
+            first and last time steps.
             """
 
             for t in m.TIMESTEPS:
                 for g in group:
 
-                    # first time steps: 0 + delay time
-                    if t <= g.delay_time:
-
-                        # DSM up
-                        lhs = self.dsm_up[g, t]
-                        # DSM down
-                        rhs = sum(self.dsm_do[g, t, tt]
-                                  for tt in range(t + g.delay_time + 1))
-
-                        # add constraint
-                        block.dsm_updo_constraint.add((g, t), (lhs == rhs))
-
-                    # main use case
-                    elif g.delay_time < t <= (
-                            m.TIMESTEPS[-1] - g.delay_time):
-
-                        # DSM up
-                        lhs = self.dsm_up[g, t]
-                        # DSM down
-                        rhs = sum(self.dsm_do[g, t, tt]
-                                  for tt in range(t - g.delay_time,
-                                                  t + g.delay_time + 1))
-
-                        # add constraint
-                        block.dsm_updo_constraint.add((g, t), (lhs == rhs))
-
-                    # last time steps: end - delay time
-                    else:
-
-                        # DSM up
-                        lhs = self.dsm_up[g, t]
-                        # DSM down
-                        rhs = sum(self.dsm_do[g, t, tt]
-                                  for tt in range(t - g.delay_time,
-                                                  m.TIMESTEPS[-1] + 1))
+                    # DSM up
+                    lhs = self.dsm_up[g, t]
+                    # DSM down
+                    rhs = sum(self.dsm_do[g, t, tt]
+                              for tt in self._shift_timesteps(g, t))
 
-                        # add constraint
-                        block.dsm_updo_constraint.add((g, t), (lhs == rhs))
+                    # add constraint
+                    block.dsm_updo_constraint.add((g, t), (lhs == rhs))
 
         self.dsm_updo_constraint = Constraint(group, m.TIMESTEPS,
                                               noruleinit=True)
@@ -1437,44 +1385,14 @@ class SinkDSMDelayBlock(SimpleBlock):
             for tt in m.TIMESTEPS:
                 for g in group:
 
-                    # first times steps: 0 + delay
-                    if tt <= g.delay_time:
-
-                        # DSM down
-                        lhs = sum(self.dsm_do[g, t, tt]
-                                  for t in range(tt + g.delay_time + 1))
-                        # Capacity DSM down
-                        rhs = g.capacity_down[tt]
-
-                        # add constraint
-                        block.dsm_do_constraint.add((g, tt), (lhs <= rhs))
-
-                    # main use case
-                    elif g.delay_time < tt <= (
-                            m.TIMESTEPS[-1] - g.delay_time):
-
-                        # DSM down
-                        lhs = sum(self.dsm_do[g, t, tt]
-                                  for t in range(tt - g.delay_time,
-                                                 tt + g.delay_time + 1))
-                        # Capacity DSM down
-                        rhs = g.capacity_down[tt]
-
-                        # add constraint
-                        block.dsm_do_constraint.add((g, tt), (lhs <= rhs))
-
-                    # last time steps: end - delay time
-                    else:
-
-                        # DSM down
-                        lhs = sum(self.dsm_do[g, t, tt]
-                                  for t in range(tt - g.delay_time,
-                                                 m.TIMESTEPS[-1] + 1))
-                        # Capacity DSM down
-                        rhs = g.capacity_down[tt]
+                    # DSM down
+                    lhs = sum(self.dsm_do[g, t, tt]
+                              for t in self._shift_timesteps(g, tt))
+                    # Capacity DSM down
+                    rhs = g.capacity_down[tt]
 
-                        # add constraint
-                        block.dsm_do_constraint.add((g, tt), (lhs <= rhs))
+                    # add constraint
+                    block.dsm_do_constraint.add((g, tt), (lhs <= rhs))
 
         self.dsm_do_constraint = Constraint(group, m.TIMESTEPS,
                                             noruleinit=True)
@@ -1493,62 +1411,42 @@ class SinkDSMDelayBlock(SimpleBlock):
             for tt in m.TIMESTEPS:
                 for g in group:
 
-                    # first times steps: 0 + delay time
-                    if tt <= g.delay_time:
-
-                        # DSM up/down
-                        lhs = self.dsm_up[g, tt] + sum(
-                            self.dsm_do[g, t, tt]
-                            for t in range(tt + g.delay_time + 1))
-                        # max capacity at tt
-                        rhs = max(g.capacity_up[tt], g.capacity_down[tt])
-
-                        # add constraint
-                        block.C2_constraint.add((g, tt), (lhs <= rhs))
-
-                    elif g.delay_time < tt <= (
-                            m.TIMESTEPS[-1] - g.delay_time):
-
-                        # DSM up/down
-                        lhs = self.dsm_up[g, tt] + sum(
-                            self.dsm_do[g, t, tt]
-                            for t in range(tt - g.delay_time,
-                                           tt + g.delay_time + 1))
-                        # max capacity at tt
-                        rhs = max(g.capacity_up[tt], g.capacity_down[tt])
-
-                        # add constraint
-                        block.C2_constraint.add((g, tt), (lhs <= rhs))
-
-                    else:
-
-                        # DSM up/down
-                        lhs = self.dsm_up[g, tt] + sum(
-                            self.dsm_do[g, t, tt]
-                            for t in range(tt - g.delay_time,
-                                           m.TIMESTEPS[-1] + 1))
-                        # max capacity at tt
-                        rhs = max(g.capacity_up[tt], g.capacity_down[tt])
+                    # DSM up/down
+                    lhs = self.dsm_up[g, tt] + sum(
+                        self.dsm_do[g, t, tt]
+                        for t in self._shift_timesteps(g, tt))
+                    # max capacity at tt
+                    rhs = max(g.capacity_up[tt], g.capacity_down[tt])
 
-                        # add constraint
-                        block.C2_constraint.add((g, tt), (lhs <= rhs))
+                    # add constraint
+                    block.C2_constraint.add((g, tt), (lhs <= rhs))
 
         self.C2_constraint = Constraint(group, m.TIMESTEPS, noruleinit=True)
         self.C2_constraint_build = BuildAction(rule=c2_constraint_rule)
 
+    def _shift_timesteps(self, g, t):
+        """Time steps within the delay time of time step t."""
+        m = self.parent_block()
+        return range(max(t - g.delay_time, m.TIMESTEPS[1]),
+                     min(t + g.delay_time, m.TIMESTEPS[-1]) + 1)
+
     def _objective_expression(self):
         """Adding cost terms for DSM activity to obj. function"""
 
         m = self.parent_block()
 
-        dsm_cost = 0
+        coefficients = []
+        variables = []
 
         for t in m.TIMESTEPS:
             for g in self.dsm:
-                dsm_cost += self.dsm_up[g, t] * g.cost_dsm_up
-                dsm_cost += sum(self.dsm_do[g, t, tt] for tt in m.TIMESTEPS
-                                ) * g.cost_dsm_down
+                coefficients.append(g.cost_dsm_up)
+                variables.append(self.dsm_up[g, t])
+                for tt in self._shift_timesteps(g, t):
+                    coefficients.append(g.cost_dsm_down)
+                    variables.append(self.dsm_do[g, t, tt])
 
-        self.cost = Expression(expr=dsm_cost)
+        self.cost = Expression(
+            expr=linear_expression(coefficients, variables))
 
-        return self.cost
+        return self.cost.expr
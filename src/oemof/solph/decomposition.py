@@ -0,0 +1,489 @@
+# -*- coding: utf-8 -*-
+
+"""Benders decomposition of investment models.
+
+The time horizon of an investment model is split into slices (e.g. weeks).
+A master problem holds the investment variables (`invest` and
+`invest_status` of the :class:`~oemof.solph.blocks.InvestmentFlow`, the
+:class:`~oemof.solph.components.GenericInvestmentStorageBlock` and other
+investment blocks) with their investment costs and the constraints between
+them. Every slice is an operational subproblem, a
+:class:`~oemof.solph.models.Model` of the slice with the investment
+variables fixed to the values of the master problem. The duals of these
+fixings are the slopes of the operational costs of a slice, which are added
+to the master problem as cuts. The subproblems can be solved in parallel
+worker processes, which keep their models between the iterations.
+
+SPDX-License-Identifier: MIT
+
+"""
+import itertools
+import logging
+import multiprocessing
+import traceback
+import warnings
+from contextlib import contextmanager
+
+import pandas as pd
+import pyomo.environ as po
+from oemof.solph import helpers
+from oemof.solph import matrix
+from oemof.solph import processing
+from oemof.solph.models import Model
+from oemof.solph.rolling_horizon import windows
+from pyomo.opt import SolverFactory
+from pyomo.opt import TerminationCondition
+
+# names of the variables of the master problem
+INVESTMENT_VARIABLES = ('invest', 'invest_status')
+
+
+def _investment_variables(model):
+    """Investment variables of a model keyed by their name."""
+    return {v.name: v for c in model.component_objects(po.Var)
+            if c.local_name in INVESTMENT_VARIABLES for v in c.values()}
+
+
+def _investment_costs(model, variables):
+    """Objective coefficients of the investment variables by their name."""
+    names = {id(v): name for name, v in variables.items()}
+    coefficients, objective_variables, _ = matrix._linear_terms(
+        model.objective.expr, model.objective)
+    costs = dict.fromkeys(variables, 0)
+    for c, v in zip(coefficients, objective_variables):
+        if id(v) in names:
+            costs[names[id(v)]] += c
+    return costs
+
+
+@contextmanager
+def _time_slice(energysystem, start, stop, model_kwargs):
+    """Replace the time series of the energy system by a slice of them.
+    Yields the keyword arguments of the Model with sliced time series."""
+    def slice_values(values):
+        return values[start:stop]
+
+    model_kwargs = helpers.replaced_model_kwargs(
+        model_kwargs, len(energysystem.timeindex), slice_values)
+    with helpers.replaced_time_series(
+            energysystem, energysystem.timeindex[start:stop], slice_values):
+        yield model_kwargs
+
+
+class _Structure:
+    """
+    Investment variables, their costs and the constraints between them.
+
+    They are read from a model of the first time step of the energy system,
+    so the master problem is built from the same blocks as the subproblems.
+    """
+    def __init__(self, energysystem, model_kwargs):
+        with _time_slice(energysystem, 0, 1, model_kwargs) as kwargs:
+            model = Model(energysystem, **kwargs)
+        variables = _investment_variables(model)
+        names = {id(v): name for name, v in variables.items()}
+
+        operational = [v.name for v in model.component_data_objects(po.Var)
+                       if v.is_integer() and id(v) not in names]
+        if operational:
+            raise ValueError(
+                "The operational subproblems of the decomposition have to be "
+                "linear, but the model has the integer variables {0}."
+                .format(', '.join(operational[:5])))
+
+        self.names = list(variables)
+        self.bounds = {n: (v.lb, v.ub) for n, v in variables.items()}
+        self.domains = {n: v.domain for n, v in variables.items()}
+        self.integer = {n for n, v in variables.items() if v.is_integer()}
+        self.costs = _investment_costs(model, variables)
+
+        # constraints of investment variables only, e.g. the investment
+        # limits of nonconvex investments or the relations of storages
+        self.constraints = []
+        for con in model.component_data_objects(po.Constraint, active=True):
+            coefficients, con_variables, constant = matrix._linear_terms(
+                con.body, con)
+            if con_variables and all(id(v) in names for v in con_variables):
+                terms = [(c, names[id(v)])
+                         for c, v in zip(coefficients, con_variables)]
+                lower = None if con.lower is None else po.value(con.lower)
+                upper = None if con.upper is None else po.value(con.upper)
+                self.constraints.append(
+                    (con.name, terms, po.value(constant), lower, upper))
+
+
+class _Subproblem:
+    """
+    Operational model of a time slice with fixed investment variables.
+
+    The continuous investment variables are fixed by elastic constraints
+    `invest - up + down == value`, whose slack `up` and `down` is penalised
+    in the objective, so that the subproblem is feasible for every
+    investment of the master problem. Integer investment variables are
+    fixed. The constraints of investment variables only are part of the
+    master problem and deactivated.
+    """
+    def __init__(self, energysystem, start, stop, structure, settings):
+        self.energysystem = energysystem
+        self.settings = settings
+        with _time_slice(energysystem, start, stop,
+                         settings['model_kwargs']) as kwargs:
+            self.timeindex = energysystem.timeindex
+            self.model = om = Model(energysystem, **kwargs)
+        om.receive_duals()
+
+        variables = _investment_variables(om)
+        self.variables = variables
+        self.costs = _investment_costs(om, variables)
+        master_constraints = {c[0] for c in structure.constraints}
+        components = {name.rsplit('[', 1)[0] for name in master_constraints}
+        for component in om.component_objects(po.Constraint, active=True):
+            if component.name in components:
+                for con in component.values():
+                    if con.name in master_constraints:
+                        con.deactivate()
+
+        self.continuous = [n for n in structure.names
+                           if n not in structure.integer]
+        index = range(len(self.continuous))
+        # The first row of the lp-file is a constraint which is always met
+        # exactly. Pyomo does not read any dual from the solution file of
+        # cbc if the first row is marked as (slightly) infeasible.
+        om.benders_zero = po.Var(bounds=(0, 0))
+        om.benders_guard = po.Constraint(expr=om.benders_zero == 0)
+        om.benders_value = po.Param(index, mutable=True, initialize=0)
+        om.benders_up = po.Var(index, within=po.NonNegativeReals)
+        om.benders_down = po.Var(index, within=po.NonNegativeReals)
+
+        def _fix_rule(block, k):
+            return (variables[self.continuous[k]] - om.benders_up[k] +
+                    om.benders_down[k] == om.benders_value[k])
+        om.benders_fix = po.Constraint(index, rule=_fix_rule)
+        om.objective.set_value(om.objective.expr + settings['penalty'] * (
+            po.quicksum(om.benders_up.values()) +
+            po.quicksum(om.benders_down.values())))
+
+    def solve(self, values):
+        """
+        Solve the subproblem for the investment `values` of the master
+        problem.
+
+        Returns
+        -------
+        tuple : (operational costs, {name: slope of the operational costs})
+        """
+        om = self.model
+        for k, name in enumerate(self.continuous):
+            om.benders_value[k] = values[name]
+        for name, var in self.variables.items():
+            if name not in self.continuous:
+                var.fix(round(values[name]))
+
+        settings = self.settings
+        solver_results = om.solve(
+            solver=settings['solver'], solver_io=settings['solver_io'],
+            cmdline_options=settings['cmdline_options'],
+            solve_kwargs=settings['solve_kwargs'])
+        termination_condition = (
+            solver_results['Solver'][0]['Termination condition'])
+        if termination_condition != TerminationCondition.optimal:
+            raise ValueError(
+                "The subproblem of the time steps {0} to {1} ended with the "
+                "termination condition {2}.".format(
+                    self.timeindex[0], self.timeindex[-1],
+                    termination_condition))
+
+        costs = om.objective() - sum(self.costs[n] * values[n]
+                                     for n in self.variables)
+        slopes = {name: om.dual[om.benders_fix[k]] - self.costs[name]
+                  for k, name in enumerate(self.continuous)}
+        return costs, slopes
+
+    def results(self):
+        """Results of the last solution keyed by label strings."""
+        # the slack is not part of the results
+        for var in itertools.chain(self.model.benders_up.values(),
+                                   self.model.benders_down.values(),
+                                   [self.model.benders_zero]):
+            var.value = None
+        timeindex = self.energysystem.timeindex
+        self.energysystem.timeindex = self.timeindex
+        try:
+            results = processing.results(self.model)
+        finally:
+            self.energysystem.timeindex = timeindex
+        return processing.convert_keys_to_strings(
+            results, keep_none_type=True)
+
+
+def _serve(connection, energysystem, slices, structure, settings):
+    """Build the subproblems of a worker process and answer its commands."""
+    try:
+        subproblems = [_Subproblem(energysystem, start, stop, structure,
+                                   settings) for start, stop in slices]
+        connection.send(None)
+    except Exception:
+        connection.send(_WorkerError(traceback.format_exc()))
+        return
+    while True:
+        command, args = connection.recv()
+        if command == 'close':
+            return
+        try:
+            reply = [getattr(s, command)(*args) for s in subproblems]
+        except Exception:
+            reply = _WorkerError(traceback.format_exc())
+        connection.send(reply)
+
+
+class _WorkerError:
+    def __init__(self, traceback):
+        self.traceback = traceback
+
+
+class _Workers:
+    """
+    Subproblems of all slices, in the current process or distributed over
+    worker processes.
+    """
+    def __init__(self, energysystem, slices, structure, settings,
+                 processes=1):
+        self.slices = slices
+        self.processes = processes = min(processes, len(slices))
+        if processes <= 1:
+            self.subproblems = [
+                _Subproblem(energysystem, start, stop, structure, settings)
+                for start, stop in slices]
+            return
+
+        self.connections = []
+        self.workers = []
+        for w in range(processes):
+            parent, child = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_serve, args=(child, energysystem,
+                                     slices[w::processes], structure,
+                                     settings),
+                daemon=True)
+            worker.start()
+            self.connections.append(parent)
+            self.workers.append(worker)
+        try:
+            for connection in self.connections:
+                self._receive(connection)
+        except Exception:
+            self.close()
+            raise
+
+    def _receive(self, connection):
+        reply = connection.recv()
+        if isinstance(reply, _WorkerError):
+            raise ValueError("A subproblem failed in a worker process:\n"
+                             + reply.traceback)
+        return reply
+
+    def map(self, command, *args):
+        """Call a method of all subproblems, return the replies in order."""
+        if self.processes <= 1:
+            return [getattr(s, command)(*args) for s in self.subproblems]
+
+        for connection in self.connections:
+            connection.send((command, args))
+        replies = [self._receive(c) for c in self.connections]
+        ordered = [None] * len(self.slices)
+        for w, reply in enumerate(replies):
+            ordered[w::self.processes] = reply
+        return ordered
+
+    def close(self):
+        if self.processes <= 1:
+            return
+        for connection, worker in zip(self.connections, self.workers):
+            if worker.is_alive():
+                try:
+                    connection.send(('close', ()))
+                except (BrokenPipeError, OSError):
+                    pass
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+
+
+def _master_problem(structure, number_of_slices, lower_bound):
+    """Master problem with the investment variables and their costs."""
+    master = po.ConcreteModel(name='Master')
+    names = structure.names
+    position = {n: k for k, n in enumerate(names)}
+    master.invest = po.Var(range(len(names)))
+    for k, name in enumerate(names):
+        var = master.invest[k]
+        var.domain = structure.domains[name]
+        var.setlb(structure.bounds[name][0])
+        var.setub(structure.bounds[name][1])
+    master.operation = po.Var(range(number_of_slices),
+                              bounds=(lower_bound, None))
+
+    master.investment = po.ConstraintList()
+    for _, terms, constant, lower, upper in structure.constraints:
+        body = po.quicksum(c * master.invest[position[n]]
+                           for c, n in terms) + constant
+        if lower is not None and lower == upper:
+            master.investment.add(body == upper)
+        else:
+            master.investment.add((lower, body, upper))
+    master.cuts = po.ConstraintList()
+
+    master.objective = po.Objective(expr=po.quicksum(
+        structure.costs[n] * master.invest[k] for k, n in enumerate(names)) +
+        po.quicksum(master.operation.values()))
+    return master
+
+
+def _solve_master(master, settings):
+    """Solve the master problem, return its investment and objective."""
+    if settings['solver_io'] == 'memory':
+        solver_results = matrix.solve_highs(
+            master, options=settings['cmdline_options'])
+    else:
+        opt = SolverFactory(settings['solver'],
+                            solver_io=settings['solver_io'])
+        for k, v in settings['cmdline_options'].items():
+            opt.options[k] = v
+        solver_results = opt.solve(master, **settings['solve_kwargs'])
+    termination_condition = solver_results.solver.termination_condition
+    if termination_condition != TerminationCondition.optimal:
+        raise ValueError("The master problem ended with the termination "
+                         "condition {0}.".format(termination_condition))
+    return [v.value for v in master.invest.values()], master.objective()
+
+
+def solve(energysystem, window=168, processes=1, tolerance=1e-4,
+          max_iterations=50, penalty=1e6, lower_bound=0, model_kwargs=None,
+          solver='cbc', solver_io='lp', cmdline_options=None,
+          solve_kwargs=None):
+    """
+    Optimise the investments of an energy system by Benders decomposition.
+
+    The time horizon is split into slices of `window` time steps. Every
+    slice is a subproblem built from the blocks of the
+    :class:`~oemof.solph.models.Model`, with the investment variables fixed
+    to the values of the master problem. The master problem holds the
+    investment variables, their costs and the constraints of investment
+    variables only (e.g. the investment relations of storages). The
+    operational costs of every slice are approximated in the master problem
+    by cuts from the duals of the subproblems. The iteration stops if the
+    relative gap between the lower bound (the master problem) and the best
+    solution found is below `tolerance`.
+
+    The slices are independent of each other: the storage content is
+    balanced within every slice (`balanced`, `initial_storage_level`) and
+    attributes that refer to the whole horizon (e.g. `summed_max`) are
+    applied to every slice. The subproblems have to be linear, nonconvex
+    flows are not supported.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem
+    window : int
+        Number of time steps of every slice, e.g. 168 for weeks of hourly
+        time steps.
+    processes : int
+        Number of worker processes solving the subproblems. Every worker
+        builds the models of its slices once and keeps them. With 1 (the
+        default) the subproblems are solved in the current process.
+    tolerance : float
+        Relative gap between the lower and the upper bound of the total
+        costs, at which the iteration stops.
+    max_iterations : int
+        Maximal number of iterations. A warning is issued if the tolerance
+        is not reached.
+    penalty : float
+        Costs of a unit of capacity above or below the investment of the
+        master problem in a subproblem. The penalty keeps the subproblems
+        feasible for all investments and has to exceed the value of
+        additional capacity within a slice.
+    lower_bound : float
+        Lower bound of the operational costs of every slice. The default of
+        0 is valid if there are no negative costs.
+    model_kwargs : dict
+        Keyword arguments for the Model, e.g. `constraint_groups`.
+    solver, solver_io, cmdline_options, solve_kwargs :
+        See :meth:`~oemof.solph.models.BaseModel.solve`. The master problem
+        is solved with the same solver.
+
+    Returns
+    -------
+    dict : Results of the whole time horizon in the format of
+        :func:`oemof.solph.processing.results` at the best investment
+        found. The scalars (e.g. `invest`) are the ones of the first slice.
+        The sequences of the buses are their duals in the subproblems.
+
+    Examples
+    --------
+    >>> from oemof.solph import decomposition  # doctest: +SKIP
+    >>> results = decomposition.solve(es, window=168, processes=4,
+    ...                               solver='cbc')  # doctest: +SKIP
+    """
+    settings = {'solver': solver, 'solver_io': solver_io,
+                'cmdline_options': dict(cmdline_options or {}),
+                'solve_kwargs': dict(solve_kwargs or {}),
+                'model_kwargs': dict(model_kwargs or {}),
+                'penalty': penalty}
+    structure = _Structure(energysystem, settings['model_kwargs'])
+    if not structure.names:
+        raise ValueError("The energy system has no investment variables.")
+    slices = [(start, stop) for start, stop, _ in windows(
+        len(energysystem.timeindex), window)]
+    continuous = [(k, n) for k, n in enumerate(structure.names)
+                  if n not in structure.integer]
+
+    master = _master_problem(structure, len(slices), lower_bound)
+    values, lower = _solve_master(master, settings)
+
+    workers = _Workers(energysystem, slices, structure, settings, processes)
+    try:
+        best = (float('+inf'), None)
+        for iteration in range(1, max_iterations + 1):
+            evaluated = dict(zip(structure.names, values))
+            evaluations = workers.map('solve', evaluated)
+            upper = (sum(structure.costs[n] * v
+                         for n, v in evaluated.items()) +
+                     sum(costs for costs, _ in evaluations))
+            if upper < best[0]:
+                best = (upper, evaluated)
+
+            for s, (costs, slopes) in enumerate(evaluations):
+                master.cuts.add(master.operation[s] >= costs + po.quicksum(
+                    slopes[n] * (master.invest[k] - evaluated[n])
+                    for k, n in continuous))
+            values, lower = _solve_master(master, settings)
+
+            gap = (best[0] - lower) / max(abs(best[0]), 1e-10)
+            logging.info("Benders decomposition: iteration {0}, lower bound "
+                         "{1:.6g}, upper bound {2:.6g}, gap {3:.3g}.".format(
+                             iteration, lower, best[0], gap))
+            if gap <= tolerance:
+                break
+        else:
+            warnings.warn(
+                "The Benders decomposition did not converge within {0} "
+                "iterations, the gap is {1:.3g}.".format(max_iterations, gap),
+                UserWarning)
+
+        if best[1] is not evaluated:
+            workers.map('solve', best[1])
+        slice_results = workers.map('results')
+    finally:
+        workers.close()
+
+    nodes = {str(n): n for n in energysystem.nodes}
+    sequences = {}
+    scalars = {}
+    for results in slice_results:
+        for (o, i), v in results.items():
+            k = (nodes[o], None if i is None else nodes[i])
+            sequences.setdefault(k, []).append(v['sequences'])
+            scalars.setdefault(k, v['scalars'])
+    return {k: {'scalars': scalars[k],
+                'sequences': pd.concat(sequences[k])}
+            for k in sequences}
@@ -19,8 +19,13 @@ SPDX-License-Identifier: MIT
 import datetime as dt
 import os
 from collections import MutableMapping
+from contextlib import contextmanager
 
+import numpy as np
 import pandas as pd
+from oemof.solph.options import Investment
+from oemof.solph.options import NonConvex
+from oemof.solph.plumbing import _Sequence
 from oemof.solph.plumbing import sequence
 
 
@@ -99,3 +104,138 @@ def calculate_timeincrement(timeindex, fill_value=None):
         raise AttributeError(
             "'timeindex' must be of type 'DatetimeIndex' and " +
             "'fill_value' of type 'Timedelta'.")
+
+
+def _replaced_value(value, function, length):
+    """Apply `function` to a sequence of (at least) the given length (or to
+    the sequences of a dictionary). Longer sequences, which are valid in a
+    Model, are cut to the given length first. Returns None if nothing is
+    replaced."""
+    if isinstance(value, str) or (
+            isinstance(value, _Sequence) and value.constant):
+        return None
+    if (isinstance(value, (_Sequence, list, tuple, np.ndarray, pd.Series)) and
+            len(value) >= length):
+        new = function(np.asarray(value)[:length])
+        return None if new is None else sequence(new)
+    if isinstance(value, dict):
+        changed = {k: _replaced_value(v, function, length)
+                   for k, v in value.items()}
+        if any(v is not None for v in changed.values()):
+            return {k: value[k] if changed[k] is None else changed[k]
+                    for k in value}
+    return None
+
+
+def _time_series_attributes(energysystem):
+    """Iterate over the (object, attribute name, value) of all attributes of
+    the nodes, the flows and their NonConvex and Investment options."""
+    objects = list(energysystem.nodes) + list(energysystem.flows().values())
+    while objects:
+        obj = objects.pop(0)
+        for attribute, value in list(vars(obj).items()):
+            if isinstance(value, (NonConvex, Investment)):
+                objects.append(value)
+            else:
+                yield obj, attribute, value
+
+
+def time_series(energysystem):
+    """
+    Get all sequences of the length of the time index of the energy system.
+
+    The sequences are searched in the attributes of the nodes, the flows and
+    their options (also within dictionaries, e.g. `conversion_factors`).
+    Longer sequences are cut to the length of the time index, like in the
+    Model.
+
+    Returns
+    -------
+    list : numpy arrays
+    """
+    length = len(energysystem.timeindex)
+    series = []
+    for obj, attribute, value in _time_series_attributes(energysystem):
+        _replaced_value(value, series.append, length)
+    return series
+
+
+@contextmanager
+def replaced_time_series(energysystem, timeindex, function):
+    """
+    Temporarily replace all sequences of the length of the time index.
+
+    All sequences found by :func:`time_series` and the `timeincrement` of
+    the energy system (if it is a sequence) are replaced by
+    `function(values)` and the time index of the energy system by
+    `timeindex`. The original values are restored on exit. Use
+    :func:`replaced_model_kwargs` for the sequences passed to the Model.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem
+    timeindex : pandas.DatetimeIndex
+        Time index of the length of the replaced sequences.
+    function : callable
+        Gets the values of a sequence as numpy array and returns the new
+        values.
+
+    Examples
+    --------
+    >>> with replaced_time_series(es, es.timeindex[:24],
+    ...                           lambda v: v[:24]):  # doctest: +SKIP
+    ...     om = Model(es)
+    """
+    length = len(energysystem.timeindex)
+    originals = [(energysystem, 'timeindex', energysystem.timeindex)]
+    energysystem.timeindex = timeindex
+    attributes = [(energysystem, 'timeincrement',
+                   getattr(energysystem, 'timeincrement', None))]
+    try:
+        for obj, attribute, value in attributes + list(
+                _time_series_attributes(energysystem)):
+            new = _replaced_value(value, function, length)
+            if new is not None:
+                originals.append((obj, attribute, value))
+                setattr(obj, attribute, new)
+        yield
+    finally:
+        for obj, attribute, value in reversed(originals):
+            setattr(obj, attribute, value)
+
+
+def replaced_model_kwargs(model_kwargs, length, function):
+    """
+    Replace the sequences of the keyword arguments of a Model.
+
+    The `timeincrement` and the `objective_weighting` are replaced by
+    `function(values)` if they are sequences of the given length, like the
+    sequences of the energy system in :func:`replaced_time_series`.
+
+    Parameters
+    ----------
+    model_kwargs : dict
+        Keyword arguments for the Model.
+    length : int
+        Length of the original time index.
+    function : callable
+        Gets the values of a sequence as numpy array and returns the new
+        values.
+
+    Returns
+    -------
+    dict : A copy of `model_kwargs` with the replaced sequences.
+
+    Examples
+    --------
+    >>> kwargs = replaced_model_kwargs({'timeincrement': [1, 1, 3, 3]}, 4,
+    ...                                lambda v: v[2:])
+    >>> list(kwargs['timeincrement'])
+    [3, 3]
+    """
+    model_kwargs = dict(model_kwargs)
+    for key in ('timeincrement', 'objective_weighting'):
+        new = _replaced_value(model_kwargs.get(key), function, length)
+        if new is not None:
+            model_kwargs[key] = new
+    return model_kwargs
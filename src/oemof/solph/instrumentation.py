@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+
+"""Hooks reporting metrics of the model build, the solver and the results.
+
+Callbacks are registered for the events
+
+* `construct`: the build of a model (:meth:`BaseModel._construct
+  <oemof.solph.models.BaseModel._construct>`) with the metrics
+  `time_seconds`, `variables`, `constraints`, `nonzeros`, `timesteps` and
+  `nodes`,
+* `solve`: :meth:`BaseModel.solve <oemof.solph.models.BaseModel.solve>`
+  with `time_seconds`, `solver_time_seconds` (if the solver reports it) and
+  `objective`, labelled by `solver`, `solver_io`, `status` and
+  `termination_condition`,
+* `results`: :func:`oemof.solph.processing.results` with `time_seconds` and
+  the number of `entries`.
+
+All events report the `peak_memory_bytes` (the peak resident set size of the
+process, if available) and are labelled with the name of the `model`. If an
+exception is raised, the event is reported with the label `error` (the name
+of the exception) before the exception is passed on.
+
+A callback is called as ``callback(event, metrics, labels)`` with the
+dictionaries of the numeric metrics and of the string labels. Exceptions of
+callbacks are logged and do not stop the optimisation. The metrics are only
+collected if a callback is registered for the event, so that there is no
+overhead otherwise.
+
+:class:`MetricsFileSink` writes the metrics to a local file as JSON lines or
+in the text format of Prometheus (e.g. for the textfile collector of the
+node exporter).
+
+SPDX-License-Identifier: MIT
+
+"""
+import json
+import logging
+import math
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None
+
+EVENTS = ('construct', 'solve', 'results')
+
+# registered callbacks of every event
+_hooks = {event: [] for event in EVENTS}
+
+
+def register(callback, events=EVENTS):
+    """
+    Register `callback` for the given events.
+
+    Returns the callback, so that it can be used as decorator.
+
+    Examples
+    --------
+    >>> @register
+    ... def log_metrics(event, metrics, labels):
+    ...     logging.info("%s: %s", event, metrics)
+    >>> unregister(log_metrics)
+    """
+    for event in _events(events):
+        if callback not in _hooks[event]:
+            _hooks[event].append(callback)
+    return callback
+
+
+def unregister(callback, events=EVENTS):
+    """Remove `callback` from the given events (if it is registered)."""
+    for event in _events(events):
+        if callback in _hooks[event]:
+            _hooks[event].remove(callback)
+
+
+def hooks(event):
+    """Callbacks registered for `event`."""
+    return list(_hooks[event])
+
+
+def _events(events):
+    events = [events] if isinstance(events, str) else list(events)
+    unknown = [e for e in events if e not in _hooks]
+    if unknown:
+        raise ValueError("Unknown instrumentation events {0}, valid events "
+                         "are {1}.".format(unknown, list(EVENTS)))
+    return events
+
+
+def emit(event, metrics, labels=None):
+    """Call the callbacks of `event` with the `metrics` and `labels`."""
+    labels = dict(labels or {})
+    for callback in hooks(event):
+        try:
+            callback(event, dict(metrics), dict(labels))
+        except Exception:
+            logging.warning("Instrumentation callback {0!r} failed for the "
+                            "event '{1}'.".format(callback, event),
+                            exc_info=True)
+
+
+def peak_memory():
+    """Peak resident set size of the current process in bytes or None."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macOS bytes
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+@contextmanager
+def measure(event, labels=None):
+    """
+    Measure the wall time of a step and report it to the callbacks of
+    `event`.
+
+    Yields None if no callback is registered for `event`. Otherwise, it
+    yields a :class:`Measurement`, whose `metrics` and `labels` can be
+    completed by the step.
+    """
+    if not _hooks[event]:
+        yield None
+        return
+    measurement = Measurement(labels)
+    try:
+        yield measurement
+    except BaseException as e:
+        measurement.labels['error'] = type(e).__name__
+        raise
+    finally:
+        measurement.stop()
+        memory = peak_memory()
+        if memory is not None:
+            measurement.metrics['peak_memory_bytes'] = memory
+        emit(event, measurement.metrics, measurement.labels)
+
+
+class Measurement:
+    """
+    Metrics and labels of a measured step, see :func:`measure`.
+
+    Attributes
+    ----------
+    metrics : dict
+        Numeric metrics, e.g. `{'variables': 100}`.
+    labels : dict
+        String labels, e.g. `{'model': 'Model'}`.
+    """
+    def __init__(self, labels=None):
+        self.metrics = {}
+        self.labels = {k: str(v) for k, v in (labels or {}).items()}
+        self._start = time.perf_counter()
+
+    def stop(self):
+        """Stop the time measurement, e.g. before further metrics are
+        collected. Only the first call counts."""
+        if 'time_seconds' not in self.metrics:
+            self.metrics['time_seconds'] = time.perf_counter() - self._start
+
+
+class MetricsFileSink:
+    """
+    Callback writing the metrics to a local file.
+
+    With `file_format='jsonl'`, every event is appended to the file as one
+    JSON object with the keys `timestamp` (seconds since the epoch),
+    `event`, `labels` and `metrics`. With `file_format='prometheus'`, the
+    file is replaced by the latest value of every metric in the Prometheus
+    text format (named `oemof_solph_<event>_<metric>`) and a counter of the
+    events per label set (`oemof_solph_<event>_total`).
+
+    Parameters
+    ----------
+    path : str
+        Path of the file.
+    file_format : str
+        'jsonl' or 'prometheus'.
+    labels : dict
+        Labels added to every event, e.g. the name of the run.
+
+    Examples
+    --------
+    >>> sink = register(MetricsFileSink(
+    ...     'solph_metrics.prom', 'prometheus',
+    ...     labels={'job': 'dispatch'}))  # doctest: +SKIP
+    """
+    FORMATS = ('jsonl', 'prometheus')
+
+    def __init__(self, path, file_format='jsonl', labels=None):
+        if file_format not in self.FORMATS:
+            raise ValueError("Unknown metrics file format '{0}', valid "
+                             "formats are {1}.".format(
+                                 file_format, list(self.FORMATS)))
+        self.path = path
+        self.file_format = file_format
+        self.labels = {k: str(v) for k, v in (labels or {}).items()}
+        # latest values of the metrics {(kind, name): {labels: value}}
+        self._samples = {}
+
+    def __call__(self, event, metrics, labels):
+        labels = dict(self.labels, **labels)
+        if self.file_format == 'jsonl':
+            record = {'timestamp': time.time(), 'event': event,
+                      'labels': labels, 'metrics': metrics}
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record, default=float) + '\n')
+            return
+
+        key = tuple(sorted(labels.items()))
+        for name, value in metrics.items():
+            if value is not None:
+                self._samples.setdefault(
+                    ('gauge', _metric_name(event, name)), {})[key] = value
+        counter = self._samples.setdefault(
+            ('counter', _metric_name(event, 'total')), {})
+        counter[key] = counter.get(key, 0) + 1
+        self._write_prometheus()
+
+    def _write_prometheus(self):
+        """Replace the file atomically, so that it is never read half
+        written."""
+        lines = []
+        for (kind, name), samples in sorted(self._samples.items(),
+                                            key=lambda x: x[0][1]):
+            lines.append('# TYPE {0} {1}'.format(name, kind))
+            for key, value in samples.items():
+                labels = ','.join('{0}="{1}"'.format(
+                    _label_name(k), _escape(v)) for k, v in key)
+                lines.append('{0}{{{1}}} {2}'.format(
+                    name, labels, _prometheus_value(value)))
+        tmp = '{0}.{1}.tmp'.format(self.path, os.getpid())
+        with open(tmp, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp, self.path)
+
+    def __repr__(self):
+        return '<MetricsFileSink {0!r} ({1})>'.format(
+            self.path, self.file_format)
+
+
+def _metric_name(event, name):
+    return _label_name('oemof_solph_{0}_{1}'.format(event, name))
+
+
+def _label_name(name):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def _prometheus_value(value):
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+def _escape(value):
+    return (str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
@@ -0,0 +1,1111 @@
+# -*- coding: utf-8 -*-
+
+"""Matrix representation of solph models and in-memory solver interfaces.
+
+The linear problem of a built model is collected into numpy arrays (with the
+constraint matrix in compressed sparse row format) and can be passed to a
+solver library directly, without writing and reading an LP file, exported as
+a `scipy.sparse` matrix or written to an LP or MPS file, which is much faster
+than the lp-file writer of pyomo for the flat linear constraints of the solph
+blocks.
+
+SPDX-License-Identifier: MIT
+
+"""
+import gzip
+import logging
+import math
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+from pyomo.core import Constraint
+from pyomo.core import Objective
+from pyomo.core import Var
+from pyomo.core import maximize
+from pyomo.core import value
+from pyomo.core.base.label import TextLabeler
+from pyomo.core.expr.current import identify_variables
+from pyomo.core.expr.numeric_expr import LinearExpression
+from pyomo.core.expr.numvalue import native_numeric_types
+from pyomo.opt import ProblemSense
+from pyomo.opt import SolverFactory
+from pyomo.opt import SolverResults
+from pyomo.opt import SolverStatus
+from pyomo.opt import TerminationCondition
+from pyomo.repn import generate_standard_repn
+
+try:
+    import highspy
+except ImportError:
+    highspy = None
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+
+class LinearProblem:
+    r"""
+    Linear (mixed integer) problem of a pyomo model in matrix form.
+
+    .. math::
+        \min / \max \quad c^T x + offset
+
+        row\_lower \leq A x \leq row\_upper
+
+        col\_lower \leq x \leq col\_upper
+
+    Fixed variables are columns with equal lower and upper bounds, so the
+    structure of the problem does not depend on the values of the fixed
+    variables.
+
+    Parameters
+    ----------
+    model : pyomo.ConcreteModel
+        A built model with a single active linear objective.
+
+    Attributes
+    ----------
+    variables : list
+        Pyomo variables of the columns.
+    constraints : list
+        Pyomo constraints of the rows.
+    a_start, a_index, a_value : numpy.ndarray
+        The constraint matrix `A` in compressed sparse row format.
+    row_labels : list
+        Label `(name, index)` of every row, with the name of the pyomo
+        constraint (e.g. 'Bus.balance') and its index (e.g. `(bus, t)`).
+
+    Examples
+    --------
+    >>> problem = om.to_matrix()  # doctest: +SKIP
+    >>> problem.matrix  # scipy.sparse.csr_matrix  # doctest: +SKIP
+    >>> problem.column_map['flow', (source, target, 0)]  # doctest: +SKIP
+    >>> problem.write('model.mps')  # doctest: +SKIP
+    """
+    def __init__(self, model):
+        self.model = model
+        self.variables = []
+        self.constraints = []
+        self.row_labels = []
+        self._columns = {}
+        self._column_labels = None
+
+        a_start = [0]
+        a_index = []
+        a_value = []
+        row_constant = []
+
+        for component in model.component_objects(
+                Constraint, active=True, descend_into=True):
+            name = component.name
+            for index, con in component.items():
+                if not con.active:
+                    continue
+                coefficients, variables, constant = _linear_terms(
+                    con.body, con)
+                if not variables:
+                    # rows without variables are not part of the problem,
+                    # but they have to be satisfied by their constant
+                    _check_constant_row(con, value(constant), (name, index))
+                    continue
+                self.constraints.append(con)
+                self.row_labels.append((name, index))
+                a_index.extend(self._column(v) for v in variables)
+                a_value.extend(coefficients)
+                a_start.append(len(a_index))
+                row_constant.append(value(constant))
+
+        self._update_objective(add_columns=True)
+
+        self._row_constant = np.array(row_constant, dtype=float)
+        # the integrality is a property of the domain
+        integer_domains = {}
+        for v in self.variables:
+            if id(v.domain) not in integer_domains:
+                integer_domains[id(v.domain)] = v.is_integer()
+        self.integrality = np.array(
+            [integer_domains[id(v.domain)] for v in self.variables],
+            dtype=bool)
+        self.a_start = np.array(a_start, dtype=np.int64)
+        self.a_index = np.array(a_index, dtype=np.int64)
+        self.a_value = np.array(a_value, dtype=float)
+        self._update_bounds()
+
+    def _column(self, var, add=True):
+        # pyomo variables are identified by id() as hashing is expensive
+        column = self._columns.get(id(var))
+        if column is None:
+            if not add:
+                raise ValueError(
+                    "Variable {0} is not part of the problem. The structure "
+                    "of the model has changed.".format(var.name))
+            column = self._columns[id(var)] = len(self.variables)
+            self.variables.append(var)
+        return column
+
+    def _update_objective(self, add_columns=False):
+        objectives = list(self.model.component_data_objects(
+            Objective, active=True, descend_into=True))
+        if len(objectives) != 1:
+            raise ValueError("The model needs exactly one active objective, "
+                             "found {0}.".format(len(objectives)))
+        objective = objectives[0]
+        coefficients, variables, constant = _linear_terms(
+            objective.expr, objective)
+        self.objective = objective
+        self.sense = -1 if objective.sense == maximize else 1
+        self.offset = value(constant)
+        cost_index = [self._column(v, add=add_columns) for v in variables]
+        self.col_cost = np.zeros(len(self.variables))
+        np.add.at(self.col_cost, cost_index, coefficients)
+
+    def _update_bounds(self):
+        lower = []
+        upper = []
+        # the bounds of the domains (e.g. NonNegativeReals) are computed
+        # once per domain instead of once per variable as by `var.lb`
+        domain_bounds = {}
+        for v in self.variables:
+            if v.fixed:
+                lower.append(v.value)
+                upper.append(v.value)
+                continue
+            domain = v.domain
+            bounds = domain_bounds.get(id(domain))
+            if bounds is None:
+                bounds = domain_bounds[id(domain)] = domain.bounds()
+            lb = _bound(v._lb, bounds[0], max)
+            ub = _bound(v._ub, bounds[1], min)
+            lower.append(-np.inf if lb is None else lb)
+            upper.append(np.inf if ub is None else ub)
+        self.col_lower = np.array(lower, dtype=float)
+        self.col_upper = np.array(upper, dtype=float)
+        self.row_lower = np.array(
+            [value(c.lower) if c.has_lb() else -np.inf
+             for c in self.constraints], dtype=float) - self._row_constant
+        self.row_upper = np.array(
+            [value(c.upper) if c.has_ub() else np.inf
+             for c in self.constraints], dtype=float) - self._row_constant
+
+    def update(self):
+        """
+        Read the objective coefficients and the bounds from the model again.
+
+        Use this method after changing parameters of the model, e.g. with
+        :meth:`oemof.solph.models.Model.update_parameters`. The constraint
+        matrix is not changed.
+        """
+        self._update_objective()
+        self._update_bounds()
+
+    @property
+    def num_col(self):
+        return len(self.variables)
+
+    @property
+    def num_row(self):
+        return len(self.constraints)
+
+    @property
+    def num_nz(self):
+        return len(self.a_value)
+
+    @property
+    def column_labels(self):
+        """
+        Label `(name, index)` of every column, with the name of the pyomo
+        variable (e.g. 'flow' or 'GenericStorageBlock.storage_content') and
+        its index (e.g. `(source, target, t)` or `(node, t)`).
+        """
+        if self._column_labels is None:
+            labels = {}
+            for component in self.model.component_objects(
+                    Var, descend_into=True):
+                name = component.name
+                for index, var in component.items():
+                    labels[id(var)] = (name, index)
+            self._column_labels = [labels[id(v)] for v in self.variables]
+        return self._column_labels
+
+    @property
+    def column_map(self):
+        """Dictionary of the column of every column label."""
+        return {label: n for n, label in enumerate(self.column_labels)}
+
+    @property
+    def row_map(self):
+        """Dictionary of the row of every row label."""
+        return {label: n for n, label in enumerate(self.row_labels)}
+
+    @property
+    def matrix(self):
+        """The constraint matrix `A` as `scipy.sparse.csr_matrix`."""
+        if sparse is None:
+            raise ImportError(
+                "The sparse constraint matrix needs the 'scipy' package.")
+        return sparse.csr_matrix((self.a_value, self.a_index, self.a_start),
+                                 shape=(self.num_row, self.num_col))
+
+    def _names(self, symbolic_labels):
+        if symbolic_labels:
+            labeler = TextLabeler()
+            return ([labeler(v) for v in self.variables],
+                    [labeler(c) for c in self.constraints])
+        return (['x{0}'.format(n + 1) for n in range(self.num_col)],
+                ['c{0}'.format(n + 1) for n in range(self.num_row)])
+
+    def write(self, filename, symbolic_labels=False, chunk_size=10000):
+        """
+        Write the problem to an LP (CPLEX format) or a free MPS file.
+
+        The format is chosen by the extension of `filename` ('.lp' or
+        '.mps'), files ending with '.gz' (e.g. 'model.mps.gz') are
+        compressed with gzip. With `symbolic_labels`, the names of the pyomo
+        variables and constraints are used, otherwise the columns and rows
+        are numbered (x1, x2, ... and c1, c2, ...). As in the files written
+        by pyomo, the names of the rows are prefixed by their type, e.g.
+        `c_e_c1_` for an equality or `c_u_Bus_balance(b1_0)_` for an upper
+        bound. The lines are written in chunks of `chunk_size` lines.
+        """
+        name = filename[:-3] if filename.endswith('.gz') else filename
+        if name.endswith('.lp'):
+            lines = self._lp_lines(*self._names(symbolic_labels))
+        elif name.endswith('.mps'):
+            lines = self._mps_lines(*self._names(symbolic_labels))
+        else:
+            raise ValueError("Unknown file format of '{0}', use '.lp' or "
+                             "'.mps'.".format(filename))
+        opener = gzip.open if filename.endswith('.gz') else open
+        with opener(filename, 'wt') as f:
+            chunk = []
+            for line in lines:
+                chunk.append(line)
+                if len(chunk) == chunk_size:
+                    f.write(''.join(chunk))
+                    chunk = []
+            f.write(''.join(chunk))
+
+    def _lp_lines(self, columns, rows):
+        """Lines of the LP file (CPLEX format)."""
+        terms = ['{0:+} {1}\n'.format(v, columns[j]) for v, j in
+                 zip(self.a_value.tolist(), self.a_index.tolist())]
+        starts = self.a_start.tolist()
+
+        yield '\\* Problem: {0} *\\\n\n'.format(self.model.name)
+        yield 'max\n' if self.sense == -1 else 'min\n'
+        yield 'obj:\n'
+        cost_columns = np.flatnonzero(self.col_cost).tolist()
+        for j in cost_columns:
+            yield '{0:+} {1}\n'.format(self.col_cost[j], columns[j])
+        # the lp format has no objective constant, pyomo uses a fixed
+        # variable for the constant, too
+        constant = self.offset != 0 or not cost_columns
+        if constant:
+            yield '{0:+} ONE_VAR_CONSTANT\n'.format(float(self.offset))
+        yield '\ns.t.\n\n'
+
+        for r, (lower, upper) in enumerate(zip(
+                self.row_lower.tolist(), self.row_upper.tolist())):
+            row = ''.join(terms[starts[r]:starts[r + 1]])
+            if lower == upper:
+                yield 'c_e_{0}_:\n{1}= {2}\n\n'.format(rows[r], row, lower)
+                continue
+            # ranged rows are split into two rows
+            prefix = 'r' if -np.inf < lower and upper < np.inf else 'c'
+            for kind, sign, bound in [('l', '>=', lower), ('u', '<=', upper)]:
+                if -np.inf < bound < np.inf:
+                    yield '{0}_{1}_{2}_:\n{3}{4} {5}\n\n'.format(
+                        prefix, kind, rows[r], row, sign, bound)
+
+        yield 'bounds\n'
+        if constant:
+            yield ' ONE_VAR_CONSTANT = 1\n'
+        for name, lower, upper in zip(columns, self.col_lower.tolist(),
+                                      self.col_upper.tolist()):
+            if lower == upper:
+                yield ' {0} = {1}\n'.format(name, lower)
+            elif lower == -np.inf and upper == np.inf:
+                yield ' {0} free\n'.format(name)
+            else:
+                yield ' {0} <= {1} <= {2}\n'.format(
+                    _lp_bound(lower), name, _lp_bound(upper))
+
+        if self.integrality.any():
+            yield 'general\n'
+            for j in np.flatnonzero(self.integrality).tolist():
+                yield ' {0}\n'.format(columns[j])
+        yield 'end\n'
+
+    def _mps_lines(self, columns, rows):
+        """Lines of the free MPS file."""
+        lower, upper = self.row_lower, self.row_upper
+        row_type = np.select(
+            [lower == upper, np.isfinite(upper), np.isfinite(lower)],
+            ['E', 'L', 'G'], 'N')
+        ranged = (row_type == 'L') & np.isfinite(lower)
+        prefix = np.select([ranged, row_type == 'E', row_type == 'L',
+                            row_type == 'G'],
+                           ['r_l_', 'c_e_', 'c_u_', 'c_l_'], 'c_n_')
+        rows = [p + name + '_' for p, name in zip(prefix.tolist(), rows)]
+
+        # column-wise order of the nonzeros
+        order = np.argsort(self.a_index, kind='stable')
+        row_of_nz = np.repeat(np.arange(self.num_row),
+                              np.diff(self.a_start))[order].tolist()
+        column_of_nz = self.a_index[order].tolist()
+        value_of_nz = self.a_value[order].tolist()
+        col_starts = np.searchsorted(
+            column_of_nz, np.arange(self.num_col + 1)).tolist()
+        col_cost = self.col_cost.tolist()
+        integrality = self.integrality.tolist()
+
+        yield 'NAME {0}\n'.format(self.model.name)
+        if self.sense == -1:
+            yield 'OBJSENSE\n    MAX\n'
+        yield 'ROWS\n N obj\n'
+        for name, kind in zip(rows, row_type.tolist()):
+            yield ' {0} {1}\n'.format(kind, name)
+
+        yield 'COLUMNS\n'
+        integer = False
+        for j, name in enumerate(columns):
+            if integrality[j] != integer:
+                integer = not integer
+                yield "    MARKER 'MARKER' '{0}'\n".format(
+                    'INTORG' if integer else 'INTEND')
+            if col_cost[j] != 0 or col_starts[j] == col_starts[j + 1]:
+                yield '    {0} obj {1}\n'.format(name, col_cost[j])
+            for n in range(col_starts[j], col_starts[j + 1]):
+                yield '    {0} {1} {2}\n'.format(
+                    name, rows[row_of_nz[n]], value_of_nz[n])
+        if integer:
+            yield "    MARKER 'MARKER' 'INTEND'\n"
+
+        yield 'RHS\n'
+        if self.offset != 0:
+            yield '    RHS obj {0}\n'.format(-float(self.offset))
+        rhs = np.where(row_type == 'G', lower, upper)
+        for name, kind, r in zip(rows, row_type.tolist(), rhs.tolist()):
+            if kind != 'N' and r != 0:
+                yield '    RHS {0} {1}\n'.format(name, r)
+
+        if ranged.any():
+            yield 'RANGES\n'
+            for r in np.flatnonzero(ranged).tolist():
+                yield '    RNG {0} {1}\n'.format(rows[r], upper[r] - lower[r])
+
+        yield 'BOUNDS\n'
+        for name, lb, ub in zip(columns, self.col_lower.tolist(),
+                                self.col_upper.tolist()):
+            if lb == ub:
+                yield ' FX BND {0} {1}\n'.format(name, lb)
+            elif lb == -np.inf and ub == np.inf:
+                yield ' FR BND {0}\n'.format(name)
+            else:
+                if lb == -np.inf:
+                    yield ' MI BND {0}\n'.format(name)
+                else:
+                    yield ' LO BND {0} {1}\n'.format(name, lb)
+                if ub == np.inf:
+                    yield ' PL BND {0}\n'.format(name)
+                else:
+                    yield ' UP BND {0} {1}\n'.format(name, ub)
+        yield 'ENDATA\n'
+
+    def start_values(self):
+        """
+        Current values of the variables as start solution.
+
+        Returns
+        -------
+        tuple : (positions of the columns with a value as int32 array,
+            values as float array)
+        """
+        values = np.array([np.nan if v.value is None else v.value
+                           for v in self.variables], dtype=float)
+        columns = np.flatnonzero(~np.isnan(values)).astype(np.int32)
+        return columns, values[columns]
+
+    def write_start(self, filename):
+        """
+        Write the current non-zero values of the integer variables to a start
+        file in the SOLN format of cbc (`-mipstart`), with the numbered names
+        of the columns (see :meth:`write`).
+        """
+        columns, values = self.start_values()
+        integer = self.integrality[columns] & (values != 0)
+        with open(filename, 'w') as f:
+            for n, (j, v) in enumerate(zip(columns[integer].tolist(),
+                                           values[integer].tolist())):
+                f.write('{0} x{1} {2}\n'.format(n, j + 1, v))
+
+    def load_solution(self, col_value, row_dual=None):
+        """
+        Write the values of the columns back into the pyomo variables.
+
+        The duals of the rows are written into the `dual` suffix of the
+        model, if the model has one.
+        """
+        for var, val in zip(self.variables, np.asarray(col_value).tolist()):
+            var.value = val
+        dual = getattr(self.model, 'dual', None)
+        if row_dual is not None and dual is not None:
+            for con, val in zip(self.constraints,
+                                np.asarray(row_dual).tolist()):
+                dual[con] = val
+
+    def presolve(self):
+        """
+        Get the reduced problem with removed fixed columns and redundant
+        rows, see :class:`PresolvedProblem`.
+        """
+        return PresolvedProblem(self)
+
+
+class PresolvedProblem(LinearProblem):
+    """
+    Reduced problem of a :class:`LinearProblem` (presolve).
+
+    The following reductions are applied as long as one of them applies:
+
+    * Fixed columns (e.g. flows with `fix`) are replaced by constants.
+    * Columns without rows are set to their best bound.
+    * Empty rows (e.g. the balance of a bus with fixed flows only) are
+      dropped.
+    * Rows with a single column are replaced by bounds of the column.
+    * Equality rows with two columns (e.g. the relation of a transformer
+      with a single input and output or the balance of a bus between two
+      flows) are dropped by substituting one of their continuous columns
+      in the other rows. This collapses chains of such transformers and
+      buses and never adds nonzeros.
+
+    The reduced problem is written and solved like a :class:`LinearProblem`.
+    :meth:`load_solution` computes the values of the removed columns and
+    the duals of the removed rows (postsolve) and loads the solution of the
+    original problem into the model, so the results contain all flows.
+
+    Parameters
+    ----------
+    problem : LinearProblem
+
+    Attributes
+    ----------
+    original : LinearProblem
+        The problem before the reductions.
+    columns, rows : numpy.ndarray
+        Positions of the kept columns and rows in the original problem.
+
+    Raises
+    ------
+    ValueError
+        If the reductions show that the problem is infeasible.
+    """
+    def __init__(self, problem):
+        self.original = problem
+        self.model = problem.model
+        self.objective = problem.objective
+        self.sense = problem.sense
+        self._reduce()
+
+    def _reduce(self):
+        problem = self.original
+        self._column_labels = None
+        starts = problem.a_start.tolist()
+        index = problem.a_index.tolist()
+        values = problem.a_value.tolist()
+        rows = [dict(zip(index[starts[r]:starts[r + 1]],
+                         values[starts[r]:starts[r + 1]]))
+                for r in range(problem.num_row)]
+        cols = [set() for _ in range(problem.num_col)]
+        for r, row in enumerate(rows):
+            for j in row:
+                cols[j].add(r)
+
+        lower = problem.col_lower.tolist()
+        upper = problem.col_upper.tolist()
+        cost = problem.col_cost.tolist()
+        integrality = problem.integrality.tolist()
+        row_lower = problem.row_lower.tolist()
+        row_upper = problem.row_upper.tolist()
+        offset = problem.offset
+        # reductions in the order of their application
+        stack = []
+        col_queue = list(range(problem.num_col))
+        row_queue = list(range(problem.num_row))
+
+        def remove_column(j, x):
+            column = {i: rows[i].pop(j) for i in cols[j]}
+            for i, a in column.items():
+                row_lower[i] -= a * x
+                row_upper[i] -= a * x
+                row_queue.append(i)
+            cols[j] = None
+            stack.append(('column', j, x, cost[j], column))
+            return cost[j] * x
+
+        def remove_row(r):
+            for j in rows[r]:
+                cols[j].discard(r)
+            rows[r] = None
+
+        def tightened(j, lo, up):
+            if integrality[j]:
+                lo = math.ceil(lo - _TOLERANCE)
+                up = math.floor(up + _TOLERANCE)
+            lo, up = max(lower[j], lo), min(upper[j], up)
+            if lo > up + _TOLERANCE * max(1, abs(up)):
+                raise ValueError(
+                    "The problem is infeasible, the bounds of column {0} "
+                    "are inconsistent.".format(problem.column_labels[j]))
+            return lo, max(lo, up)
+
+        while col_queue or row_queue:
+            if col_queue:
+                j = col_queue.pop()
+                if cols[j] is None:
+                    continue
+                if lower[j] == upper[j]:
+                    offset += remove_column(j, lower[j])
+                elif not cols[j]:
+                    x = _best_bound(cost[j] * self.sense, lower[j], upper[j])
+                    if x is not None:
+                        offset += remove_column(j, x)
+                continue
+
+            r = row_queue.pop()
+            row = rows[r]
+            if row is None:
+                continue
+            if not row:
+                if (row_lower[r] > _TOLERANCE or
+                        row_upper[r] < -_TOLERANCE):
+                    raise ValueError(
+                        "The problem is infeasible, row {0} cannot be "
+                        "satisfied.".format(problem.row_labels[r]))
+                remove_row(r)
+                stack.append(('row', r))
+            elif len(row) == 1:
+                (j, a), = row.items()
+                bounds = sorted([row_lower[r] / a, row_upper[r] / a])
+                stack.append(('singleton', r, j, a, lower[j], upper[j]))
+                lower[j], upper[j] = tightened(j, *bounds)
+                remove_row(r)
+                col_queue.append(j)
+            elif len(row) == 2 and row_lower[r] == row_upper[r]:
+                (j, a_j), (k, a_k) = row.items()
+                # substitute the continuous column with fewer rows
+                if integrality[j] or (not integrality[k] and
+                                      len(cols[k]) < len(cols[j])):
+                    (j, a_j), (k, a_k) = (k, a_k), (j, a_j)
+                ratio = a_k / a_j
+                if integrality[j] or not 1e-3 <= abs(ratio) <= 1e3:
+                    continue
+                b = row_upper[r]
+                stack.append(('doubleton', r, j, k, a_j, a_k, b, lower[k],
+                              upper[k], cost[j], {i: rows[i][j]
+                                                  for i in cols[j] if i != r}))
+                # x_j = (b - a_k * x_k) / a_j within the bounds of x_j
+                lower[k], upper[k] = tightened(k, *sorted(
+                    [(b - a_j * lower[j]) / a_k,
+                     (b - a_j * upper[j]) / a_k]))
+                offset += cost[j] * b / a_j
+                cost[k] -= cost[j] * ratio
+                remove_row(r)
+                for i in cols[j]:
+                    a = rows[i].pop(j)
+                    row_lower[i] -= a * b / a_j
+                    row_upper[i] -= a * b / a_j
+                    coefficient = rows[i].get(k, 0) - a * ratio
+                    if abs(coefficient) > 1e-12:
+                        rows[i][k] = coefficient
+                        cols[k].add(i)
+                    elif k in rows[i]:
+                        del rows[i][k]
+                        cols[k].discard(i)
+                    row_queue.append(i)
+                cols[j] = None
+                col_queue.append(k)
+
+        self.columns = np.array([j for j, c in enumerate(cols)
+                                 if c is not None], dtype=np.int64)
+        self.rows = np.array([r for r, row in enumerate(rows)
+                              if row is not None], dtype=np.int64)
+        position = np.full(problem.num_col, -1, dtype=np.int64)
+        position[self.columns] = np.arange(len(self.columns))
+        a_start = [0]
+        a_index = []
+        a_value = []
+        for r in self.rows.tolist():
+            for j, a in sorted(rows[r].items()):
+                a_index.append(j)
+                a_value.append(a)
+            a_start.append(len(a_index))
+
+        self._stack = stack
+        self.variables = [problem.variables[j] for j in self.columns]
+        self.constraints = [problem.constraints[r] for r in self.rows]
+        self.row_labels = [problem.row_labels[r] for r in self.rows]
+        self.integrality = problem.integrality[self.columns]
+        self.col_cost = np.array(cost, dtype=float)[self.columns]
+        self.col_lower = np.array(lower, dtype=float)[self.columns]
+        self.col_upper = np.array(upper, dtype=float)[self.columns]
+        self.row_lower = np.array(row_lower, dtype=float)[self.rows]
+        self.row_upper = np.array(row_upper, dtype=float)[self.rows]
+        self.offset = offset
+        self.a_start = np.array(a_start, dtype=np.int64)
+        self.a_index = position[np.array(a_index, dtype=np.int64)]
+        self.a_value = np.array(a_value, dtype=float)
+        logging.info(
+            "Presolve removed {0} of {1} rows, {2} of {3} columns and {4} of "
+            "{5} nonzeros.".format(
+                problem.num_row - self.num_row, problem.num_row,
+                problem.num_col - self.num_col, problem.num_col,
+                problem.num_nz - self.num_nz, problem.num_nz))
+
+    def update(self):
+        """
+        Read the objective coefficients and the bounds of the original
+        problem from the model again and reduce it again, as other columns
+        may be fixed now.
+        """
+        self.original.update()
+        self._reduce()
+
+    def postsolve(self, col_value, row_dual=None):
+        """
+        Get the solution of the original problem from a solution of the
+        reduced problem.
+
+        The reductions are undone in reverse order. To get the duals of the
+        removed rows, the reduced costs `c - A'y` of the columns are tracked:
+        the dual of a removed row is chosen such that the reduced costs of
+        its columns are zero or have the sign of the active bound.
+
+        Returns
+        -------
+        tuple : (values of the columns, duals of the rows or None)
+        """
+        x = np.zeros(self.original.num_col)
+        x[self.columns] = col_value
+        y = d = None
+        if row_dual is not None:
+            y = np.zeros(self.original.num_row)
+            y[self.rows] = row_dual
+            d = np.zeros(self.original.num_col)
+            d[self.columns] = self.col_cost - np.bincount(
+                self.a_index,
+                weights=self.a_value * np.repeat(
+                    np.asarray(row_dual, dtype=float), np.diff(self.a_start)),
+                minlength=self.num_col)
+
+        def reduced_cost(cost, column):
+            return cost - sum(y[i] * a for i, a in column.items())
+
+        def is_valid(j, lower, upper):
+            dj = d[j] * self.sense
+            return (abs(dj) <= 1e-7 or (dj > 0 and _active(x[j], lower)) or
+                    (dj < 0 and _active(x[j], upper)))
+
+        for reduction in reversed(self._stack):
+            kind = reduction[0]
+            if kind == 'column':
+                _, j, x[j], cost, column = reduction
+                if y is not None:
+                    d[j] = reduced_cost(cost, column)
+            elif kind == 'singleton' and y is not None:
+                _, r, j, a, lower, upper = reduction
+                # the column is at one of its own bounds (y_r = 0) or the
+                # bound of the row is active and the reduced cost vanishes
+                if not is_valid(j, lower, upper):
+                    y[r] = d[j] / a
+                    d[j] = 0
+            elif kind == 'doubleton':
+                (_, r, j, k, a_j, a_k, b, lower_k, upper_k, cost_j,
+                 column) = reduction
+                x[j] = (b - a_k * x[k]) / a_j
+                if y is None:
+                    continue
+                # the reduced cost of k in the reduced problem is
+                # d_k - d_j * a_k / a_j, one of d_j and d_k vanishes
+                if is_valid(k, lower_k, upper_k):
+                    d[j] = 0
+                else:
+                    d[j] = -d[k] * a_j / a_k
+                    d[k] = 0
+                y[r] = (reduced_cost(cost_j, column) - d[j]) / a_j
+        return x, y
+
+    def load_solution(self, col_value, row_dual=None):
+        """
+        Write the values of all columns of the original problem back into
+        the pyomo variables (see :meth:`postsolve` and
+        :meth:`LinearProblem.load_solution`).
+        """
+        if getattr(self.model, 'dual', None) is None:
+            row_dual = None
+        self.original.load_solution(*self.postsolve(col_value, row_dual))
+
+
+# tolerance of the presolve, e.g. for values at their bounds
+_TOLERANCE = 1e-9
+
+
+def _check_constant_row(con, constant, label):
+    """Raise a ValueError if the constant of a row without variables does
+    not satisfy the bounds of the constraint `con`."""
+    if ((con.has_lb() and value(con.lower) - constant > _TOLERANCE) or
+            (con.has_ub() and constant - value(con.upper) > _TOLERANCE)):
+        raise ValueError(
+            "The problem is infeasible, row {0} cannot be satisfied."
+            .format(label))
+
+
+def _best_bound(cost, lower, upper):
+    """Optimal value of a column without rows or None if unbounded."""
+    if cost > 0 or (cost == 0 and lower > -np.inf):
+        x = lower
+    elif cost < 0 or upper < np.inf:
+        x = upper
+    else:
+        x = 0
+    return x if -np.inf < x < np.inf else None
+
+
+def _active(x, bound):
+    """Whether `x` is at the (finite) `bound`."""
+    return -np.inf < bound < np.inf and (
+        abs(x - bound) <= 1e-7 * max(1, abs(bound)))
+
+
+def _linear_terms(expr, component):
+    """
+    Coefficients, variables and constant of a linear expression.
+
+    Flat linear expressions (see
+    :func:`~oemof.solph.plumbing.linear_expression`) are read without
+    walking the expression. Other expressions (e.g. of user-defined
+    constraints) are passed to the standard representation of pyomo.
+    Fixed variables are kept as variables in both cases.
+    """
+    if expr.__class__ is LinearExpression:
+        variables = expr.linear_vars
+        if len(set(map(id, variables))) == len(variables):
+            coefficients = [
+                c if c.__class__ in native_numeric_types else value(c)
+                for c in expr.linear_coefs]
+            return coefficients, variables, expr.constant
+
+    # fixed variables would be treated as constants by the pyomo repn
+    fixed = [v for v in identify_variables(expr) if v.fixed]
+    for v in fixed:
+        v.unfix()
+    try:
+        repn = generate_standard_repn(expr, compute_values=True)
+    finally:
+        for v in fixed:
+            v.fix()
+    if not repn.is_linear():
+        raise ValueError("{0} {1} is not linear.".format(
+            component.ctype.__name__, component.name))
+    return repn.linear_coefs, repn.linear_vars, repn.constant
+
+
+def _bound(var_bound, domain_bound, select):
+    """Bound of a variable as `var.lb` (select=max) or `var.ub`
+    (select=min)."""
+    if var_bound is None:
+        return domain_bound
+    if domain_bound is None:
+        return value(var_bound)
+    return select(value(var_bound), domain_bound)
+
+
+def _lp_bound(bound):
+    if bound == np.inf:
+        return '+inf'
+    if bound == -np.inf:
+        return '-inf'
+    return bound
+
+
+_COLUMN_NAME = re.compile(r'^x(\d+)$')
+# solvers reading start values of the columns from a file (SOLN format)
+_START_FILE_SOLVERS = ('cbc',)
+_ROW_NAME = re.compile(r'^[cr]_[elu]_c(\d+)_$')
+
+_HIGHS_TERMINATION = {
+    'Optimal': (SolverStatus.ok, TerminationCondition.optimal),
+    # e.g. all columns and rows are removed by the presolve
+    'Empty': (SolverStatus.ok, TerminationCondition.optimal),
+    'Infeasible': (SolverStatus.warning, TerminationCondition.infeasible),
+    'Unbounded': (SolverStatus.warning, TerminationCondition.unbounded),
+    'Primal infeasible or unbounded': (
+        SolverStatus.warning, TerminationCondition.infeasibleOrUnbounded),
+    'Time limit reached': (SolverStatus.aborted,
+                           TerminationCondition.maxTimeLimit),
+    'Iteration limit reached': (SolverStatus.aborted,
+                                TerminationCondition.maxIterations),
+}
+
+
+class HighsInterface:
+    """
+    Persistent in-memory interface to the HiGHS python bindings (highspy).
+
+    The problem is passed to HiGHS once. After changing parameters of the
+    model, :meth:`update` passes the new objective coefficients and bounds to
+    the existing HiGHS instance, so that the next :meth:`solve` starts from
+    the basis of the previous solution.
+
+    Parameters
+    ----------
+    model : pyomo.ConcreteModel
+        A built model.
+    options : dict
+        HiGHS options, e.g. {"mip_rel_gap": 0.01, "threads": 1}
+    tee : bool
+        Show the output of the solver.
+    warmstart : bool
+        Pass the current values of the variables as start solution to HiGHS
+        before every solve.
+    presolve : bool
+        Pass the reduced problem (see :class:`PresolvedProblem`) to HiGHS.
+        As the reductions depend on the bounds, :meth:`update` passes the
+        whole problem again.
+    """
+    def __init__(self, model, options=None, tee=False, warmstart=False,
+                 presolve=False):
+        if highspy is None:
+            raise ImportError(
+                "The in-memory solver interface needs the 'highspy' package.")
+        start = time.perf_counter()
+        self.model = model
+        self.warmstart = warmstart
+        self.problem = LinearProblem(model)
+        if presolve:
+            self.problem = self.problem.presolve()
+
+        self.highs = highspy.Highs()
+        self.highs.setOptionValue('output_flag', bool(tee))
+        for k, v in (options or {}).items():
+            self.highs.setOptionValue(k, v)
+        self._pass_model()
+        self._setup_time = time.perf_counter() - start
+
+    def _pass_model(self):
+        problem = self.problem
+        lp = highspy.HighsLp()
+        lp.num_col_ = problem.num_col
+        lp.num_row_ = problem.num_row
+        lp.col_cost_ = problem.col_cost
+        lp.col_lower_ = problem.col_lower
+        lp.col_upper_ = problem.col_upper
+        lp.row_lower_ = problem.row_lower
+        lp.row_upper_ = problem.row_upper
+        lp.offset_ = problem.offset
+        lp.sense_ = (highspy.ObjSense.kMaximize if problem.sense == -1
+                     else highspy.ObjSense.kMinimize)
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.num_col_ = problem.num_col
+        lp.a_matrix_.num_row_ = problem.num_row
+        lp.a_matrix_.start_ = problem.a_start
+        lp.a_matrix_.index_ = problem.a_index
+        lp.a_matrix_.value_ = problem.a_value
+        if problem.integrality.any():
+            lp.integrality_ = [highspy.HighsVarType.kInteger if i
+                               else highspy.HighsVarType.kContinuous
+                               for i in problem.integrality]
+        self.highs.passModel(lp)
+
+    def update(self):
+        """Pass changed objective coefficients and bounds to HiGHS."""
+        start = time.perf_counter()
+        problem = self.problem
+        problem.update()
+        if isinstance(problem, PresolvedProblem):
+            self._pass_model()
+            self._setup_time = time.perf_counter() - start
+            return
+        columns = np.arange(problem.num_col, dtype=np.int32)
+        rows = np.arange(problem.num_row, dtype=np.int32)
+        self.highs.changeColsCost(problem.num_col, columns, problem.col_cost)
+        self.highs.changeColsBounds(problem.num_col, columns,
+                                    problem.col_lower, problem.col_upper)
+        self.highs.changeRowsBounds(problem.num_row, rows,
+                                    problem.row_lower, problem.row_upper)
+        self.highs.changeObjectiveOffset(problem.offset)
+        self._setup_time = time.perf_counter() - start
+
+    def solve(self):
+        """
+        Solve the problem and load the solution into the model.
+
+        Returns
+        -------
+        pyomo.opt.SolverResults
+        """
+        start = time.perf_counter()
+        problem = self.problem
+        if self.warmstart:
+            columns, values = problem.start_values()
+            self.highs.setSolution(len(columns), columns, values)
+        self.highs.run()
+
+        model_status = self.highs.modelStatusToString(
+            self.highs.getModelStatus())
+        status, termination_condition = _HIGHS_TERMINATION.get(
+            model_status, (SolverStatus.error, TerminationCondition.error))
+
+        if termination_condition == TerminationCondition.optimal:
+            solution = self.highs.getSolution()
+            row_dual = solution.row_dual if solution.dual_valid else None
+            problem.load_solution(solution.col_value, row_dual)
+
+        results = SolverResults()
+        results.problem.name = self.model.name
+        results.problem.number_of_constraints = problem.num_row
+        results.problem.number_of_variables = problem.num_col
+        results.problem.number_of_nonzeros = problem.num_nz
+        results.problem.sense = (ProblemSense.maximize if problem.sense == -1
+                                 else ProblemSense.minimize)
+        if termination_condition == TerminationCondition.optimal:
+            # HiGHS ignores the offset of an empty problem
+            objective = (self.highs.getInfo().objective_function_value
+                         if problem.num_col else problem.offset)
+            results.problem.lower_bound = objective
+            results.problem.upper_bound = objective
+        results.solver.name = 'highs'
+        results.solver.status = status
+        results.solver.termination_condition = termination_condition
+        results.solver.message = model_status
+        results.solver.time = (self._setup_time +
+                               time.perf_counter() - start)
+        return results
+
+
+class FileInterface:
+    """
+    Interface to file based solvers using the writer of
+    :class:`LinearProblem` instead of the lp-file writer of pyomo.
+
+    The problem is written to an LP or MPS file, which is solved by the
+    pyomo solver plugin of `solver` (e.g. 'cbc', 'glpk', 'gurobi'). The
+    values of the variables and the duals (if the model has a `dual`
+    suffix) are read back into the model. After changing parameters of the
+    model, :meth:`update` reads the changed objective coefficients and bounds
+    before the file is written again by the next :meth:`solve`.
+
+    Parameters
+    ----------
+    model : pyomo.ConcreteModel
+        A built model.
+    solver : str
+        Name of the solver, e.g. 'cbc'.
+    file_format : str
+        'lp' or 'mps'
+    options : dict
+        Options of the solver, see the `cmdline_options` of
+        :meth:`~oemof.solph.models.BaseModel.solve`.
+    solve_kwargs : dict
+        Other arguments for the `solve()` method of the pyomo solver, e.g.
+        {"tee": True}.
+    warmstart : bool
+        Write the current values of the integer variables to a start file
+        of the solver before every solve (only supported for cbc).
+    presolve : bool
+        Write the reduced problem, see :class:`PresolvedProblem`.
+    """
+    def __init__(self, model, solver, file_format='lp', options=None,
+                 solve_kwargs=None, warmstart=False, presolve=False):
+        if file_format not in ('lp', 'mps'):
+            raise ValueError("The file format has to be 'lp' or 'mps', got "
+                             "'{0}'.".format(file_format))
+        self.model = model
+        self.problem = LinearProblem(model)
+        if presolve:
+            self.problem = self.problem.presolve()
+        self.file_format = file_format
+        self.solve_kwargs = dict(solve_kwargs or {})
+        self.opt = SolverFactory(solver)
+        for k, v in (options or {}).items():
+            self.opt.options[k] = v
+        self.warmstart = warmstart
+        if warmstart and solver not in _START_FILE_SOLVERS:
+            logging.warning(
+                "Warm starts with the native writer are not supported for "
+                "the solver '{0}', the start values are ignored."
+                .format(solver))
+            self.warmstart = False
+
+    def update(self):
+        """Read the changed objective coefficients and bounds."""
+        self.problem.update()
+
+    def solve(self):
+        """
+        Write the problem, solve it and load the solution into the model.
+
+        Returns
+        -------
+        pyomo.opt.SolverResults
+        """
+        problem = self.problem
+        dual = getattr(self.model, 'dual', None)
+        kwargs = dict(self.solve_kwargs)
+        if dual is not None:
+            kwargs.setdefault('suffixes', ['dual'])
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'model.' + self.file_format)
+            problem.write(filename)
+            if self.warmstart:
+                kwargs['warmstart'] = True
+                kwargs['warmstart_file'] = os.path.join(tmp, 'start.soln')
+                problem.write_start(kwargs['warmstart_file'])
+            results = self.opt.solve(filename, load_solutions=False,
+                                     **kwargs)
+
+        termination_condition = results.solver.termination_condition
+        if (termination_condition == TerminationCondition.optimal and
+                len(results.solution) > 0):
+            solution = results.solution(0)
+            # the columns are named x1, x2, ... and the rows c_e_c1_, ...
+            col_value = np.zeros(problem.num_col)
+            for name, data in solution.variable.items():
+                match = _COLUMN_NAME.match(name)
+                if match:
+                    col_value[int(match.group(1)) - 1] = data['Value']
+            row_dual = None
+            if dual is not None and solution.constraint:
+                row_dual = np.zeros(problem.num_row)
+                for name, data in solution.constraint.items():
+                    match = _ROW_NAME.match(name)
+                    if match and 'Dual' in data:
+                        row_dual[int(match.group(1)) - 1] += data['Dual']
+            problem.load_solution(col_value, row_dual)
+        results.problem.name = self.model.name
+        return results
+
+
+def solve_highs(model, options=None, tee=False):
+    """
+    Solve a model in memory with the HiGHS python bindings (highspy).
+
+    Parameters
+    ----------
+    model : pyomo.ConcreteModel
+        A built model.
+    options : dict
+        HiGHS options, e.g. {"mip_rel_gap": 0.01, "threads": 1}
+    tee : bool
+        Show the output of the solver.
+
+    Returns
+    -------
+    pyomo.opt.SolverResults
+    """
+    return HighsInterface(model, options=options, tee=tee).solve()
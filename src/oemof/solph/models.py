@@ -11,16 +11,35 @@ SPDX-FileCopyrightText: Patrik Schönfeldt
 SPDX-License-Identifier: MIT
 
 """
+import itertools
 import logging
 import warnings
+from contextlib import contextmanager
+from numbers import Number
 
+import numpy as np
 import pyomo.environ as po
 from oemof.solph import blocks
+from oemof.solph import instrumentation
+from oemof.solph import matrix
+from oemof.solph import parallel
 from oemof.solph import processing
+from oemof.solph import warmstart
+from oemof.solph.plumbing import linear_expression
 from oemof.solph.plumbing import sequence
+from oemof.solph.plumbing import sequence_to_array
+from oemof.solph.profiling import BuildProfile
+from oemof.solph.profiling import count_components
+from oemof.solph.profiling import count_nonzeros
+from pyomo.core.expr.numeric_expr import LinearExpression
+from pyomo.core.expr.visitor import identify_variables
 from pyomo.core.plugins.transform.relax_integrality import RelaxIntegrality
 from pyomo.opt import SolverFactory
 
+# attributes of flows, which can be changed in a built model
+UPDATABLE_FLOW_ATTRIBUTES = ['variable_costs', 'fix', 'min', 'max',
+                             'nominal_value']
+
 
 class BaseModel(po.ConcreteModel):
     """ The BaseModel for other solph-models (Model, MultiPeriodModel, etc.)
@@ -43,6 +62,17 @@ class BaseModel(po.ConcreteModel):
         building process set this value to False
         and use methods `_add_parent_block_sets`,
         `_add_parent_block_variables`, `_add_blocks`, `_add_objective`
+    profile : boolean or BuildProfile
+        If True (or a :class:`~oemof.solph.profiling.BuildProfile` is
+        passed), the time, the number of variables and constraints and the
+        memory of every phase of the build and every block are recorded in
+        the `build_profile` attribute.
+    build_processes : int (optional)
+        If set, the coefficients of the blocks supporting it (e.g.
+        `Transformer`, `GenericStorageBlock`, `GenericCHPBlock`) are computed
+        by this number of worker processes before the blocks are created
+        (see :mod:`oemof.solph.parallel`). The model is the same as without
+        worker processes.
 
     Attributes:
     -----------
@@ -58,6 +88,8 @@ class BaseModel(po.ConcreteModel):
         Solver results.
     dual : ... or None
     rc : ... or None
+    build_profile : :class:`~oemof.solph.profiling.BuildProfile` or None
+        Profile of the model build, if `profile` is set.
 
     """
     CONSTRAINT_GROUPS = []
@@ -97,6 +129,17 @@ class BaseModel(po.ConcreteModel):
         self.solver_results = None
         self.dual = None
         self.rc = None
+        self._solve_settings = None
+        self._solver_interface = None
+        # child block of every constraint group
+        self._blocks = {}
+
+        self._build_processes = kwargs.get('build_processes')
+
+        profile = kwargs.get('profile', False)
+        if profile is True:
+            profile = BuildProfile()
+        self.build_profile = profile or None
 
         if kwargs.get("auto_construct", True):
             self._construct()
@@ -104,10 +147,39 @@ class BaseModel(po.ConcreteModel):
     def _construct(self):
         """
         """
-        self._add_parent_block_sets()
-        self._add_parent_block_variables()
-        self._add_child_blocks()
-        self._add_objective()
+        if self.build_profile is not None:
+            self.build_profile.start()
+        try:
+            with instrumentation.measure(
+                    'construct', {'model': self.name}) as measurement:
+                with self._measure('sets', 'phase'):
+                    self._add_parent_block_sets()
+                with self._measure('variables', 'phase'):
+                    self._add_parent_block_variables()
+                with self._measure('child_blocks', 'phase'):
+                    self._add_child_blocks()
+                with self._measure('objective', 'phase'):
+                    self._add_objective()
+                if measurement is not None:
+                    measurement.stop()
+                    variables, constraints = count_components(self)
+                    measurement.metrics.update(
+                        variables=variables, constraints=constraints,
+                        nonzeros=count_nonzeros(self),
+                        timesteps=len(self.es.timeindex),
+                        nodes=len(self.es.nodes))
+        finally:
+            if self.build_profile is not None:
+                self.build_profile.stop()
+
+    def _measure(self, name, kind, block=None):
+        """ Returns a context manager measuring a step of the build if the
+        model is profiled (see :class:`~oemof.solph.profiling.BuildProfile`).
+        """
+        if self.build_profile is None:
+            return _not_measured()
+        return self.build_profile.measure(
+            name, kind, self if block is None else block)
 
     def _add_parent_block_sets(self):
         """" Method to create all sets located at the parent block, i.e. the
@@ -126,30 +198,74 @@ class BaseModel(po.ConcreteModel):
         """ Method to add the defined child blocks for components that have
         been grouped in the defined constraint groups.
         """
+        coefficients = {}
+        if self._build_processes:
+            groups = {g: self.es.groups.get(g)
+                      for g in self._constraint_groups}
+            with self._measure('block_coefficients', 'parallel'):
+                coefficients = parallel.block_coefficients(
+                    groups, sequence_to_array(self.timeincrement,
+                                              len(self.es.timeindex)),
+                    processes=self._build_processes)
 
         for group in self._constraint_groups:
-            # create instance for block
-            block = group()
-            # Add block to model
-            self.add_component(str(block), block)
-            # create constraints etc. related with block for all nodes
-            # in the group
-            block._create(group=self.es.groups.get(group))
+            self._add_child_block(group, coefficients.get(group))
+
+    def _add_child_block(self, group, coefficients=None):
+        """ Creates the block of a constraint group for all nodes (or flows)
+        of the group and adds it to the model. Precomputed `coefficients`
+        (see :mod:`oemof.solph.parallel`) are passed to the block.
+        """
+        # create instance for block
+        block = group()
+        # Add block to model
+        self.add_component(str(block), block)
+        self._blocks[group] = block
+        # create constraints etc. related with block for all nodes
+        # in the group
+        with self._measure(str(block), 'block', block):
+            if coefficients is None:
+                block._create(group=self.es.groups.get(group))
+            else:
+                block._create(group=self.es.groups.get(group),
+                              coefficients=coefficients)
+        return block
 
     def _add_objective(self, sense=po.minimize, update=False):
         """ Method to sum up all objective expressions from the child blocks
         that have been created. This method looks for `_objective_expression`
         attribute in the block definition and will call this method to add
         their return value to the objective function.
+
+        The terms of linear expressions (see
+        :func:`~oemof.solph.plumbing.linear_expression`) are collected and
+        assembled in one pass into a single flat linear expression. Other
+        expressions (e.g. of user-defined blocks) are added to it.
         """
         if update:
             self.del_component('objective')
 
-        expr = 0
+        constant = 0
+        coefficients = []
+        variables = []
+        others = []
 
-        for block in self.component_data_objects():
+        for block in self.component_data_objects(po.Block):
             if hasattr(block, '_objective_expression'):
-                expr += block._objective_expression()
+                with self._measure(block.name, 'objective', block):
+                    expr = block._objective_expression()
+                if isinstance(expr, LinearExpression):
+                    constant += expr.constant
+                    coefficients += expr.linear_coefs
+                    variables += expr.linear_vars
+                elif isinstance(expr, Number):
+                    constant += expr
+                else:
+                    others.append(expr)
+
+        expr = linear_expression(coefficients, variables, constant)
+        if others:
+            expr = po.quicksum([expr] + others, linear=False)
 
         self.objective = po.Objective(sense=sense, expr=expr)
 
@@ -159,15 +275,34 @@ class BaseModel(po.ConcreteModel):
         set as attributes of the model.
 
         """
+        # the attributes are None, pyomo warns if they are simply reassigned
+        for name in ['dual', 'rc']:
+            if getattr(self, name, None) is None:
+                self.__dict__.pop(name, None)
         # shadow prices
         self.dual = po.Suffix(direction=po.Suffix.IMPORT)
         # reduced costs
         self.rc = po.Suffix(direction=po.Suffix.IMPORT)
 
-    def results(self):
+    def results(self, lazy=False):
         """ Returns a nested dictionary of the results of this optimization
+
+        If `lazy` is True, the pandas objects of an entry are only created
+        when the entry is accessed, see
+        :class:`~oemof.solph.processing.Results`.
+        """
+        return processing.results(self, lazy=lazy)
+
+    def to_matrix(self):
+        """ Returns the linear problem of the model in matrix form.
+
+        The :class:`~oemof.solph.matrix.LinearProblem` holds the constraint
+        matrix in compressed sparse row format (also as
+        `scipy.sparse.csr_matrix`), the row and column bounds, the objective
+        coefficients, the integrality of the columns and labels of the rows
+        and columns. It can be written to an LP or MPS file.
         """
-        return processing.results(self)
+        return matrix.LinearProblem(self)
 
     def solve(self, solver='cbc', solver_io='lp', **kwargs):
         r""" Takes care of communication with solver to solve the model.
@@ -178,6 +313,9 @@ class BaseModel(po.ConcreteModel):
             solver to be used e.g. "glpk","gurobi","cplex"
         solver_io : string
             pyomo solver interface file format: "lp","python","nl", etc.
+            Use "memory" to pass the problem in matrix form to the solver
+            library without writing a file (only available for
+            solver="highs", see :mod:`oemof.solph.matrix`).
         \**kwargs : keyword arguments
             Possible keys can be set see below:
 
@@ -192,19 +330,118 @@ class BaseModel(po.ConcreteModel):
             {"interior":" "} results in "--interior"
             Gurobi solver takes numeric parameter values such as
             {"method": 2}
-
+        native_writer : bool
+            Write the lp-file (solver_io="lp") or mps-file (solver_io="mps")
+            with the writer of :class:`~oemof.solph.matrix.LinearProblem`,
+            which reads the coefficients of the flat linear constraints of
+            the solph blocks without walking the pyomo expressions, instead
+            of the writer of pyomo (default: False).
+        warmstart : bool, dict or str
+            Start the solver from the values of a previous solution: the
+            results of a previous model (see
+            :func:`~oemof.solph.processing.results`) or the path of results
+            written by :func:`~oemof.solph.processing.write_results`. The
+            values are mapped onto the variables of this model by the labels
+            of the nodes and the time index (see
+            :func:`~oemof.solph.warmstart.set_start_values`). `True` starts
+            from the current values of the variables, e.g. the last solution
+            or values set by the user. The start values are passed to
+            solvers supporting warm starts (e.g. cbc, gurobi, cplex and
+            highs with `solver_io="memory"`) and ignored by other solvers.
+            :meth:`resolve` starts from the last solution (default: False).
+        presolve : bool
+            Remove fixed flows, chains of transformers with a single input
+            and output and redundant bus balances from the matrix of the
+            problem before it is passed to the solver, see
+            :class:`~oemof.solph.matrix.PresolvedProblem`. The results
+            contain all flows. Only available with `solver_io="memory"` or
+            the native writer, which is implied (default: False).
+
+        The time of the solve and the solver results are reported to the
+        callbacks of the `solve` event (see
+        :mod:`oemof.solph.instrumentation`).
         """
-        solve_kwargs = kwargs.get('solve_kwargs', {})
-        solver_cmdline_options = kwargs.get("cmdline_options", {})
-
-        opt = SolverFactory(solver, solver_io=solver_io)
-        # set command line options
-        options = opt.options
-        for k in solver_cmdline_options:
-            options[k] = solver_cmdline_options[k]
-
-        solver_results = opt.solve(self, **solve_kwargs)
+        with instrumentation.measure('solve', {
+                'model': self.name, 'solver': solver,
+                'solver_io': solver_io}) as measurement:
+            solver_results = self._solve(solver, solver_io, **kwargs)
+            self._solver_metrics(measurement, solver_results)
+        return solver_results
 
+    def _solve(self, solver, solver_io, **kwargs):
+        """ Solves the model, see :meth:`solve`."""
+        solve_kwargs = dict(kwargs.get('solve_kwargs', {}))
+        solver_cmdline_options = kwargs.get("cmdline_options", {})
+        start = kwargs.get('warmstart', False)
+        presolve = kwargs.get('presolve', False)
+        if start is not None and not isinstance(start, bool):
+            warmstart.set_start_values(self, warmstart.start_results(start))
+            start = True
+        if start:
+            # resolve() starts from the last solution
+            kwargs = dict(kwargs, warmstart=True)
+
+        self._solve_settings = (solver, solver_io, kwargs)
+        self._solver_interface = None
+
+        if solver_io == 'memory':
+            if solver != 'highs':
+                raise ValueError(
+                    "The in-memory solver interface is only available for "
+                    "the 'highs' solver, got '{0}'.".format(solver))
+            self._solver_interface = matrix.HighsInterface(
+                self, options=solver_cmdline_options,
+                tee=solve_kwargs.get('tee', False), warmstart=start,
+                presolve=presolve)
+            solver_results = self._solver_interface.solve()
+        elif kwargs.get('native_writer', False) or presolve:
+            self._solver_interface = matrix.FileInterface(
+                self, solver, file_format=solver_io,
+                options=solver_cmdline_options, solve_kwargs=solve_kwargs,
+                warmstart=start, presolve=presolve)
+            solver_results = self._solver_interface.solve()
+        else:
+            opt = SolverFactory(solver, solver_io=solver_io)
+            # set command line options
+            options = opt.options
+            for k in solver_cmdline_options:
+                options[k] = solver_cmdline_options[k]
+
+            if start:
+                if opt.warm_start_capable():
+                    solve_kwargs.setdefault('warmstart', True)
+                else:
+                    logging.warning(
+                        "The solver '{0}' does not support warm starts with "
+                        "solver_io='{1}', the start values are ignored."
+                        .format(solver, solver_io))
+            solver_results = opt.solve(self, **solve_kwargs)
+
+        return self._process_solver_results(solver_results)
+
+    def _solver_metrics(self, measurement, solver_results):
+        """ Adds the status, the solver time and the objective of the
+        solver results to the `measurement` of the solve (see
+        :mod:`oemof.solph.instrumentation`).
+        """
+        if measurement is None:
+            return
+        measurement.stop()
+        solver = solver_results['Solver'][0]
+        measurement.labels['status'] = str(solver['Status'])
+        measurement.labels['termination_condition'] = str(
+            solver['Termination condition'])
+        for key in ['Wallclock time', 'Time', 'User time']:
+            seconds = getattr(solver.get(key), 'value', None)
+            if isinstance(seconds, Number):
+                measurement.metrics['solver_time_seconds'] = seconds
+                break
+        objective = po.value(self.objective, exception=False)
+        if isinstance(objective, Number):
+            measurement.metrics['objective'] = objective
+
+    def _process_solver_results(self, solver_results):
+        """ Checks the status of the solver results and stores them."""
         status = solver_results["Solver"][0]["Status"]
         termination_condition = (
             solver_results["Solver"][0]["Termination condition"])
@@ -221,6 +458,32 @@ class BaseModel(po.ConcreteModel):
 
         return solver_results
 
+    def resolve(self):
+        """ Solves the model again with the solver settings of the last call
+        of :meth:`solve`, e.g. after :meth:`Model.update_parameters`.
+
+        If the model was solved with `solver_io="memory"`, the changed
+        objective coefficients and bounds are passed to the existing solver
+        instance, which starts from the basis of the previous solution.
+        With `native_writer=True`, the matrix of the problem is reused.
+        Otherwise the model is passed to the solver as a whole.
+        """
+        if self._solve_settings is None:
+            raise ValueError("The model has to be solved with `solve()` "
+                             "before it can be resolved.")
+        solver, solver_io, kwargs = self._solve_settings
+        if self._solver_interface is None:
+            return self.solve(solver=solver, solver_io=solver_io, **kwargs)
+
+        with instrumentation.measure('solve', {
+                'model': self.name, 'solver': solver,
+                'solver_io': solver_io}) as measurement:
+            self._solver_interface.update()
+            solver_results = self._process_solver_results(
+                self._solver_interface.solve())
+            self._solver_metrics(measurement, solver_results)
+        return solver_results
+
     def relax_problem(self):
         """Relaxes integer variables to reals of optimization model self."""
         relaxer = RelaxIntegrality()
@@ -304,29 +567,310 @@ class Model(BaseModel):
         self.flow = po.Var(self.FLOWS, self.TIMESTEPS,
                            within=po.Reals)
 
-        for (o, i) in self.FLOWS:
-            if self.flows[o, i].nominal_value is not None:
-                if self.flows[o, i].fix[self.TIMESTEPS[1]] is not None:
-                    for t in self.TIMESTEPS:
-                        self.flow[o, i, t].value = (
-                            self.flows[o, i].fix[t] *
-                            self.flows[o, i].nominal_value)
-                        self.flow[o, i, t].fix()
+        length = len(self.TIMESTEPS)
+
+        # The var data is stored in the order of the index set (FLOWS x
+        # TIMESTEPS), so that the var data of each flow is a consecutive
+        # slice. This avoids hashing the (source, target, timestep) tuple
+        # for every single bound.
+        all_var_data = list(self.flow._data.values())
+
+        for n, (o, i) in enumerate(self.FLOWS):
+            self._set_flow_bounds(
+                o, i, all_var_data[n * length:(n + 1) * length])
+
+    def _set_flow_bounds(self, o, i, var_data):
+        """ Sets the bounds of the flow variable (or fixes it) for all time
+        steps of the flow from `o` to `i`.
+        """
+        flow = self.flows[o, i]
+        length = len(var_data)
+        if flow.nominal_value is not None:
+            if flow.fix[self.TIMESTEPS[1]] is not None:
+                values = (sequence_to_array(flow.fix, length) *
+                          flow.nominal_value)
+                _set_var_data(var_data, 'fix', values)
+            else:
+                _set_var_data(
+                    var_data, 'setub',
+                    sequence_to_array(flow.max, length) *
+                    flow.nominal_value)
+
+                if not flow.nonconvex:
+                    _set_var_data(
+                        var_data, 'setlb',
+                        sequence_to_array(flow.min, length) *
+                        flow.nominal_value)
+                elif (o, i) in self.UNIDIRECTIONAL_FLOWS:
+                    _set_var_data(var_data, 'setlb', 0)
+        else:
+            if (o, i) in self.UNIDIRECTIONAL_FLOWS:
+                _set_var_data(var_data, 'setlb', 0)
+
+    def update_parameters(self, flows):
+        """ Changes parameters of flows of the already built model.
+
+        The flow objects are updated and the bounds of the flow variable and
+        the objective function are set up again, so the model does not have
+        to be rebuilt for every scenario of a parameter sweep. Use
+        :meth:`resolve` to solve the updated model.
+
+        Parameters
+        ----------
+        flows : dict
+            New attributes of the flows keyed by `(source, target)`, e.g.
+            ``{(gas, pp): {'variable_costs': 40}}``. Possible attributes are
+            `variable_costs`, `fix`, `min`, `max` and `nominal_value`. Only
+            `variable_costs` can be changed for investment and nonconvex
+            flows. A new `nominal_value` is also used for the `summed_max`
+            and `summed_min` constraints and the gradient limits of the
+            flow, which is why it cannot be changed from or to None for
+            flows with these attributes.
+
+        Examples
+        --------
+        >>> om = Model(es)  # doctest: +SKIP
+        >>> om.solve(solver='highs', solver_io='memory')  # doctest: +SKIP
+        >>> for costs in [20, 30, 40]:  # doctest: +SKIP
+        ...     om.update_parameters({(gas, pp): {'variable_costs': costs}})
+        ...     om.resolve()
+        """
+        update_objective = False
+        for (o, i), attributes in flows.items():
+            flow = self.flows[o, i]
+            for attribute in attributes:
+                if attribute not in UPDATABLE_FLOW_ATTRIBUTES:
+                    raise ValueError(
+                        "The attribute `{0}` of a flow cannot be updated. "
+                        "Possible attributes are: {1}".format(
+                            attribute, UPDATABLE_FLOW_ATTRIBUTES))
+                if attribute != 'variable_costs' and (
+                        flow.investment or flow.nonconvex):
+                    raise ValueError(
+                        "Only the variable_costs of investment and nonconvex "
+                        "flows can be updated, got `{0}` for flow {1}-{2}."
+                        .format(attribute, o, i))
+            if 'nominal_value' in attributes and _depends_on_nominal_value(
+                    flow) and (attributes['nominal_value'] is None) != (
+                        flow.nominal_value is None):
+                raise ValueError(
+                    "The nominal_value of flow {0}-{1} with summed_max, "
+                    "summed_min or gradient limits can only be changed to "
+                    "another value, not from or to None.".format(o, i))
+
+            for attribute, value in attributes.items():
+                if attribute == 'nominal_value':
+                    flow.nominal_value = value
                 else:
-                    for t in self.TIMESTEPS:
-                        self.flow[o, i, t].setub(
-                            self.flows[o, i].max[t] *
-                            self.flows[o, i].nominal_value)
-
-                    if not self.flows[o, i].nonconvex:
-                        for t in self.TIMESTEPS:
-                            self.flow[o, i, t].setlb(
-                                self.flows[o, i].min[t] *
-                                self.flows[o, i].nominal_value)
-                    elif (o, i) in self.UNIDIRECTIONAL_FLOWS:
-                        for t in self.TIMESTEPS:
-                            self.flow[o, i, t].setlb(0)
+                    setattr(flow, attribute, sequence(value))
+            update_objective |= 'variable_costs' in attributes
+
+            if set(attributes) - {'variable_costs'}:
+                var_data = [self.flow[o, i, t] for t in self.TIMESTEPS]
+                for vd in var_data:
+                    vd.unfix()
+                    vd.setlb(None)
+                    vd.setub(None)
+                self._set_flow_bounds(o, i, var_data)
+
+            if 'nominal_value' in attributes:
+                self._update_flow_block(o, i)
+
+        if update_objective:
+            self._add_objective(sense=self.objective.sense, update=True)
+
+    def _update_flow_block(self, o, i):
+        """ Sets the right-hand sides of the summed_max and summed_min
+        constraints and the bounds of the gradient variables of the flow from
+        `o` to `i` in the `Flow` block again, as they depend on the
+        nominal_value of the flow.
+        """
+        block = self._blocks.get(blocks.Flow)
+        if block is None:
+            return
+        flow = self.flows[o, i]
+        if (o, i) in block.SUMMED_MAX_FLOWS:
+            constraint = block.summed_max[o, i]
+            constraint.set_value((None, constraint.body,
+                                  flow.summed_max * flow.nominal_value))
+        if (o, i) in block.SUMMED_MIN_FLOWS:
+            constraint = block.summed_min[o, i]
+            constraint.set_value((flow.summed_min * flow.nominal_value,
+                                  constraint.body, None))
+        if (o, i) in block.POSITIVE_GRADIENT_FLOWS:
+            for t in self.TIMESTEPS:
+                block.positive_gradient[o, i, t].setub(
+                    flow.positive_gradient['ub'][t] * flow.nominal_value)
+        if (o, i) in block.NEGATIVE_GRADIENT_FLOWS:
+            for t in self.TIMESTEPS:
+                block.negative_gradient[o, i, t].setub(
+                    flow.negative_gradient['ub'][t] * flow.nominal_value)
+
+    def add_nodes(self, *nodes):
+        """ Adds nodes to the energy system and to the already built model.
+
+        The sets of nodes and flows and the flow variable are extended by the
+        new nodes and flows. The blocks of constraint groups with new members
+        (e.g. a new transformer) or members with new flows (e.g. the bus of a
+        new sink) are extended: the `Bus` and `Transformer` blocks add and
+        replace the constraints of these members in place (by their `_add`
+        method), other blocks (e.g. the storage block) are created again for
+        their whole group. Blocks with constraints referring to variables of
+        a block created again (e.g. the investment storage block, which
+        refers to the investment variables of the `InvestmentFlow` block) are
+        created again as well. At last, the objective is set up again.
+
+        Constraints added to the model by the user, which refer to variables
+        of a block created again (e.g. the investment variables used by
+        :func:`~oemof.solph.constraints.investment_limit`), have to be added
+        again.
+
+        Parameters
+        ----------
+        nodes : Node
+            New nodes. Their flows connect them to nodes of the energy system
+            or to other new nodes.
+
+        Examples
+        --------
+        >>> om = Model(es)  # doctest: +SKIP
+        >>> om.add_nodes(Sink(label='new_demand', inputs={  # doctest: +SKIP
+        ...     bel: Flow(nominal_value=5, fix=profile)}))
+        >>> om.solve(solver='cbc')  # doctest: +SKIP
+        """
+        known = set(self.es.nodes)
+        for n in nodes:
+            if n in known:
+                raise ValueError(
+                    "Node {0} is already part of the energy system.".format(
+                        n))
+        known.update(nodes)
+        for n in nodes:
+            for neighbour in itertools.chain(n.inputs, n.outputs):
+                if neighbour not in known:
+                    raise ValueError(
+                        "Node {0} is connected to node {1}, which is not "
+                        "part of the energy system.".format(n, neighbour))
+
+        previous = {g: set(self.es.groups.get(g) or ())
+                    for g in self._constraint_groups}
+        self.es.add(*nodes)
+        groups = self.es.groups
+
+        flows = self.es.flows()
+        new_flows = [k for k in flows if k not in self.flows]
+        self.flows = flows
+        for n in nodes:
+            self.NODES.add(n)
+        for o, i in new_flows:
+            self.FLOWS.add((o, i))
+            if hasattr(flows[o, i], 'bidirectional'):
+                self.BIDIRECTIONAL_FLOWS.add((o, i))
             else:
-                if (o, i) in self.UNIDIRECTIONAL_FLOWS:
-                    for t in self.TIMESTEPS:
-                        self.flow[o, i, t].setlb(0)
+                self.UNIDIRECTIONAL_FLOWS.add((o, i))
+            self._set_flow_bounds(
+                o, i, [self.flow[o, i, t] for t in self.TIMESTEPS])
+
+        self._constraint_groups += [g for g in groups
+                                    if hasattr(g, 'CONSTRAINT_GROUP') and
+                                    g not in self._constraint_groups]
+        endpoints = {n for k in new_flows for n in k}
+        extended = {}
+        recreated = set()
+        for g in self._constraint_groups:
+            group = groups.get(g)
+            if not group:
+                continue
+            old = previous.get(g)
+            if not old or g not in self._blocks:
+                # new constraint group or block created without members
+                recreated.add(g)
+                continue
+            changed = [x for x in group if x not in old or x in endpoints]
+            if not changed:
+                continue
+            if hasattr(self._blocks[g], '_add'):
+                extended[g] = changed
+            else:
+                recreated.add(g)
+
+        # blocks referring to variables of a block created again (e.g. the
+        # investment storage block to the investment variables of the
+        # InvestmentFlow block) have to be created again as well
+        others = [g for g in self._constraint_groups
+                  if g in self._blocks and g not in recreated]
+        replaced = [self._blocks[g] for g in recreated if g in self._blocks]
+        while replaced:
+            dependent = [g for g in others
+                         if _refers_to(self._blocks[g], replaced)]
+            recreated.update(dependent)
+            others = [g for g in others if g not in dependent]
+            replaced = [self._blocks[g] for g in dependent]
+
+        for g in self._constraint_groups:
+            if g in recreated:
+                if g in self._blocks:
+                    self.del_component(self._blocks[g])
+                self._add_child_block(g)
+            elif g in extended:
+                block = self._blocks[g]
+                with self._measure(str(block), 'block', block):
+                    block._add(groups[g], extended[g])
+
+        self._solver_interface = None
+        self._add_objective(sense=self.objective.sense, update=True)
+
+
+@contextmanager
+def _not_measured():
+    yield
+
+
+def _refers_to(block, blocks):
+    """ Returns True if a constraint or an expression of `block` contains a
+    variable of one of the `blocks`.
+    """
+    ids = {id(b) for b in blocks}
+    if not ids:
+        return False
+    for data in block.component_data_objects(
+            (po.Constraint, po.Expression), descend_into=True):
+        expr = data.body if hasattr(data, 'body') else data.expr
+        for var in identify_variables(expr):
+            parent = var.parent_block()
+            while parent is not None:
+                if id(parent) in ids:
+                    return True
+                parent = parent.parent_block()
+    return False
+
+
+def _depends_on_nominal_value(flow):
+    """ Returns True if constraints of the `Flow` block other than the
+    bounds of the flow variable depend on the nominal_value of `flow`.
+    """
+    return (flow.summed_max is not None or flow.summed_min is not None or
+            flow.positive_gradient['ub'][0] is not None or
+            flow.negative_gradient['ub'][0] is not None)
+
+
+def _set_var_data(var_data, method, values):
+    """ Calls `method` of all var data objects with the matching value.
+
+    Parameters
+    ----------
+    var_data : list
+        List of pyomo var data objects, e.g. all time steps of one flow.
+    method : str
+        Name of the var data method: 'setub', 'setlb' or 'fix'.
+    values : numpy.ndarray or numeric
+        One value per var data object or a scalar for all of them.
+        Arrays are converted to python numbers first, so that the bounds are
+        of the same type as if they were calculated element by element.
+    """
+    if isinstance(values, np.ndarray):
+        values = values.tolist()
+    else:
+        values = [values] * len(var_data)
+    for vd, value in zip(var_data, values):
+        getattr(vd, method)(value)
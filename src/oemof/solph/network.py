@@ -17,11 +17,14 @@ SPDX-License-Identifier: MIT
 
 """
 
+import logging
+import os
 from warnings import warn
 
 import oemof.network.energy_system as es
 import oemof.network.network as on
 from oemof.solph import blocks
+from oemof.solph import snapshot
 from oemof.solph.plumbing import sequence
 from oemof.tools import debugging
 
@@ -51,6 +54,43 @@ class EnergySystem(es.EnergySystem):
 
         super().__init__(**kwargs)
 
+    def dump(self, dpath=None, filename=None):
+        r""" Dump an EnergySystem instance.
+
+        If `filename` ends with '.npz', a snapshot is written (see
+        :mod:`oemof.solph.snapshot`), which stores the sequences and results
+        as arrays and can be read with other versions of python. Otherwise
+        the attributes are pickled.
+        """
+        if filename is None or not filename.endswith(snapshot.SUFFIX):
+            return super().dump(dpath=dpath, filename=filename)
+        if dpath is None:
+            dpath = os.path.join(os.path.expanduser('~'), '.oemof', 'dumps')
+            os.makedirs(dpath, exist_ok=True)
+        path = os.path.join(dpath, filename)
+        snapshot.write_snapshot(self, path)
+        msg = "Attributes dumped to: {0}".format(path)
+        logging.debug(msg)
+        return msg
+
+    def restore(self, dpath=None, filename=None):
+        r""" Restore an EnergySystem instance.
+
+        Snapshots (filenames ending with '.npz') are read lazily, the arrays
+        are memory-mapped, see :func:`oemof.solph.snapshot.read_snapshot`.
+        """
+        if filename is None or not filename.endswith(snapshot.SUFFIX):
+            return super().restore(dpath=dpath, filename=filename)
+        if dpath is None:
+            dpath = os.path.join(os.path.expanduser('~'), '.oemof', 'dumps')
+        path = os.path.join(dpath, filename)
+        logging.info("Restoring attributes will overwrite existing "
+                     "attributes.")
+        snapshot.read_snapshot(path, energysystem=self)
+        msg = "Attributes restored from: {0}".format(path)
+        logging.debug(msg)
+        return msg
+
 
 class Flow(on.Edge):
     r""" Defines a flow between two nodes.
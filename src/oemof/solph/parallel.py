@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""Compute the coefficients of the blocks in parallel worker processes.
+
+Blocks, which separate the calculation of their coefficients from the
+creation of the pyomo components, have a static method
+``_coefficients(group, timeincrement)``. It gets nodes of the block and the
+time increment of every time step as numpy array and returns picklable
+coefficient data (e.g. numpy arrays) for every node, in the order of the
+nodes. ``_create(group, coefficients=...)`` uses this data instead of
+calculating it. These blocks are
+:class:`~oemof.solph.blocks.Transformer`,
+:class:`~oemof.solph.components.GenericStorageBlock` and
+:class:`~oemof.solph.components.GenericCHPBlock`.
+
+:func:`block_coefficients` splits the groups of these blocks into chunks of
+nodes, which are computed by a pool of worker processes. The workers get the
+groups of the energy system once, when they are started: with the `fork`
+start method (default on linux) they share the memory of the main process
+copy-on-write, otherwise the groups are pickled once per worker. Only the
+coefficients are sent back. The pyomo components are created in the main
+process from the same coefficients as in a serial build, so the model is
+identical.
+
+SPDX-License-Identifier: MIT
+
+"""
+import multiprocessing
+import os
+
+# groups and time increment of a worker process
+_GROUPS = None
+_TIMEINCREMENT = None
+
+
+def _initialize(groups, timeincrement):
+    """Stores the groups of the energy system in a worker process."""
+    global _GROUPS, _TIMEINCREMENT
+    _GROUPS = groups
+    _TIMEINCREMENT = timeincrement
+
+
+def _compute(block, start, stop):
+    """Coefficients of the nodes `start:stop` of the group of `block`."""
+    return block._coefficients(_GROUPS[block][start:stop], _TIMEINCREMENT)
+
+
+def parallel_blocks(groups):
+    """Blocks of `groups` with nodes, whose coefficients can be computed by
+    worker processes.
+    """
+    return [b for b, g in groups.items()
+            if hasattr(b, '_coefficients') and g]
+
+
+def block_coefficients(groups, timeincrement, processes=None,
+                       chunksize=None):
+    """
+    Compute the coefficients of the blocks in a pool of worker processes.
+
+    Parameters
+    ----------
+    groups : dict
+        Nodes of every block, e.g. the `groups` of the energy system. Blocks
+        without a `_coefficients` method are ignored.
+    timeincrement : numpy.ndarray
+        Time increment of every time step.
+    processes : int
+        Number of worker processes. Defaults to the number of CPUs.
+    chunksize : int
+        Number of nodes computed by a worker at once. By default, the nodes
+        are split into about four chunks per worker.
+
+    Returns
+    -------
+    dict : {block: list of the coefficients of every node of the group}
+
+    Examples
+    --------
+    >>> coefficients = block_coefficients(
+    ...     es.groups, np.ones(8760), processes=4)  # doctest: +SKIP
+    >>> len(coefficients[Transformer]) == len(es.groups[Transformer])
+    ...  # doctest: +SKIP
+    True
+    """
+    groups = {b: list(groups[b]) for b in parallel_blocks(groups)}
+    if not groups:
+        return {}
+    processes = processes or os.cpu_count() or 1
+    if chunksize is None:
+        total = sum(len(g) for g in groups.values())
+        chunksize = max(1, -(-total // (4 * processes)))
+
+    tasks = [(b, start, start + chunksize)
+             for b, g in groups.items()
+             for start in range(0, len(g), chunksize)]
+    with multiprocessing.Pool(min(processes, len(tasks)), _initialize,
+                              (groups, timeincrement)) as pool:
+        chunks = pool.starmap(_compute, tasks)
+
+    coefficients = {b: [] for b in groups}
+    for (b, _, _), chunk in zip(tasks, chunks):
+        coefficients[b].extend(chunk)
+    return coefficients
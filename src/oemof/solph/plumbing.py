@@ -11,15 +11,20 @@ SPDX-License-Identifier: MIT
 
 """
 
-from collections import UserList
 from collections import abc
 from itertools import repeat
 
+import numpy as np
+from pyomo.core.expr.numeric_expr import LinearExpression
+from pyomo.core.expr.numvalue import native_numeric_types
+
 
 def sequence(iterable_or_scalar):
     """ Tests if an object is iterable (except string) or scalar and returns
-    a the original sequence if object is an iterable and a 'emulated' sequence
-    object of class _Sequence if object is a scalar or string.
+    a :class:`_Sequence`: an array-backed sequence if the object is a
+    one-dimensional iterable and a constant sequence if the object is a
+    scalar or string. Other iterables (e.g. nested lists or dictionaries)
+    are returned unchanged.
 
     Parameters
     ----------
@@ -29,6 +34,8 @@ def sequence(iterable_or_scalar):
     --------
     >>> sequence([1,2])
     [1, 2]
+    >>> sequence([1,2]).values
+    array([1, 2])
 
     >>> x = sequence(10)
     >>> x[0]
@@ -40,22 +47,109 @@ def sequence(iterable_or_scalar):
     [10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10]
 
     """
-    if (isinstance(iterable_or_scalar, abc.Iterable) and not
-            isinstance(iterable_or_scalar, str)):
+    if isinstance(iterable_or_scalar, _Sequence):
         return iterable_or_scalar
+    elif (isinstance(iterable_or_scalar, abc.Iterable) and not
+            isinstance(iterable_or_scalar, str)):
+        if isinstance(iterable_or_scalar, abc.Mapping):
+            return iterable_or_scalar
+        values = np.asarray(list(iterable_or_scalar)
+                            if isinstance(iterable_or_scalar, abc.Iterator)
+                            else iterable_or_scalar)
+        if values.ndim != 1:
+            return iterable_or_scalar
+        return _Sequence(values)
     else:
         return _Sequence(default=iterable_or_scalar)
 
 
-class _Sequence(UserList):
-    """ Emulates a list whose length is not known in advance.
+def sequence_to_array(iterable_or_scalar, length):
+    """ Returns the first `length` values of a sequence as a numpy array.
+
+    Scalars and constant :class:`_Sequence` objects are broadcast to the
+    given length without indexing them element by element. Array-backed
+    sequences return a view of their array, other iterables (lists, arrays,
+    pandas Series, ...) are converted positionally.
 
     Parameters
     ----------
-    source:
-    default:
+    iterable_or_scalar : iterable or None or int or float
+    length : int
+        Number of values to return, e.g. the number of time steps.
+
+    Examples
+    --------
+    >>> sequence_to_array(sequence(3), 4)
+    array([3, 3, 3, 3])
+
+    >>> sequence_to_array([1, 2.5, 3, 4, 5], 3)
+    array([1. , 2.5, 3. ])
+
+    """
+    seq = sequence(iterable_or_scalar)
+    if isinstance(seq, _Sequence) and seq.constant:
+        # mimic the element-wise access to keep `len()` of the sequence
+        seq.highest_index = max(seq.highest_index, length - 1)
+        return np.full(length, seq.default)
+    values = seq.values if isinstance(seq, _Sequence) else np.asarray(seq)
+    if len(values) < length:
+        raise IndexError(
+            "Sequence of length {0} is shorter than the required length "
+            "{1}.".format(len(values), length))
+    return values[:length]
+
+
+def linear_expression(coefficients, variables, constant=0):
+    """ Returns a flat linear pyomo expression of the given terms.
+
+    The expression is created in one step from the lists of coefficients and
+    variables instead of adding up the terms one by one, which creates a
+    deeply nested expression tree for many terms. Terms with a coefficient of
+    zero are dropped, as pyomo does when a variable is multiplied by zero.
+
+    Parameters
+    ----------
+    coefficients : iterable
+        Coefficient of every variable (numbers or fixed pyomo expressions).
+    variables : iterable
+        Pyomo variables, in the order of `coefficients`.
+    constant : int or float
+
+    Examples
+    --------
+    >>> from pyomo.environ import ConcreteModel, Var
+    >>> m = ConcreteModel()
+    >>> m.x = Var([1, 2])
+    >>> print(linear_expression([2, 0, 3], [m.x[1], m.x[2], m.x[1]]))
+    2*x[1] + 3*x[1]
+
+    """
+    terms = [(c, v) for c, v in zip(coefficients, variables)
+             if not (c.__class__ in native_numeric_types and c == 0)]
+    return LinearExpression(constant=constant,
+                            linear_coefs=[c for c, v in terms],
+                            linear_vars=[v for c, v in terms])
 
 
+class _Sequence:
+    """ A sequence backed by a numpy array or a constant.
+
+    If `values` are given, the sequence wraps them as a one-dimensional
+    numpy array (array mode). Indexing returns python scalars, so that the
+    values can be used in pyomo expressions, while :attr:`values` gives
+    the whole array at once.
+
+    Otherwise the sequence emulates a list of `default` values whose length
+    is not known in advance (constant mode). Nothing is allocated, the
+    length is the highest index accessed so far.
+
+    Parameters
+    ----------
+    values : iterable
+        Values of the sequence.
+    default :
+        Value of every element of a constant sequence.
+
     Examples
     --------
     >>> s = _Sequence(default=42)
@@ -72,26 +166,70 @@ class _Sequence(UserList):
     >>> s[8]
     42
 
+    >>> s = _Sequence([1.5, 2, 3])
+    >>> s[1]
+    2.0
+    >>> len(s)
+    3
+    >>> s.values
+    array([1.5, 2. , 3. ])
 
     """
-    def __init__(self, *args, **kwargs):
-        self.default = kwargs["default"]
-        self.default_changed = False
+    # array of an array-backed sequence, None for a constant sequence
+    values = None
+
+    def __init__(self, values=None, default=None):
+        self.default = default
+        self.default_changed = values is not None
         self.highest_index = -1
-        super().__init__(*args)
+        if values is not None:
+            self.values = np.asarray(values)
+            if self.values.ndim != 1:
+                raise ValueError(
+                    "A sequence must be one-dimensional, got an array of "
+                    "shape {0}.".format(self.values.shape))
+            self.highest_index = len(self.values) - 1
+
+    @property
+    def constant(self):
+        """True if all elements are the `default` value."""
+        return self.values is None
 
     def __getitem__(self, key):
-        self.highest_index = max(self.highest_index, key)
-        return self.default
-
-    def __init_list(self):
-        self.data = [self.default] * (self.highest_index + 1)
+        if self.values is None:
+            self.highest_index = max(self.highest_index, key)
+            return self.default
+        if isinstance(key, slice):
+            return self.values[key]
+        return self.values.item(key)
+
+    def __setitem__(self, key, value):
+        if self.values is None:
+            raise TypeError("The elements of a constant sequence can not be "
+                            "set.")
+        self.values[key] = value
+
+    def __array__(self, dtype=None):
+        if self.values is None:
+            return np.full(self.highest_index + 1, self.default, dtype=dtype)
+        return np.asarray(self.values, dtype=dtype)
+
+    def __eq__(self, other):
+        if not isinstance(other, abc.Iterable) or isinstance(other, str):
+            return NotImplemented
+        return list(self) == list(other)
+
+    __hash__ = None
 
     def __repr__(self):
         return str([i for i in self])
 
     def __len__(self):
-        return max(len(self.data), self.highest_index + 1)
+        if self.values is None:
+            return self.highest_index + 1
+        return len(self.values)
 
     def __iter__(self):
-        return repeat(self.default, self.highest_index + 1)
+        if self.values is None:
+            return repeat(self.default, self.highest_index + 1)
+        return iter(self.values.tolist())
@@ -14,14 +14,25 @@ SPDX-License-Identifier: MIT
 
 """
 
-import sys
+import copy
+import json
+import os
+from collections.abc import Mapping
 from itertools import groupby
 
+import numpy as np
 import pandas as pd
 from oemof.network.network import Node
+from oemof.solph import instrumentation
 from oemof.solph.helpers import flatten
 from pyomo.core.base.var import Var
 
+# file formats of write_results() and their suffix
+RESULT_FILE_FORMATS = {'parquet': '.parquet', 'feather': '.feather'}
+
+# name of the file describing the files written by write_results()
+RESULT_MANIFEST = 'results.json'
+
 
 def get_tuple(x):
     """
@@ -105,60 +116,553 @@ def create_dataframe(om):
     return df
 
 
-def results(om):
+def _oemof_tuple_and_timestep(block_name, var_name, index):
+    """
+    Get the oemof tuple and the timestep of a pyomo variable index.
+
+    This is the combination of :func:`get_tuple`, :func:`get_timestep` and
+    :func:`remove_timestep` for a single pyomo tuple
+    `(block_name, var_name, index)`.
+    """
+    if isinstance(index, tuple):
+        oemof_tuple = index
+    elif isinstance(index, Node):
+        oemof_tuple = index,
+    else:
+        # for standalone variables, the pyomo tuple is the identifying tuple
+        oemof_tuple = (block_name, var_name, index)
+
+    if (isinstance(oemof_tuple[-1], Node) and
+            all(isinstance(n, Node) for n in oemof_tuple)):
+        return oemof_tuple, 0
+    else:
+        return oemof_tuple[:-1], oemof_tuple[-1]
+
+
+def _extract_var_arrays(om):
+    """
+    Read the values of all pyomo variables into numpy arrays.
+
+    For every variable a two dimensional array (oemof tuples x timesteps) is
+    filled. Variables which are not indexed by the timesteps of the model
+    (e.g. standalone variables) are stored as dictionaries keyed by their
+    timestep index instead. Variables indexed by two timesteps (e.g. the
+    load shift `dsm_do[g, t, tt]` of the SinkDSMDelayBlock) only exist for
+    some pairs of timesteps. They are stored as a tuple of the timesteps and
+    the values of every oemof tuple `(g, t)`.
+
+    Returns
+    -------
+    dict : {oemof tuple: {variable name: numpy.ndarray, dict or tuple}}
+    """
+    length = len(om.es.timeindex)
+    extracted = {}
+
+    for bv in om.component_objects(Var):
+        var_name, variables = _var_arrays(bv, length)
+        for oemof_tuple, values in variables.items():
+            extracted.setdefault(oemof_tuple, {})[var_name] = values
+
+    return extracted
+
+
+def _var_arrays(bv, length):
+    """
+    Read the values of a single pyomo variable (see
+    :func:`_extract_var_arrays`).
+
+    Returns
+    -------
+    tuple : (variable name, {oemof tuple: numpy.ndarray, dict or tuple})
+    """
+    block_name = str(bv).split('.')[0]
+    var_name = str(bv).split('.')[-1]
+
+    rows = {}
+    row_index = []
+    timesteps = []
+    values = []
+    for index, var_data in bv.items():
+        value = var_data.value
+        # drop empty decision variables
+        if value is None:
+            continue
+        oemof_tuple, timestep = _oemof_tuple_and_timestep(
+            block_name, var_name, index)
+        row_index.append(rows.setdefault(oemof_tuple, len(rows)))
+        timesteps.append(timestep)
+        values.append(value)
+
+    variables = {}
+    in_range = all(isinstance(t, int) and 0 <= t < length
+                   for t in timesteps)
+    if in_range and rows and all(isinstance(k[-1], int) for k in rows):
+        row_index = np.asarray(row_index)
+        order = np.argsort(row_index, kind='stable')
+        splits = np.flatnonzero(np.diff(row_index[order])) + 1
+        timesteps = np.split(np.asarray(timesteps)[order], splits)
+        values = np.split(np.asarray(values, dtype=float)[order], splits)
+        for oemof_tuple, t, v in zip(rows, timesteps, values):
+            variables[oemof_tuple] = (t, v)
+    elif in_range:
+        array = np.full((len(rows), length), np.nan)
+        array[row_index, timesteps] = values
+        for oemof_tuple, row in rows.items():
+            variables[oemof_tuple] = array[row]
+    else:
+        row_tuples = list(rows)
+        for row, timestep, value in zip(row_index, timesteps, values):
+            variables.setdefault(row_tuples[row], {})[timestep] = value
+
+    return var_name, variables
+
+
+def _sorted_timesteps(timesteps):
+    """Sort timesteps as pandas does, i.e. with None at the end."""
+    try:
+        return sorted(timesteps, key=lambda t: (t is None, t))
+    except TypeError:
+        return list(timesteps)
+
+
+def _result_frames(timeindex, oemof_tuple, variables):
+    """
+    Create the 'scalars' and 'sequences' of a single result entry.
+
+    Parameters
+    ----------
+    timeindex : pandas.DatetimeIndex
+        Time index of the energy system.
+    oemof_tuple : tuple
+        Key of the result entry.
+    variables : dict
+        Values of all variables of the entry as returned by
+        :func:`_extract_var_arrays`.
+    """
+    length = len(timeindex)
+    names = sorted(variables)
+
+    # variables indexed by two timesteps are zero outside of their timesteps
+    variables = dict(variables)
+    for name, v in variables.items():
+        if isinstance(v, tuple):
+            variables[name] = np.zeros(length)
+            variables[name][v[0]] = v[1]
+
+    if any(isinstance(v, dict) for v in variables.values()):
+        # variables not indexed by the timesteps are ordered by their index
+        timesteps = set()
+        for v in variables.values():
+            timesteps.update(v if isinstance(v, dict) else
+                             np.flatnonzero(~np.isnan(v)).tolist())
+        timesteps = _sorted_timesteps(timesteps)
+        position = {t: n for n, t in enumerate(timesteps)}
+        array = np.full((len(names), len(timesteps)), np.nan)
+        for n, name in enumerate(names):
+            v = variables[name]
+            if isinstance(v, dict):
+                for t, value in v.items():
+                    array[n, position[t]] = value
+            else:
+                for t in np.flatnonzero(~np.isnan(v)):
+                    array[n, position[t]] = v[t]
+    else:
+        array = np.vstack([variables[name] for name in names])
+        # time steps without any value are dropped
+        array = array[:, ~np.isnan(array).all(axis=0)]
+
+    if array.shape[1] != length:
+        msg = ("Length mismatch: Expected axis has {0} elements, new values "
+               "have {1} elements\nFlow: {2}-{3}. This could be caused by "
+               "NaN-values in your input data.")
+        flow = oemof_tuple if len(oemof_tuple) > 1 else (oemof_tuple[0], None)
+        raise ValueError(msg.format(array.shape[1], length,
+                                    *[getattr(n, 'label', n) for n in flow]))
+
+    # variables with missing values in some time steps are scalars
+    condition = np.isnan(array).any(axis=1)
+    columns = pd.Index(names, name='variable_name')
+
+    complete = np.flatnonzero(~np.isnan(array[condition]).any(axis=0))
+    if complete.size == 0:
+        error_message = ('Cannot access index on result data. ' +
+                         'Did the optimization terminate' +
+                         ' without errors?')
+        raise IndexError(error_message)
+    scalars = pd.Series(array[condition, complete[0]],
+                        index=columns[condition],
+                        name=timeindex[complete[0]])
+    sequences = pd.DataFrame(array[~condition].T,
+                             index=timeindex,
+                             columns=columns[~condition])
+    return {'scalars': scalars, 'sequences': sequences}
+
+
+def _extract_duals(om):
+    """Get the dual values of the bus balances as lists keyed by the bus."""
+    duals = {}
+    if om.dual is not None:
+        grouped = groupby(sorted(om.Bus.balance.iterkeys()), lambda p: p[0])
+        for bus, timesteps in grouped:
+            duals[bus] = [om.dual[om.Bus.balance[bus, t]]
+                          for _, t in timesteps]
+    return duals
+
+
+class Results(Mapping):
+    """
+    Lazy result dictionary of a solved model.
+
+    The values of the pyomo variables (and the duals of the bus balances) are
+    read when the object is created, but the pandas objects of an entry are
+    only created when the entry is accessed for the first time. Afterwards
+    they are cached. Keys, values and order of the entries are the same as
+    in the dictionary returned by :func:`results`.
+
+    As the object does not hold a reference to the model, it does not change
+    if the model is solved again and it can be pickled.
+
+    Parameters
+    ----------
+    om : oemof.solph.Model
+        A solved Model.
+
+    Examples
+    --------
+    >>> results = Results(om)  # doctest: +SKIP
+    >>> results[(bus, None)]['sequences']  # doctest: +SKIP
+    """
+    def __init__(self, om):
+        self._timeindex = om.es.timeindex
+        self._variables = _extract_var_arrays(om)
+        self._duals = _extract_duals(om)
+        self._cache = {}
+
+        try:
+            oemof_tuples = sorted(self._variables)
+        except TypeError:
+            oemof_tuples = list(self._variables)
+
+        # map the keys of the results to the internal oemof tuples
+        self._keys = {k if len(k) > 1 else (k[0], None): k
+                      for k in oemof_tuples}
+        for bus in self._duals:
+            self._keys.setdefault((bus, None), (bus, None))
+
+    def __getitem__(self, key):
+        oemof_tuple = self._keys[key]
+        if oemof_tuple not in self._cache:
+            self._cache[oemof_tuple] = self._create_entry(oemof_tuple)
+        return self._cache[oemof_tuple]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __repr__(self):
+        return '<{0} with {1} entries ({2} materialized)>'.format(
+            type(self).__name__, len(self), len(self._cache))
+
+    def _create_entry(self, oemof_tuple):
+        if oemof_tuple in self._variables:
+            entry = _result_frames(self._timeindex, oemof_tuple,
+                                   self._variables[oemof_tuple])
+        else:
+            entry = {'sequences': pd.DataFrame(index=self._timeindex),
+                     'scalars': pd.Series(dtype=float)}
+
+        # add dual variables for bus constraints, the internal tuple of a
+        # bus with own variables (e.g. ElectricalBus) is `(bus,)`
+        if len(oemof_tuple) == 1 or oemof_tuple[1] is None:
+            duals = self._duals.get(oemof_tuple[0])
+            if duals is not None:
+                entry['sequences']['duals'] = duals
+        return entry
+
+    def rename_keys(self, func):
+        """
+        Return the results with the keys converted by `func`.
+
+        The new object shares the values (and the cache) with this object,
+        so no entry is materialized.
+        """
+        renamed = copy.copy(self)
+        renamed._keys = {func(k): v for k, v in self._keys.items()}
+        return renamed
+
+
+def results(om, lazy=False):
     """
-    Create a result dictionary from the result DataFrame.
+    Create a result dictionary from the values of the pyomo variables.
 
     Results from Pyomo are written into a dictionary of pandas objects where
     a Series holds all scalar values and a dataframe all sequences for nodes
     and flows.
     The dictionary is keyed by the nodes e.g. `results[idx]['scalars']`
     and flows e.g. `results[n, n]['sequences']`.
+
+    Parameters
+    ----------
+    om : oemof.solph.Model
+        A solved Model.
+    lazy : bool
+        If True a :class:`Results` object is returned which creates the
+        pandas objects of an entry only if it is accessed.
+
+    The time of the result processing is reported to the callbacks of the
+    `results` event (see :mod:`oemof.solph.instrumentation`).
     """
-    df = create_dataframe(om)
+    with instrumentation.measure('results', {'model': om.name}) as measurement:
+        result = Results(om)
+        if not lazy:
+            result = {k: result[k] for k in result}
+        if measurement is not None:
+            measurement.metrics['entries'] = len(result)
+    return result
 
-    # create a dict of dataframes keyed by oemof tuples
-    df_dict = {k if len(k) > 1 else (k[0], None):
-               v[['timestep', 'variable_name', 'value']]
-               for k, v in df.groupby('oemof_tuple')}
 
-    # create final result dictionary by splitting up the dataframes in the
-    # dataframe dict into a series for scalar data and dataframe for sequences
-    result = {}
-    for k in df_dict:
-        df_dict[k].set_index('timestep', inplace=True)
-        df_dict[k] = df_dict[k].pivot(columns='variable_name', values='value')
-        try:
-            df_dict[k].index = om.es.timeindex
-        except ValueError as e:
-            msg = ("\nFlow: {0}-{1}. This could be caused by NaN-values in"
-                   " your input data.")
-            raise type(e)(str(e) + msg.format(k[0].label, k[1].label)
-                          ).with_traceback(sys.exc_info()[2])
-        try:
-            condition = df_dict[k].isnull().any()
-            scalars = df_dict[k].loc[:, condition].dropna().iloc[0]
-            sequences = df_dict[k].loc[:, ~condition]
-            result[k] = {'scalars': scalars, 'sequences': sequences}
-        except IndexError:
-            error_message = ('Cannot access index on result data. ' +
-                             'Did the optimization terminate' +
-                             ' without errors?')
-            raise IndexError(error_message)
-
-    # add dual variables for bus constraints
-    if om.dual is not None:
-        grouped = groupby(sorted(om.Bus.balance.iterkeys()), lambda p: p[0])
-        for bus, timesteps in grouped:
-            duals = [om.dual[om.Bus.balance[bus, t]] for _, t in timesteps]
-            df = pd.DataFrame({'duals': duals}, index=om.es.timeindex)
-            if (bus, None) not in result.keys():
-                result[(bus, None)] = {
-                    'sequences': df, 'scalars': pd.Series(dtype=float)}
+def _result_key(oemof_tuple):
+    """Get the labels of the result key of an oemof tuple as strings."""
+    key = oemof_tuple if len(oemof_tuple) > 1 else (oemof_tuple[0], None)
+    if len(key) > 2:
+        raise ValueError("Only results keyed by one or two nodes can be "
+                         "written, got {0}.".format(key))
+    return tuple(None if n is None else str(n) for n in key)
+
+
+def _import_pyarrow():
+    """Import pyarrow on demand, as it is optional and slow to import."""
+    try:
+        import pyarrow
+        from pyarrow import feather
+        from pyarrow import parquet
+    except ImportError:
+        raise ImportError(
+            "Writing and reading result files needs the 'pyarrow' package.")
+    return pyarrow, feather, parquet
+
+
+def _write_frame(path, name, frame, file_format, index=True, **kwargs):
+    """Write a DataFrame to `path`/`name` and return the file name."""
+    pyarrow, feather, parquet = _import_pyarrow()
+    filename = name + RESULT_FILE_FORMATS[file_format]
+    table = pyarrow.Table.from_pandas(frame, preserve_index=index)
+    if file_format == 'parquet':
+        parquet.write_table(table, os.path.join(path, filename), **kwargs)
+    else:
+        feather.write_feather(table, os.path.join(path, filename), **kwargs)
+    return filename, table.schema.names
+
+
+def _write_sequences(path, name, variable, sequences, timeindex, file_format,
+                     **kwargs):
+    """
+    Write the sequences of a variable with one column per result key and
+    return the entry of the manifest.
+    """
+    keys = list(sequences)
+    if all(target is None for _, target in keys):
+        columns = pd.Index([source for source, _ in keys], name='node')
+    else:
+        columns = pd.MultiIndex.from_tuples(keys, names=['source', 'target'])
+    frame = pd.DataFrame(np.column_stack([sequences[k] for k in keys]),
+                         index=timeindex.rename('timestamp'),
+                         columns=columns)
+    filename, fields = _write_frame(path, name, frame, file_format, **kwargs)
+    # the data columns are followed by the index
+    return {'file': filename, 'variable': variable,
+            'columns': [[field, source, target] for field, (source, target)
+                        in zip(fields, keys)]}
+
+
+def write_results(om, path, file_format='parquet', **kwargs):
+    """
+    Write the results of a solved model to a directory of columnar files.
+
+    The values are written variable by variable while they are read from the
+    model, so only the values of one pyomo variable are held in memory at
+    once and no pandas objects of the whole results are created.
+
+    Every variable with sequences is written to a file named like the pyomo
+    variable (e.g. `flow.parquet` or
+    `GenericStorageBlock.storage_content.parquet`) with the time index
+    `timestamp` and one column per result key, i.e. `(source, target)` for
+    flows and the node for nodes. The duals of the bus balances are written
+    to `duals.parquet`, the scalars (e.g. investments) to `scalars.parquet`
+    with the columns `source`, `target`, `variable` and `value`. The
+    manifest `results.json` lists the files and their columns.
+
+    The files can be read with pandas or pyarrow (feather files can be
+    memory-mapped) or with :func:`read_results`, which returns the results
+    dictionary. `pyarrow` is an optional dependency.
+
+    Parameters
+    ----------
+    om : oemof.solph.Model
+        A solved Model.
+    path : str
+        Directory of the files. It is created if it does not exist.
+    file_format : str
+        'parquet' or 'feather'.
+    kwargs :
+        Passed to :func:`pyarrow.parquet.write_table` or
+        :func:`pyarrow.feather.write_feather`, e.g. `compression`.
+
+    Examples
+    --------
+    >>> write_results(om, 'results', compression='zstd')  # doctest: +SKIP
+    >>> results = read_results('results')  # doctest: +SKIP
+    >>> results[('gas', 'pp_gas')]['sequences']  # doctest: +SKIP
+    """
+    if file_format not in RESULT_FILE_FORMATS:
+        raise ValueError("Unknown file format '{0}', possible formats are: "
+                         "{1}".format(file_format, list(RESULT_FILE_FORMATS)))
+    _import_pyarrow()
+    os.makedirs(path, exist_ok=True)
+    timeindex = pd.Index(om.es.timeindex)
+    length = len(timeindex)
+
+    timeindex_file, _ = _write_frame(
+        path, 'timeindex', pd.DataFrame({'timestamp': timeindex}),
+        file_format, index=False, **kwargs)
+    manifest = {'format': file_format, 'timeindex': timeindex_file,
+                'freq': getattr(timeindex, 'freqstr', None),
+                'name': timeindex.name, 'sequences': []}
+    scalars = []
+
+    for bv in om.component_objects(Var):
+        variable, values = _var_arrays(bv, length)
+        sequences = {}
+        for oemof_tuple, v in values.items():
+            key = _result_key(oemof_tuple)
+            if isinstance(v, tuple):
+                # variables indexed by two timesteps are zero outside of
+                # their timesteps
+                array = np.zeros(length)
+                array[v[0]] = v[1]
+                sequences[key] = array
+            elif isinstance(v, dict):
+                # variables not indexed by the timesteps
+                scalars.append(key + (variable, v[_sorted_timesteps(v)[0]]))
+            elif np.isnan(v).any():
+                # variables with missing values in some time steps
+                scalars.append(key + (variable, v[~np.isnan(v)][0]))
             else:
-                result[(bus, None)]['sequences']['duals'] = duals
+                sequences[key] = v
+        if sequences:
+            manifest['sequences'].append(_write_sequences(
+                path, bv.name, variable, sequences, timeindex, file_format,
+                **kwargs))
 
-    return result
+    duals = {_result_key((bus,)): np.asarray(values, dtype=float)
+             for bus, values in _extract_duals(om).items()}
+    if duals:
+        manifest['sequences'].append(_write_sequences(
+            path, 'duals', 'duals', duals, timeindex, file_format, **kwargs))
+
+    manifest['scalars'], _ = _write_frame(
+        path, 'scalars', pd.DataFrame(
+            scalars, columns=['source', 'target', 'variable', 'value']),
+        file_format, index=False, **kwargs)
+
+    with open(os.path.join(path, RESULT_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+class StoredResults(Results):
+    """
+    Lazy result dictionary of the files written by :func:`write_results`.
+
+    The keys are tuples of the label strings, e.g. `('bel', 'demand')` for
+    flows and `('bel', None)` for nodes (as returned by
+    :func:`convert_keys_to_strings` with `keep_none_type=True`). The
+    columns of an entry are only read from the files when the entry is
+    accessed for the first time (feather files are memory-mapped).
+
+    Parameters
+    ----------
+    path : str
+        Directory of the files.
+    """
+    def __init__(self, path):
+        _import_pyarrow()
+        with open(os.path.join(path, RESULT_MANIFEST)) as f:
+            manifest = json.load(f)
+        self._path = path
+        self._format = manifest['format']
+        self._cache = {}
+
+        timeindex = self._read(manifest['timeindex']).column(
+            'timestamp').to_pandas()
+        if manifest['freq'] is not None:
+            timeindex = pd.DatetimeIndex(timeindex, freq=manifest['freq'])
+        self._timeindex = pd.Index(timeindex).rename(manifest['name'])
+
+        # (variable, file, column) of the sequences of every key
+        self._columns = {}
+        for entry in manifest['sequences']:
+            for field, source, target in entry['columns']:
+                self._columns.setdefault((source, target), []).append(
+                    (entry['variable'], entry['file'], field))
+
+        self._scalars = {}
+        scalars = self._read(manifest['scalars']).to_pandas()
+        for source, target, variable, value in scalars.itertuples(
+                index=False):
+            self._scalars.setdefault((source, target), {})[variable] = value
+
+        keys = sorted(set(self._columns) | set(self._scalars),
+                      key=lambda k: [(n is None, n or '') for n in k])
+        self._keys = {k: k for k in keys}
+
+    def _read(self, filename, columns=None):
+        """Read (the given columns of) a file as `pyarrow.Table`."""
+        _, feather, parquet = _import_pyarrow()
+        filename = os.path.join(self._path, filename)
+        if self._format == 'parquet':
+            return parquet.read_table(filename, columns=columns)
+        return feather.read_table(filename, columns=columns,
+                                  memory_map=True)
+
+    def _create_entry(self, key):
+        columns = sorted(self._columns.get(key, []))
+        data = {variable: self._read(filename, [field]).column(0).to_numpy()
+                for variable, filename, field in columns}
+        duals = data.pop('duals', None)
+
+        scalars = self._scalars.get(key, {})
+        if data or scalars:
+            names = sorted(scalars)
+            entry = {
+                'scalars': pd.Series(
+                    [scalars[n] for n in names], dtype=float,
+                    index=pd.Index(names, name='variable_name'),
+                    name=self._timeindex[0]),
+                'sequences': pd.DataFrame(
+                    data, index=self._timeindex,
+                    columns=pd.Index(sorted(data), name='variable_name'))}
+        else:
+            entry = {'sequences': pd.DataFrame(index=self._timeindex),
+                     'scalars': pd.Series(dtype=float)}
+        if duals is not None:
+            entry['sequences']['duals'] = duals
+        return entry
+
+
+def read_results(path):
+    """
+    Read the results written by :func:`write_results` lazily.
+
+    Returns
+    -------
+    StoredResults : results dictionary keyed by label strings
+    """
+    return StoredResults(path)
 
 
 def convert_keys_to_strings(result, keep_none_type=False):
@@ -170,20 +674,17 @@ def convert_keys_to_strings(result, keep_none_type=False):
     e.g. results[('pp1','bus1')].
     """
     if keep_none_type:
-        converted = {
-            tuple([str(e) if e is not None else None for e in k])
-            if isinstance(k, tuple)
-            else str(k) if k is not None else None: v
-            for k, v in result.items()
-        }
+        def convert(k):
+            return (tuple([str(e) if e is not None else None for e in k])
+                    if isinstance(k, tuple)
+                    else str(k) if k is not None else None)
     else:
-        converted = {
-            tuple(map(str, k))
-            if isinstance(k, tuple)
-            else str(k): v
-            for k, v in result.items()
-        }
-    return converted
+        def convert(k):
+            return tuple(map(str, k)) if isinstance(k, tuple) else str(k)
+
+    if isinstance(result, Results):
+        return result.rename_keys(convert)
+    return {convert(k): v for k, v in result.items()}
 
 
 def meta_results(om, undefined=False):
@@ -203,7 +704,12 @@ def meta_results(om, undefined=False):
     -------
     dict
     """
-    meta_res = {'objective': om.objective()}
+    objective = om.objective(exception=False)
+    if objective is None:
+        raise ValueError("The objective has no value. Variables of the "
+                         "model have no value, e.g. as the model is "
+                         "infeasible or has not been solved.")
+    meta_res = {'objective': objective}
 
     for k1 in ['Problem', 'Solver']:
         k1 = k1.lower()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+"""Profiling of the model build.
+
+SPDX-License-Identifier: MIT
+
+"""
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from pyomo.core import Constraint
+from pyomo.core import Var
+from pyomo.core.expr.current import identify_variables
+from pyomo.core.expr.numeric_expr import LinearExpression
+
+
+def count_components(block, descend_into=True):
+    """
+    Count the variables and constraints of a pyomo block.
+
+    Returns
+    -------
+    tuple : (number of variables, number of constraints)
+    """
+    variables = sum(len(v) for v in block.component_objects(
+        Var, descend_into=descend_into))
+    constraints = sum(len(c) for c in block.component_objects(
+        Constraint, descend_into=descend_into))
+    return variables, constraints
+
+
+def count_nonzeros(block, descend_into=True):
+    """
+    Count the nonzeros of the constraint matrix of a pyomo block, i.e. the
+    variables of all active constraints. Flat linear expressions (see
+    :func:`~oemof.solph.plumbing.linear_expression`) are read without
+    walking the expression. Fixed variables are counted as well, as in
+    :class:`~oemof.solph.matrix.LinearProblem`.
+    """
+    nonzeros = 0
+    for c in block.component_data_objects(
+            Constraint, active=True, descend_into=descend_into):
+        body = c.body
+        if body.__class__ is LinearExpression:
+            nonzeros += len(set(map(id, body.linear_vars)))
+        else:
+            nonzeros += sum(1 for _ in identify_variables(body))
+    return nonzeros
+
+
+class BuildProfile:
+    """
+    Time, number of variables and constraints and memory of every step of the
+    model build.
+
+    Every entry of :attr:`entries` is a dictionary with the keys
+
+    * `name`: name of the phase or block
+    * `kind`: 'phase' (a phase of `BaseModel._construct`), 'block' (the
+      `_create` method of a block including its BuildActions),
+      'parallel' (the coefficients of the blocks computed by worker
+      processes, see :mod:`oemof.solph.parallel`) or 'objective' (the
+      `_objective_expression` of a block)
+    * `time`: wall time in seconds
+    * `variables`, `constraints`: number of variables and constraints added
+    * `memory`: memory allocated by python in bytes (traced by
+      :mod:`tracemalloc`) and `memory_peak`, the peak during the step
+      (python >= 3.9)
+
+    Parameters
+    ----------
+    trace_memory : bool
+        Trace the memory allocations. This slows down the build.
+
+    Examples
+    --------
+    >>> om = Model(es, profile=True)  # doctest: +SKIP
+    >>> print(om.build_profile)  # doctest: +SKIP
+    >>> om.build_profile.to_json('build_profile.json')  # doctest: +SKIP
+    """
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.entries = []
+
+    def start(self):
+        """Start tracing the memory allocations (if enabled)."""
+        self._started_tracing = (self.trace_memory and
+                                 not tracemalloc.is_tracing())
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def stop(self):
+        """Stop tracing the memory allocations started by :meth:`start`."""
+        if getattr(self, '_started_tracing', False):
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def measure(self, name, kind, block):
+        """
+        Measure a step of the build.
+
+        The variables and constraints added by the step are counted as the
+        difference of the components of `block` before and after the step.
+        """
+        counts = count_components(block)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {'name': name, 'kind': kind,
+                     'time': time.perf_counter() - start}
+            variables, constraints = count_components(block)
+            entry['variables'] = variables - counts[0]
+            entry['constraints'] = constraints - counts[1]
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                entry['memory'] = current - memory
+                if hasattr(tracemalloc, 'reset_peak'):
+                    entry['memory_peak'] = peak - memory
+            self.entries.append(entry)
+
+    def to_dict(self):
+        """Get the profile as a dictionary, e.g. to compare it in a CI."""
+        return {'total_time': self.total_time, 'entries': self.entries}
+
+    def to_json(self, path=None, **kwargs):
+        """
+        Get the profile as json string or write it to `path`.
+
+        The `kwargs` are passed to :func:`json.dumps`.
+        """
+        kwargs.setdefault('indent', 2)
+        text = json.dumps(self.to_dict(), **kwargs)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    @property
+    def total_time(self):
+        """Wall time of all phases."""
+        return sum(e['time'] for e in self.entries if e['kind'] == 'phase')
+
+    def __str__(self):
+        header = '{0:<40} {1:<10} {2:>9} {3:>10} {4:>11} {5:>12}'.format(
+            'name', 'kind', 'time [s]', 'variables', 'constraints',
+            'memory [kB]')
+        lines = [header, '-' * len(header)]
+        for e in self.entries:
+            memory = ('{0:12.0f}'.format(e['memory'] / 1024)
+                      if 'memory' in e else '{0:>12}'.format('-'))
+            lines.append(
+                '{0:<40} {1:<10} {2:9.3f} {3:10d} {4:11d} {5}'.format(
+                    e['name'][:40], e['kind'], e['time'], e['variables'],
+                    e['constraints'], memory))
+        return '\n'.join(lines)
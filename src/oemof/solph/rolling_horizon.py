@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+"""Rolling horizon optimisation of an energy system.
+
+The time horizon of the energy system is split into overlapping windows,
+which are optimised one after another. The storage content and the status of
+nonconvex flows at the end of the committed part of a window are the initial
+values of the next window.
+
+SPDX-License-Identifier: MIT
+
+"""
+import logging
+
+import pandas as pd
+import pyomo.environ as po
+from oemof.solph import helpers
+from oemof.solph import processing
+from oemof.solph.components import GenericStorage
+from oemof.solph.models import Model
+
+
+def windows(length, window, overlap=0):
+    """
+    Get the time steps of all windows of a rolling horizon.
+
+    Parameters
+    ----------
+    length : int
+        Number of time steps of the whole horizon.
+    window : int
+        Number of time steps of every window.
+    overlap : int
+        Number of time steps of a window, which are optimised again in the
+        next window.
+
+    Returns
+    -------
+    list : [(start, stop, committed_stop)]
+        The window covers the time steps `start` to `stop` (exclusive). The
+        results of the time steps `start` to `committed_stop` (exclusive) are
+        kept.
+
+    Examples
+    --------
+    >>> windows(10, 4, 1)
+    [(0, 4, 3), (3, 7, 6), (6, 10, 10)]
+    """
+    if not 0 <= overlap < window:
+        raise ValueError("The overlap ({0}) has to be smaller than the "
+                         "window ({1}).".format(overlap, window))
+    result = []
+    start = 0
+    while True:
+        stop = min(start + window, length)
+        if stop == length:
+            result.append((start, stop, stop))
+            return result
+        result.append((start, stop, stop - overlap))
+        start = stop - overlap
+
+
+def solve(energysystem, window, overlap=0, model_kwargs=None,
+          warmstart=False, **solve_kwargs):
+    """
+    Optimise an energy system with a rolling horizon.
+
+    For every window a :class:`~oemof.solph.models.Model` is built and
+    solved. The storage content and the status of nonconvex flows at the
+    last committed time step are used as `initial_storage_level` and
+    `initial_status` of the next window.
+
+    Storages are not balanced within the windows, as the `balanced`
+    constraint would force every window to end with its initial content.
+    Minimum up and downtimes of nonconvex flows refer to the whole horizon:
+    the status is fixed to the `initial_status` only for the first and last
+    time steps of the horizon and the up and downtimes started in the
+    committed time steps of the previous windows are continued.
+    Attributes that refer to the whole horizon (e.g. `summed_max`) are
+    applied to every window. The `timeincrement` of the energy system and
+    the `timeincrement` and `objective_weighting` of the `model_kwargs` are
+    sliced like the other sequences. Investment storages are not
+    supported.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem
+    window : int
+        Number of time steps of every window.
+    overlap : int
+        Number of time steps at the end of a window, which are optimised
+        again in the next window. Their results are dropped.
+    model_kwargs : dict
+        Keyword arguments for the Model, e.g. `constraint_groups`.
+    warmstart : bool
+        Start the solver of every window from the results of the previous
+        window for the overlapping time steps (see the `warmstart` argument
+        of :meth:`~oemof.solph.models.BaseModel.solve`).
+    solve_kwargs :
+        Keyword arguments for :meth:`~oemof.solph.models.BaseModel.solve`.
+
+    Returns
+    -------
+    dict : Results of the whole time horizon in the format of
+        :func:`oemof.solph.processing.results`. The scalars are the ones of
+        the first window (e.g. the initial storage content).
+
+    Examples
+    --------
+    >>> from oemof.solph import rolling_horizon  # doctest: +SKIP
+    >>> results = rolling_horizon.solve(es, window=48, overlap=24,
+    ...                                 solver='cbc')  # doctest: +SKIP
+    """
+    model_kwargs = model_kwargs or {}
+    storages = [n for n in energysystem.nodes
+                if isinstance(n, GenericStorage)]
+    if any(s.investment for s in storages):
+        raise ValueError(
+            "Investment storages are not supported by the rolling horizon.")
+    nonconvex = [k for k, f in energysystem.flows().items() if f.nonconvex]
+
+    # state variables which are changed for the windows
+    originals = (
+        [(s, 'initial_storage_level', s.initial_storage_level)
+         for s in storages] +
+        [(s, 'balanced', s.balanced) for s in storages] +
+        [(f.nonconvex, 'initial_status', f.nonconvex.initial_status)
+         for f in (energysystem.flows()[k] for k in nonconvex)])
+
+    # initial status of the first and last time steps of the whole horizon
+    # and the committed status of every time step
+    initial_status = {k: energysystem.flows()[k].nonconvex.initial_status
+                      for k in nonconvex}
+    history = {k: [] for k in nonconvex}
+
+    sequences = {}
+    scalars = {}
+    # results of the previous window
+    results = None
+    try:
+        for s in storages:
+            s.balanced = False
+
+        length = len(energysystem.timeindex)
+        for n, (start, stop, committed) in enumerate(windows(
+                length, window, overlap)):
+            logging.info("Rolling horizon: optimising time steps {0} to {1}."
+                         .format(start, stop - 1))
+
+            def window_values(values):
+                return values[start:stop]
+
+            with helpers.replaced_time_series(
+                    energysystem, energysystem.timeindex[start:stop],
+                    window_values):
+                om = Model(energysystem, **helpers.replaced_model_kwargs(
+                    model_kwargs, length, window_values))
+                _add_up_down_constraints(om, start, length, initial_status,
+                                         history)
+                om.solve(warmstart=warmstart and results, **solve_kwargs)
+                results = processing.results(om)
+            steps = committed - start
+
+            for k, v in results.items():
+                sequences.setdefault(k, []).append(
+                    v['sequences'].iloc[:steps])
+                scalars.setdefault(k, v['scalars'])
+
+            # initial values of the next window
+            last = steps - 1
+            for s in storages:
+                content = om.GenericStorageBlock.storage_content[s, last]
+                s.initial_storage_level = (
+                    content.value / s.nominal_storage_capacity)
+            for o, i in nonconvex:
+                history[o, i].extend(
+                    int(round(om.NonConvexFlow.status[o, i, t].value))
+                    for t in range(steps))
+                om.flows[o, i].nonconvex.initial_status = history[o, i][-1]
+    finally:
+        for obj, attribute, value in originals:
+            setattr(obj, attribute, value)
+
+    return {k: {'scalars': scalars[k],
+                'sequences': pd.concat(sequences[k])}
+            for k in sequences}
+
+
+def _add_up_down_constraints(om, start, length, initial_status, history):
+    """
+    Replace the minimum up and downtime constraints of the nonconvex flows
+    of the window model `om` by the ones of the whole horizon.
+
+    The constraints of the time steps of the whole horizon (not the window)
+    are restricted to the time steps of the window: the statuses of earlier
+    time steps are the committed ones in `history`, the sums over later
+    time steps are shortened to the end of the window. The status is fixed
+    to the `initial_status` in the edge regions of the whole horizon only.
+    """
+    block = getattr(om, 'NonConvexFlow', None)
+    if block is None or not hasattr(block, 'NONCONVEX_FLOWS'):
+        return
+    stop = start + len(om.TIMESTEPS)
+    om.rolling_up_down = po.ConstraintList()
+    for o, i in block.NONCONVEX_FLOWS:
+        nonconvex = om.flows[o, i].nonconvex
+        limits = [(minimum, constraint, up) for minimum, constraint, up in [
+            (nonconvex.minimum_uptime, block.min_uptime_constr, True),
+            (nonconvex.minimum_downtime, block.min_downtime_constr, False)]
+            if minimum is not None]
+        if not limits:
+            continue
+
+        def status(t):
+            if t < start:
+                return history[o, i][t]
+            return block.status[o, i, t - start]
+
+        edge = nonconvex.max_up_down
+        for t in range(start, stop):
+            if t < edge or t > length - 1 - edge:
+                om.rolling_up_down.add(
+                    status(t) == initial_status[o, i])
+
+        for minimum, constraint, up in limits:
+            for t in om.TIMESTEPS:
+                constraint[o, i, t].deactivate()
+            for t in range(max(start - minimum + 1, edge),
+                           min(stop, length - edge)):
+                steps = min(minimum, stop - t)
+                total = sum(status(t + k) for k in range(steps))
+                if up:
+                    expr = (status(t) - status(t - 1)) * steps - total
+                else:
+                    expr = ((status(t - 1) - status(t)) * steps - steps +
+                            total)
+                om.rolling_up_down.add(expr <= 0)
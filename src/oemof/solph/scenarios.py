@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+"""Run independent scenarios in parallel worker processes.
+
+Every scenario is built and solved in a worker process. Only compact results
+(numpy arrays keyed by label strings) are sent back, so no pyomo object has
+to be pickled.
+
+SPDX-License-Identifier: MIT
+
+"""
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+from oemof.solph import processing
+from oemof.solph.models import Model
+
+# name of the option to limit the number of threads of a solver
+SOLVER_THREAD_OPTIONS = {'cbc': 'threads', 'cplex': 'threads',
+                         'gurobi': 'threads', 'highs': 'threads'}
+
+# environment variables limiting the threads of numerical libraries
+THREAD_ENVIRONMENT_VARIABLES = ['OMP_NUM_THREADS', 'MKL_NUM_THREADS',
+                                'OPENBLAS_NUM_THREADS']
+
+
+class ScenarioResult:
+    """
+    Result of a single scenario.
+
+    Attributes
+    ----------
+    name : hashable
+        Name of the scenario.
+    results : dict
+        Compact results ``{(label, label): {'scalars': {name: value},
+        'sequences': {name: numpy.ndarray}}}`` or None if the scenario
+        failed.
+    timeindex : pandas.DatetimeIndex
+        Time index of the sequences.
+    meta : dict
+        Objective value, solver status and termination condition.
+    timing : dict
+        Wall time in seconds of the steps `energysystem`, `model`, `solve`,
+        `results` and `total`.
+    error : str
+        Traceback of the exception if the scenario failed, otherwise None.
+    """
+    def __init__(self, name, results=None, timeindex=None, meta=None,
+                 timing=None, error=None):
+        self.name = name
+        self.results = results
+        self.timeindex = timeindex
+        self.meta = meta or {}
+        self.timing = timing or {}
+        self.error = error
+
+    @property
+    def success(self):
+        return self.error is None
+
+    def __repr__(self):
+        state = 'ok' if self.success else 'failed'
+        return '<ScenarioResult {0!r} ({1}, {2:.2f} s)>'.format(
+            self.name, state, self.timing.get('total', float('nan')))
+
+    def to_dataframes(self):
+        """
+        Get the results in the format of
+        :func:`oemof.solph.processing.results` with label strings as keys.
+        """
+        return {k: {'scalars': pd.Series(v['scalars'], dtype=float),
+                    'sequences': pd.DataFrame(v['sequences'],
+                                              index=self.timeindex)}
+                for k, v in self.results.items()}
+
+
+def compact_results(results):
+    """
+    Convert results to plain numpy arrays keyed by label strings.
+
+    Parameters
+    ----------
+    results : dict
+        Results as returned by :func:`oemof.solph.processing.results`.
+    """
+    compact = {}
+    for k, v in processing.convert_keys_to_strings(results).items():
+        sequences = v['sequences']
+        compact[k] = {
+            'scalars': {n: float(x) for n, x in v['scalars'].items()},
+            'sequences': {n: sequences[n].to_numpy(dtype=float)
+                          for n in sequences.columns}}
+    return compact
+
+
+def _run_scenario(factory, name, parameters, settings):
+    """Build, solve and process a single scenario (in a worker process)."""
+    threads = settings['threads']
+    if threads is not None:
+        for variable in THREAD_ENVIRONMENT_VARIABLES:
+            os.environ[variable] = str(threads)
+
+    timing = {}
+    start = last = time.perf_counter()
+
+    def lap(step):
+        nonlocal last
+        now = time.perf_counter()
+        timing[step] = now - last
+        last = now
+
+    try:
+        energysystem = factory(parameters)
+        lap('energysystem')
+        om = Model(energysystem, **settings['model_kwargs'])
+        lap('model')
+        solver_results = om.solve(
+            solver=settings['solver'], solver_io=settings['solver_io'],
+            cmdline_options=settings['cmdline_options'],
+            solve_kwargs=settings['solve_kwargs'])
+        lap('solve')
+        results = compact_results(processing.results(om))
+        lap('results')
+        meta = {
+            'objective': om.objective(),
+            'status': str(solver_results['Solver'][0]['Status']),
+            'termination_condition': str(
+                solver_results['Solver'][0]['Termination condition'])}
+    except Exception:
+        timing['total'] = time.perf_counter() - start
+        return ScenarioResult(name, timing=timing,
+                              error=traceback.format_exc())
+
+    timing['total'] = time.perf_counter() - start
+    return ScenarioResult(name, results=results,
+                          timeindex=energysystem.timeindex, meta=meta,
+                          timing=timing)
+
+
+def run(factory, scenarios, processes=None, solver='cbc', solver_io='lp',
+        threads=1, cmdline_options=None, solve_kwargs=None,
+        model_kwargs=None):
+    """
+    Build and solve independent scenarios in a pool of worker processes.
+
+    An exception within a scenario does not stop the other scenarios. It is
+    stored in the `error` attribute of the result. If a worker process
+    crashes (e.g. it is killed for lack of memory), the scenarios, which
+    were not finished yet, are run again, each in a process of its own.
+
+    Parameters
+    ----------
+    factory : callable
+        Creates the EnergySystem of a scenario from its parameters. It has to
+        be picklable, e.g. a function defined at module level.
+    scenarios : dict or iterable
+        Parameters of the scenarios keyed by the scenario name. The position
+        is used as name if an iterable is passed.
+    processes : int
+        Number of worker processes. Defaults to the number of CPUs.
+    solver, solver_io :
+        See :meth:`oemof.solph.models.BaseModel.solve`.
+    threads : int
+        Maximum number of threads of the solver in every worker. Set to None
+        to use the default of the solver.
+    cmdline_options, solve_kwargs :
+        See :meth:`oemof.solph.models.BaseModel.solve`.
+    model_kwargs : dict
+        Keyword arguments of the Model.
+
+    Returns
+    -------
+    dict : {scenario name: ScenarioResult}
+
+    Examples
+    --------
+    >>> def create_energysystem(gas_price):  # doctest: +SKIP
+    ...     ...
+    >>> results = run(create_energysystem,
+    ...               {'low': 20, 'high': 40}, processes=2)  # doctest: +SKIP
+    >>> results['high'].results['gas', 'bgas']['sequences']['flow']
+    ...  # doctest: +SKIP
+    """
+    if not isinstance(scenarios, dict):
+        scenarios = dict(enumerate(scenarios))
+
+    cmdline_options = dict(cmdline_options or {})
+    if threads is not None and solver in SOLVER_THREAD_OPTIONS:
+        cmdline_options.setdefault(SOLVER_THREAD_OPTIONS[solver], threads)
+    settings = {'solver': solver, 'solver_io': solver_io,
+                'threads': threads, 'cmdline_options': cmdline_options,
+                'solve_kwargs': solve_kwargs or {},
+                'model_kwargs': model_kwargs or {}}
+
+    results = _run_pool(factory, scenarios, settings, processes)
+
+    # A crashed worker process (e.g. killed for lack of memory) breaks the
+    # pool, so all scenarios, which were not finished yet, failed. They are
+    # run again, each in a process of its own.
+    crashed = [name for name, result in results.items()
+               if isinstance(result, BrokenProcessPool)]
+    batch = processes or os.cpu_count() or 1
+    for n in range(0, len(crashed), batch):
+        results.update(_run_pool(
+            factory, {name: scenarios[name] for name in crashed[n:n + batch]},
+            settings, isolated=True))
+
+    for name, result in results.items():
+        if isinstance(result, BaseException):
+            results[name] = ScenarioResult(name, error=''.join(
+                traceback.format_exception(
+                    type(result), result, result.__traceback__)))
+        if results[name].success:
+            logging.info("Scenario {0!r} solved in {1:.2f} s.".format(
+                name, results[name].timing['total']))
+        else:
+            logging.warning("Scenario {0!r} failed:\n{1}".format(
+                name, results[name].error))
+    return results
+
+
+def _run_pool(factory, scenarios, settings, processes=None, isolated=False):
+    """
+    Run the scenarios in a pool of worker processes. If `isolated` is True,
+    every scenario is run in a process of its own (all in parallel), so
+    that a crashing scenario does not break the others.
+
+    Returns
+    -------
+    dict : {scenario name: ScenarioResult or the exception of the future}
+    """
+    if isolated:
+        executors = {name: ProcessPoolExecutor(max_workers=1)
+                     for name in scenarios}
+        pools = list(executors.values())
+    else:
+        pools = [ProcessPoolExecutor(max_workers=processes)]
+        executors = dict.fromkeys(scenarios, pools[0])
+    results = {}
+    try:
+        futures = {name: executors[name].submit(
+            _run_scenario, factory, name, parameters, settings)
+            for name, parameters in scenarios.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                # e.g. a crashed worker process or unpicklable parameters
+                results[name] = e
+    finally:
+        for pool in pools:
+            pool.shutdown()
+    return results
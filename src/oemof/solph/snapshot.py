@@ -0,0 +1,469 @@
+# -*- coding: utf-8 -*-
+
+"""Compact, versioned snapshots of energy systems and their results.
+
+A snapshot is a single uncompressed npz file. The topology of the energy
+system is stored as tables (the class of every node and the source and
+target of every flow as integer arrays), every sequence and every array of
+the nodes, flows and results as raw numpy array and all other attributes as
+JSON manifest. No object is pickled, so snapshots can be read with other
+versions of python and of the dependencies.
+
+Reading a snapshot is lazy: the arrays are memory-mapped and the pandas
+objects of the results are only created when an entry is accessed. Use
+:meth:`EnergySystem.dump() <oemof.solph.network.EnergySystem.dump>` with a
+filename ending with `.npz` or :func:`write_snapshot` and
+:func:`read_snapshot` directly.
+
+SPDX-License-Identifier: MIT
+
+"""
+import enum
+import importlib
+import json
+import logging
+import struct
+import zipfile
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+from oemof.network import network as on
+from oemof.solph import processing
+from pyomo.opt import SolverResults
+from pyomo.opt.results.container import MapContainer
+
+# version of the snapshot format, increased for incompatible changes
+SNAPSHOT_VERSION = 1
+
+# suffix of snapshot files
+SUFFIX = '.npz'
+
+_MANIFEST = 'manifest'
+
+# modules of objects which are not stored attribute by attribute
+_UNSUPPORTED = ('builtins', 'pandas', 'pyomo')
+
+# readers of the headers of the npy format versions
+_HEADER_READERS = {(1, 0): np.lib.format.read_array_header_1_0,
+                   (2, 0): np.lib.format.read_array_header_2_0}
+
+
+def write_snapshot(energysystem, path):
+    """
+    Write the energy system and its results to a snapshot file.
+
+    The entries of `energysystem.results` which are result dictionaries (see
+    :func:`oemof.solph.processing.results`) are stored as arrays, the other
+    entries (e.g. the meta results) as JSON. Entries which cannot be stored
+    (e.g. the pyomo solver results) are skipped with a warning.
+
+    Parameters
+    ----------
+    energysystem : oemof.solph.EnergySystem
+    path : str
+        Path of the file, usually ending with `.npz`.
+
+    Raises
+    ------
+    TypeError
+        If an attribute of a node or flow cannot be stored, e.g. a function
+        or a pandas object.
+    """
+    encoder = _Encoder(energysystem.nodes, energysystem.timeindex)
+    nodes = energysystem.nodes
+    flows = list(energysystem.flows().items())
+
+    classes = []
+
+    def class_codes(objects):
+        codes = []
+        for obj in objects:
+            name = _class_name(type(obj))
+            if name not in classes:
+                classes.append(name)
+            codes.append(classes.index(name))
+        return np.array(codes, dtype=np.int32)
+
+    manifest = {
+        'format': 'oemof.solph snapshot',
+        'version': SNAPSHOT_VERSION,
+        'classes': classes,
+        'timeindex': encoder.index(energysystem.timeindex),
+        'timeincrement': encoder.encode(energysystem.timeincrement,
+                                        'timeincrement'),
+        'temporal': encoder.encode(energysystem.temporal, 'temporal'),
+        'nodes': [
+            {'label': encoder.encode(n.label, n),
+             'attributes': encoder.attributes(n)} for n in nodes],
+        'flows': [encoder.attributes(f) for _, f in flows],
+        'results': encoder.results(energysystem.results),
+    }
+    encoder.arrays['node_class'] = class_codes(nodes)
+    encoder.arrays['flow_class'] = class_codes(f for _, f in flows)
+    index = {id(n): i for i, n in enumerate(nodes)}
+    encoder.arrays['flow_source'] = np.array(
+        [index[id(s)] for (s, _), _ in flows], dtype=np.int32)
+    encoder.arrays['flow_target'] = np.array(
+        [index[id(t)] for (_, t), _ in flows], dtype=np.int32)
+
+    manifest = np.frombuffer(json.dumps(manifest).encode(), dtype=np.uint8)
+    with open(path, 'wb') as f:
+        np.savez(f, **{_MANIFEST: manifest}, **encoder.arrays)
+
+
+def read_snapshot(path, energysystem=None):
+    """
+    Read a snapshot written by :func:`write_snapshot`.
+
+    The arrays are memory-mapped (copy-on-write), so only the parts which
+    are used are read from the file. The result dictionaries are
+    :class:`SnapshotResults`, which create the pandas objects of an entry
+    when it is accessed.
+
+    Parameters
+    ----------
+    path : str
+        Path of the snapshot file.
+    energysystem : oemof.solph.EnergySystem
+        Energy system whose nodes and attributes are replaced by the ones of
+        the snapshot. A new energy system is created if None.
+
+    Returns
+    -------
+    oemof.solph.EnergySystem
+    """
+    arrays = _Arrays(path)
+    manifest = json.loads(bytes(arrays[_MANIFEST]).decode())
+    if manifest.get('format') != 'oemof.solph snapshot':
+        raise ValueError("{0} is not a snapshot of an energy system."
+                         .format(path))
+    if manifest['version'] > SNAPSHOT_VERSION:
+        raise ValueError(
+            "The snapshot {0} has version {1}, this version of oemof.solph "
+            "reads versions up to {2}.".format(
+                path, manifest['version'], SNAPSHOT_VERSION))
+
+    if energysystem is None:
+        from oemof.solph.network import EnergySystem
+        energysystem = EnergySystem()
+    classes = [_import(name) for name in manifest['classes']]
+    decoder = _Decoder(arrays)
+
+    for code, node in zip(arrays['node_class'].tolist(), manifest['nodes']):
+        obj = classes[code].__new__(classes[code])
+        on.Node.__init__(obj, label=decoder.decode(node['label']))
+        decoder.nodes.append(obj)
+    for obj, node in zip(decoder.nodes, manifest['nodes']):
+        obj.__dict__.update(decoder.attributes(node['attributes']))
+    for code, source, target, attributes in zip(
+            arrays['flow_class'].tolist(), arrays['flow_source'].tolist(),
+            arrays['flow_target'].tolist(), manifest['flows']):
+        flow = classes[code].__new__(classes[code])
+        on.Edge.__init__(flow, input=decoder.nodes[source],
+                         output=decoder.nodes[target])
+        flow.__dict__.update(decoder.attributes(attributes))
+
+    energysystem.entities = []
+    energysystem._groups = {}
+    energysystem._first_ungrouped_node_index_ = 0
+    energysystem.timeindex = decoder.index(manifest['timeindex'])
+    energysystem.timeincrement = decoder.decode(manifest['timeincrement'])
+    energysystem.temporal = decoder.decode(manifest['temporal'])
+    energysystem.results = decoder.results(manifest['results'],
+                                           energysystem.timeindex)
+    energysystem.add(*decoder.nodes)
+    return energysystem
+
+
+class SnapshotResults(processing.Results):
+    """
+    Lazy result dictionary of a snapshot.
+
+    Keys, values and order of the entries are the same as in the stored
+    result dictionary. The sequences of an entry are a view of the
+    memory-mapped array, which is created when the entry is accessed for
+    the first time.
+    """
+    def __init__(self, decoder, entries, timeindex):
+        self._decoder = decoder
+        self._timeindex = timeindex
+        self._cache = {}
+        self._entries = [entry for _, entry in entries]
+        self._keys = {key: n for n, (key, _) in enumerate(entries)}
+
+    def _create_entry(self, n):
+        entry = self._entries[n]
+        decode = self._decoder.decode
+        sequences = entry['sequences']
+        index = (self._timeindex if sequences['index'] is None
+                 else self._decoder.index(sequences['index']))
+        scalars = entry['scalars']
+        return {
+            'scalars': pd.Series(
+                decode(scalars['values']),
+                index=pd.Index(decode(scalars['names']),
+                               name=decode(scalars['index_name'])),
+                name=decode(scalars['name']),
+                dtype=scalars['dtype']),
+            'sequences': pd.DataFrame(
+                self._decoder.arrays[sequences['array']], index=index,
+                columns=pd.Index(decode(sequences['columns']),
+                                 name=decode(sequences['columns_name'])),
+                copy=False)}
+
+
+def _class_name(cls):
+    return '{0}:{1}'.format(cls.__module__, cls.__qualname__)
+
+
+def _import(name):
+    module, qualname = name.split(':')
+    obj = importlib.import_module(module)
+    for attribute in qualname.split('.'):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def _is_results(value):
+    """Whether `value` is a result dictionary of :func:`results`."""
+    return (isinstance(value, Mapping) and len(value) > 0 and
+            all(isinstance(v, Mapping) and 'sequences' in v
+                for v in value.values()))
+
+
+class _Encoder:
+    """Encode values as JSON and arrays."""
+    def __init__(self, nodes, timeindex):
+        self.nodes = {id(n): i for i, n in enumerate(nodes)}
+        self.timeindex = timeindex
+        self.arrays = {}
+
+    def array(self, values):
+        key = 'a{0}'.format(len(self.arrays))
+        self.arrays[key] = values
+        return key
+
+    def attributes(self, obj):
+        return {name: self.encode(value, obj, name)
+                for name, value in vars(obj).items()}
+
+    def index(self, index):
+        if index is None:
+            return None
+        index = pd.Index(index)
+        encoded = {'name': self.encode(index.name, 'index')}
+        if isinstance(index, pd.DatetimeIndex):
+            encoded.update(
+                datetime=self.array(index.asi8),
+                freq=None if index.freq is None else index.freqstr,
+                tz=None if index.tz is None else str(index.tz))
+        else:
+            encoded['values'] = self.encode(index.to_numpy(), 'index')
+        return encoded
+
+    def results(self, results):
+        if results is None:
+            return None
+        if isinstance(results, SolverResults):
+            # the entries set by the user, e.g. results['main'], without the
+            # information of the solver (see processing.meta_results)
+            container = 'solver_results'
+            results = {name: results[name] for name in results.keys()
+                       if not type(results[name]).__module__.startswith(
+                           'pyomo.')}
+        elif isinstance(results, Mapping) and not _is_results(results):
+            container = 'dict'
+        else:
+            container = 'value'
+            results = {None: results}
+
+        entries = []
+        for name, value in results.items():
+            try:
+                if _is_results(value):
+                    entries.append([self.encode(name, 'results'), {
+                        'entries': [[self.encode(k, 'results'),
+                                     self.result_entry(v)]
+                                    for k, v in value.items()]}])
+                else:
+                    entries.append([self.encode(name, 'results'),
+                                    {'value': self.encode(value, 'results')}])
+            except TypeError as e:
+                logging.warning(
+                    "The results entry {0!r} is not stored in the "
+                    "snapshot: {1}".format(name, e))
+        return {'container': container, 'entries': entries}
+
+    def result_entry(self, entry):
+        sequences = entry['sequences']
+        scalars = entry['scalars']
+        # None for the time index of the energy system
+        index = None
+        if self.timeindex is None or not sequences.index.equals(
+                self.timeindex):
+            index = self.index(sequences.index)
+        return {
+            'sequences': {
+                'array': self.array(sequences.to_numpy(dtype=float)),
+                'columns': self.encode(list(sequences.columns), 'results'),
+                'columns_name': self.encode(sequences.columns.name,
+                                            'results'),
+                'index': index},
+            'scalars': {
+                'names': self.encode(list(scalars.index), 'results'),
+                'index_name': self.encode(scalars.index.name, 'results'),
+                'values': self.encode(scalars.to_numpy(), 'results'),
+                'name': self.encode(scalars.name, 'results'),
+                'dtype': str(scalars.dtype)}}
+
+    def encode(self, value, owner, name=None):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, on.Node) and id(value) in self.nodes:
+            return {'type': 'node', 'index': self.nodes[id(value)]}
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            return {'type': 'array',
+                    'key': self.array(np.ascontiguousarray(value))}
+        if isinstance(value, pd.Timestamp):
+            return {'type': 'timestamp', 'value': value.isoformat()}
+        if isinstance(value, enum.Enum):
+            return {'type': 'enum', 'class': _class_name(type(value)),
+                    'name': value.name}
+        if isinstance(value, (tuple, list, np.ndarray)):
+            encoded = {'type': type(value).__name__, 'items': [
+                self.encode(v, owner, name) for v in value]}
+            if hasattr(value, '_fields'):
+                encoded.update(type='namedtuple',
+                               **{'class': _class_name(type(value))})
+            elif isinstance(value, np.ndarray):
+                encoded['type'] = 'list'
+            return encoded
+        if isinstance(value, dict):
+            items = value.items()
+            if isinstance(value, MapContainer):
+                # the items of pyomo containers (e.g. the solver statistics
+                # of the meta results) are wrapped, undefined ones are
+                # skipped like in processing.meta_results()
+                items = [(k, value[k]) for k in value.keys()
+                         if str(value[k]) != '<undefined>']
+            return {'type': 'dict', 'items': [
+                [self.encode(k, owner, name), self.encode(v, owner, name)]
+                for k, v in items]}
+        if (hasattr(value, '__dict__') and not callable(value) and
+                not isinstance(value, on.Node) and
+                not type(value).__module__.startswith(_UNSUPPORTED)):
+            return {'type': 'object', 'class': _class_name(type(value)),
+                    'attributes': self.attributes(value)}
+        raise TypeError(
+            "The attribute {0!r} of {1!r} cannot be stored in a snapshot, "
+            "values of type {2} are not supported.".format(
+                name, owner, type(value).__name__))
+
+
+class _Decoder:
+    """Decode the values encoded by :class:`_Encoder`."""
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.nodes = []
+
+    def attributes(self, encoded):
+        return {name: self.decode(value) for name, value in encoded.items()}
+
+    def index(self, encoded):
+        if encoded is None:
+            return None
+        name = self.decode(encoded['name'])
+        if 'datetime' in encoded:
+            index = pd.DatetimeIndex(self.arrays[encoded['datetime']],
+                                     name=name)
+            if encoded['tz'] is not None:
+                index = index.tz_localize('UTC').tz_convert(encoded['tz'])
+            if encoded['freq'] is not None:
+                index = pd.DatetimeIndex(index, freq=encoded['freq'])
+            return index
+        return pd.Index(self.decode(encoded['values']), name=name)
+
+    def results(self, encoded, timeindex):
+        if encoded is None:
+            return None
+        results = (SolverResults() if encoded['container'] == 'solver_results'
+                   else {})
+        for name, value in encoded['entries']:
+            name = self.decode(name)
+            if 'entries' in value:
+                results[name] = SnapshotResults(
+                    self, [(self.decode(k), v) for k, v in value['entries']],
+                    timeindex)
+            else:
+                results[name] = self.decode(value['value'])
+        if encoded['container'] == 'value':
+            return results.get(None)
+        return results
+
+    def decode(self, value):
+        if not isinstance(value, dict):
+            return value
+        kind = value['type']
+        if kind == 'node':
+            return self.nodes[value['index']]
+        if kind == 'array':
+            return self.arrays[value['key']]
+        if kind == 'timestamp':
+            return pd.Timestamp(value['value'])
+        if kind == 'enum':
+            return getattr(_import(value['class']), value['name'])
+        if kind == 'dict':
+            return {self.decode(k): self.decode(v) for k, v in value['items']}
+        if kind == 'object':
+            cls = _import(value['class'])
+            obj = cls.__new__(cls)
+            obj.__dict__.update(self.attributes(value['attributes']))
+            return obj
+        items = [self.decode(v) for v in value['items']]
+        if kind == 'namedtuple':
+            return _import(value['class'])(*items)
+        if kind == 'tuple':
+            return tuple(items)
+        return items
+
+
+class _Arrays(Mapping):
+    """
+    The arrays of an npz file, memory-mapped when they are accessed.
+
+    Arrays of compressed files are read as a whole.
+    """
+    def __init__(self, path):
+        self._path = path
+        with zipfile.ZipFile(path) as archive:
+            self._members = {info.filename[:-len('.npy')]: info
+                             for info in archive.infolist()}
+
+    def __getitem__(self, key):
+        info = self._members[key]
+        if info.compress_type != zipfile.ZIP_STORED:
+            with np.load(self._path) as npz:
+                return npz[key]
+        with open(self._path, 'rb') as f:
+            # skip the local header of the zip member
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', f.read(4))
+            f.seek(name_length + extra_length, 1)
+            version = np.lib.format.read_magic(f)
+            shape, fortran_order, dtype = _HEADER_READERS[version](f)
+            offset = f.tell()
+        if dtype.hasobject:
+            raise ValueError("Arrays of objects are not supported.")
+        if not np.prod(shape):
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self._path, dtype=dtype, mode='c', offset=offset,
+                         shape=shape, order='F' if fortran_order else 'C')
+
+    def __iter__(self):
+        return iter(self._members)
+
+    def __len__(self):
+        return len(self._members)
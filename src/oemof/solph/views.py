@@ -52,6 +52,9 @@ def node(results, node, multiindex=False, keep_none_type=False):
     if type(node) is str:
         results = convert_keys_to_strings(results, keep_none_type)
 
+    # only access the entries of the node as the results may be lazy
+    results = {k: results[k] for k in results if node in k}
+
     filtered = {}
 
     # create a series with tuples as index labels for scalars
@@ -212,7 +215,7 @@ def node_weight_by_type(results, node_type):
     views.node_weight_by_type(m.results(), node_type=solph.GenericStorage)
     """
 
-    group = {k: v['sequences'] for k, v in results.items()
+    group = {k: results[k]['sequences'] for k in results
              if isinstance(k[0], node_type) and k[1] is None}
     if not group:
         logging.error('No node weights for nodes of type `{}`'.format(
@@ -249,7 +252,7 @@ def node_input_by_type(results, node_type, droplevel=None):
     if droplevel is None:
         droplevel = []
 
-    group = {k: v['sequences'] for k, v in results.items()
+    group = {k: results[k]['sequences'] for k in results
              if isinstance(k[1], node_type) and k[0] is not None}
 
     if not group:
@@ -283,7 +286,7 @@ def node_output_by_type(results, node_type, droplevel=None):
     """
     if droplevel is None:
         droplevel = []
-    group = {k: v['sequences'] for k, v in results.items()
+    group = {k: results[k]['sequences'] for k in results
              if isinstance(k[0], node_type) and k[1] is not None}
 
     if not group:
@@ -321,7 +324,7 @@ def net_storage_flow(results, node_type):
     views.net_storage_flow(m.results(), node_type=solph.GenericStorage)
     """
 
-    group = {k: v['sequences'] for k, v in results.items()
+    group = {k: results[k]['sequences'] for k in results
              if isinstance(k[0], node_type) or isinstance(k[1], node_type)}
 
     if not group:
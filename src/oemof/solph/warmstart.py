@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""Start values of the variables of a model from a previous solution.
+
+Mixed integer models (e.g. unit commitment with nonconvex flows) are solved
+much faster if the solver starts from a good solution. The values of a
+previous solution (e.g. of an overlapping window of a rolling horizon or of
+a slightly changed energy system) are mapped onto the variables of a model
+by the labels of the nodes and by the time index, see
+:func:`set_start_values`. The start values are passed to the solver with
+:meth:`~oemof.solph.models.BaseModel.solve` (`warmstart=...`).
+
+SPDX-License-Identifier: MIT
+
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from oemof.network.network import Node
+from oemof.solph import processing
+from pyomo.core.base.var import Var
+
+# names of the variables, which get start values by default
+START_VARIABLES = ('flow', 'status', 'startup', 'shutdown', 'invest',
+                   'storage_content')
+
+
+def _label_key(oemof_tuple):
+    """Key of a result entry or oemof tuple by the labels of its nodes."""
+    if len(oemof_tuple) == 1:
+        oemof_tuple = (oemof_tuple[0], None)
+    return tuple(None if n is None else str(n) for n in oemof_tuple)
+
+
+def _nodes_and_timestep(index):
+    """
+    Split the index of a variable into its nodes and the timestep.
+
+    The timestep is None for variables indexed by nodes only (e.g. `invest`).
+    Indices which are not of the form `(n, ..., t)` or `(n, ...)` return
+    None as nodes.
+    """
+    if isinstance(index, Node):
+        return (index,), None
+    if not isinstance(index, tuple) or not index:
+        return None, None
+    if isinstance(index[-1], Node):
+        nodes, timestep = index, None
+    else:
+        nodes, timestep = index[:-1], index[-1]
+    if (not nodes or len(nodes) > 2 or
+            not all(isinstance(n, Node) for n in nodes)):
+        return None, None
+    return nodes, timestep
+
+
+def set_start_values(model, results, variables=START_VARIABLES):
+    """
+    Set the values of the variables of `model` to the values of `results`.
+
+    The variables are matched with the entries of the results by their name
+    and the labels of their nodes, so the results may belong to another
+    model (e.g. of another energy system object with the same labels). The
+    values of time dependent variables are matched by the time index of the
+    energy system of `model` and the index of the sequences of the results.
+    Time steps missing in the results (e.g. at the end of a rolling horizon
+    window) are skipped.
+
+    Fixed variables are not changed. The values of integer variables are
+    rounded and all values are clipped to the bounds of the variables.
+
+    Parameters
+    ----------
+    model : oemof.solph.Model
+        A built model.
+    results : dict
+        Results in the format of :func:`oemof.solph.processing.results`,
+        keyed by nodes or by their labels (e.g. as returned by
+        :func:`oemof.solph.processing.read_results`).
+    variables : iterable of str
+        Names of the variables which get start values.
+
+    Returns
+    -------
+    int : number of variables which got a start value
+
+    Examples
+    --------
+    >>> previous = processing.results(om)  # doctest: +SKIP
+    >>> set_start_values(new_om, previous)  # doctest: +SKIP
+    >>> new_om.solve(solver='cbc', warmstart=True)  # doctest: +SKIP
+    """
+    entries = {_label_key(k): k for k in results}
+    timeindex = pd.Index(model.es.timeindex)
+    variables = set(variables)
+    columns = {}
+    count = 0
+
+    for component in model.component_objects(Var):
+        name = component.local_name
+        if name not in variables:
+            continue
+        for index, var in component.items():
+            if var.fixed:
+                continue
+            nodes, timestep = _nodes_and_timestep(index)
+            if nodes is None:
+                continue
+            key = _label_key(nodes)
+            if key not in entries:
+                continue
+            if timestep is None:
+                scalars = results[entries[key]]['scalars']
+                value = scalars.get(name, np.nan)
+            else:
+                if (key, name) not in columns:
+                    columns[key, name] = _sequence_values(
+                        results[entries[key]]['sequences'], name, timeindex)
+                values = columns[key, name]
+                if values is None or not 0 <= timestep < len(values):
+                    continue
+                value = values[timestep]
+            if np.isnan(value):
+                continue
+
+            if var.is_integer():
+                value = round(value)
+            if var.lb is not None:
+                value = max(value, var.lb)
+            if var.ub is not None:
+                value = min(value, var.ub)
+            var.value = float(value)
+            count += 1
+
+    return count
+
+
+def _sequence_values(sequences, name, timeindex):
+    """Values of the column `name` at the positions of `timeindex`."""
+    if name not in sequences.columns:
+        return None
+    positions = sequences.index.get_indexer(timeindex)
+    values = np.append(sequences[name].to_numpy(dtype=float), np.nan)
+    return values[positions]
+
+
+def start_results(warmstart):
+    """
+    The results to start from as passed to
+    :meth:`~oemof.solph.models.BaseModel.solve`: a results dictionary or the
+    path of results written by :func:`oemof.solph.processing.write_results`.
+    """
+    if isinstance(warmstart, (str, os.PathLike)):
+        return processing.read_results(warmstart)
+    return warmstart
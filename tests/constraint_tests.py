@@ -899,3 +899,40 @@ class TestsConstraint:
             investment=solph.Investment(ep_costs=500, maximum=1234,
                                         offset=34, nonconvex=True))})
         self.compare_lp_files('flow_invest_with_offset_no_minimum.lp')
+
+    def test_generic_chp(self):
+        """Constraint test of an extraction turbine and a motoric
+        GenericCHP.
+        """
+        bel = solph.Bus(label='electricityBus')
+        bth = solph.Bus(label='heatBus')
+        bgas = solph.Bus(label='commodityBus')
+
+        solph.components.GenericCHP(
+            label='combined_cycle_extraction_turbine',
+            fuel_input={bgas: solph.Flow(
+                H_L_FG_share_max=[0.183, 0.183, 0.183])},
+            electrical_output={bel: solph.Flow(
+                P_max_woDH=[155.946, 155.946, 155.946],
+                P_min_woDH=[68.787, 68.787, 68.787],
+                Eta_el_max_woDH=[0.525, 0.525, 0.525],
+                Eta_el_min_woDH=[0.444, 0.444, 0.444])},
+            heat_output={bth: solph.Flow(
+                Q_CW_min=[10.552, 10.552, 10.552])},
+            Beta=[0.122, 0.122, 0.122], back_pressure=False)
+
+        solph.components.GenericCHP(
+            label='motoric_chp',
+            fuel_input={bgas: solph.Flow(
+                H_L_FG_share_max=[0.18, 0.18, 0.18],
+                H_L_FG_share_min=[0.41, 0.41, 0.41])},
+            electrical_output={bel: solph.Flow(
+                P_max_woDH=[200, 200, 200],
+                P_min_woDH=[100, 100, 100],
+                Eta_el_max_woDH=[0.44, 0.44, 0.44],
+                Eta_el_min_woDH=[0.40, 0.40, 0.40])},
+            heat_output={bth: solph.Flow(
+                Q_CW_min=[0, 0, 0])},
+            Beta=[0, 0, 0], back_pressure=True)
+
+        self.compare_lp_files('generic_chp.lp')
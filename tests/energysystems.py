@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -
+
+"""Energy systems shared by the tests of the model tools.
+
+SPDX-License-Identifier: MIT
+"""
+
+import pandas as pd
+from oemof import solph
+
+
+def single_bus(periods=24, start='1/1/2020', demand=None, grid=None,
+               sources=None, excess=False, storage=None):
+    """
+    Create an energy system with one electricity bus 'bel'.
+
+    The flows are passed as keyword arguments of :class:`~oemof.solph.Flow`,
+    so that every test only states the parameters it depends on. Components
+    whose parameters are None are left out.
+
+    Parameters
+    ----------
+    periods : int
+        Number of (hourly) time steps.
+    start : str or pandas.Timestamp
+        First time step.
+    demand : dict
+        Input flow of the sink 'demand'.
+    grid : dict
+        Output flow of the source 'grid'.
+    sources : dict
+        Output flows of further sources by their label.
+    excess : bool
+        Add the sink 'excess' with an unbounded input flow.
+    storage : dict
+        Parameters of the GenericStorage 'storage'. The entries 'inputs' and
+        'outputs' are the parameters of its flows.
+
+    Returns
+    -------
+    EnergySystem
+    """
+    es = solph.EnergySystem(timeindex=pd.date_range(
+        start, periods=periods, freq='H'))
+    bel = solph.Bus(label='bel')
+    es.add(bel)
+    if demand is not None:
+        es.add(solph.Sink(label='demand', inputs={bel: solph.Flow(**demand)}))
+    if grid is not None:
+        es.add(solph.Source(label='grid', outputs={bel: solph.Flow(**grid)}))
+    for label, flow in (sources or {}).items():
+        es.add(solph.Source(label=label, outputs={bel: solph.Flow(**flow)}))
+    if excess:
+        es.add(solph.Sink(label='excess', inputs={bel: solph.Flow()}))
+    if storage is not None:
+        storage = dict(storage)
+        inputs, outputs = storage.pop('inputs', {}), storage.pop('outputs', {})
+        es.add(solph.components.GenericStorage(
+            label='storage', inputs={bel: solph.Flow(**inputs)},
+            outputs={bel: solph.Flow(**outputs)}, **storage))
+    return es
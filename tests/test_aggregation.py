@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -
+
+"""Tests of the time series aggregation.
+
+SPDX-License-Identifier: MIT
+"""
+
+import numpy as np
+import pytest
+from energysystems import single_bus
+from oemof import solph
+from oemof.solph import aggregation
+
+
+def _energysystem(days=6, investment=False):
+    periods = 24 * days
+    hours = np.arange(periods)
+    pv = np.clip(np.sin(hours / 24 * 2 * np.pi - np.pi / 2), 0, None) * (
+        1 + 0.5 * np.sin(hours / periods * 2 * np.pi))
+    if investment:
+        storage = {'investment': solph.Investment(ep_costs=20),
+                   'invest_relation_input_capacity': 1 / 6,
+                   'invest_relation_output_capacity': 1 / 6}
+    else:
+        storage = {'nominal_storage_capacity': 30,
+                   'initial_storage_level': 0.2}
+    return single_bus(
+        periods=periods,
+        demand={'nominal_value': 3, 'fix': 0.7 + 0.3 * np.sin(hours / 5)},
+        grid={'variable_costs': list(20 + 5 * np.cos(hours / 7))},
+        sources={'pv': {'nominal_value': 10, 'max': pv}}, excess=True,
+        storage=dict(storage, loss_rate=0.01, inputs={'nominal_value': 5},
+                     outputs={'nominal_value': 5}))
+
+
+def test_kmeans_and_kmedoids():
+    data = np.array([[0, 0], [0.1, 0], [5, 5], [5, 5.2], [5.1, 5]])
+    labels, centers = aggregation.kmeans(data, 2)
+    assert len(set(labels[:2])) == len(set(labels[2:])) == 1
+    assert labels[0] != labels[2]
+    assert np.allclose(centers[labels[0]], [0.05, 0])
+
+    labels, medoids = aggregation.kmedoids(data, 2)
+    assert len(set(labels[:2])) == len(set(labels[2:])) == 1
+    assert sorted(medoids)[1] == 2
+    assert (labels[medoids] == [0, 1]).all()
+
+
+def test_typical_periods():
+    es = _energysystem()
+    tsa = aggregation.TimeSeriesAggregation(es, 24, 2)
+    assert tsa.weights.sum() == 6
+    assert len(tsa.order) == 6
+    values = np.arange(6 * 24)
+    typical = tsa.aggregate(values)
+    assert len(typical) == 2 * 24
+    assert (typical[:24] == values[tsa.medoids[0] * 24:][:24]).all()
+    assert (tsa.expand(typical)[tsa.medoids[1] * 24:][:24] ==
+            typical[24:]).all()
+
+    with tsa.aggregated():
+        assert len(es.timeindex) == 48
+        assert len(es.flows()[es.groups['grid'],
+                              es.groups['bel']].variable_costs) == 48
+    assert len(es.timeindex) == 6 * 24
+
+    with pytest.raises(ValueError, match='multiple'):
+        aggregation.TimeSeriesAggregation(es, 25, 2)
+    with pytest.raises(ValueError, match='between'):
+        aggregation.TimeSeriesAggregation(es, 24, 7)
+
+
+def test_sequences_longer_than_the_timeindex():
+    es = _energysystem()
+    grid = es.flows()[es.groups['grid'], es.groups['bel']]
+    costs = np.arange(7 * 24)
+    # the costs are longer than the time index, as allowed in a Model
+    grid.variable_costs = solph.sequence(costs)
+    tsa = aggregation.TimeSeriesAggregation(es, 24, 2)
+    with tsa.aggregated():
+        assert list(grid.variable_costs) == list(
+            tsa.aggregate(costs[:6 * 24]))
+
+
+@pytest.mark.parametrize('investment', [False, True])
+def test_all_periods_equal_model(investment):
+    # with one typical period per period, the linked storage gives the
+    # objective of the full model
+    es = _energysystem(investment=investment)
+    om = solph.Model(es)
+    om.solve('cbc')
+
+    tsa = aggregation.TimeSeriesAggregation(es, 24, 6)
+    with tsa.aggregated():
+        typical = tsa.model()
+        typical.solve('cbc')
+        results = tsa.results(typical)
+    assert typical.objective() == pytest.approx(om.objective())
+
+    storage = es.groups['storage']
+    content = results[storage, None]['sequences']['storage_content']
+    assert (content.index == es.timeindex).all()
+    if not investment:
+        # balanced storage with an initial content of 0.2 * 30
+        assert content.iloc[-1] == pytest.approx(6)
+        assert content.min() >= -1e-6
+        assert content.max() <= 30 + 1e-6
+
+
+def test_solve_typical_periods():
+    es = _energysystem()
+    results = aggregation.solve(es, 24, 2, method='kmeans', solver='cbc')
+    storage = es.groups['storage']
+    content = results[storage, None]['sequences']['storage_content']
+    assert len(content) == 6 * 24
+    assert content.min() >= -1e-6
+    assert content.max() <= 30 + 1e-6
+    flow = results[es.groups['bel'], es.groups['demand']]['sequences']
+    assert len(flow) == 6 * 24
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -
+
+"""Tests of the structural model cache.
+
+SPDX-License-Identifier: MIT
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from energysystems import single_bus
+from oemof import solph
+from oemof.solph import cache
+from oemof.solph import views
+
+
+def _energysystem(day=0, nominal_value=10, min_cheap=0.2):
+    hours = np.arange(24) + 24 * day
+    return single_bus(
+        start=pd.Timestamp('1/1/2020') + pd.Timedelta(days=day),
+        demand={'nominal_value': 5,
+                'fix': 0.5 + 0.3 * np.sin(hours / 5 + day)},
+        grid={'variable_costs': list(20 + 5 * np.cos(hours / 7 + day))},
+        sources={
+            'pv': {'nominal_value': nominal_value,
+                   'max': np.clip(np.sin(hours / 24 * 2 * np.pi), 0, None)},
+            'cheap': {'nominal_value': 2, 'min': min_cheap,
+                      'variable_costs': 10, 'nonconvex': solph.NonConvex()}},
+        excess=True)
+
+
+def test_structural_key_ignores_time_series():
+    key = cache.structural_key(_energysystem())
+    assert cache.structural_key(_energysystem(day=1)) == key
+    assert cache.structural_key(_energysystem(nominal_value=12)) != key
+    # sequences of nonconvex flows are part of their constraints
+    assert cache.structural_key(_energysystem(min_cheap=0.3)) != key
+    assert cache.structural_key(_energysystem(), timeincrement=2) != key
+
+
+def test_hit_refreshes_time_series():
+    models = cache.ModelCache()
+    om = models.model(_energysystem())
+    om.solve('cbc')
+    es = _energysystem(day=1)
+    assert models.model(es) is om
+    assert models.cache_info() == (1, 1, 8, 1)
+    om.solve('cbc')
+
+    reference = solph.Model(es)
+    reference.solve('cbc')
+    assert om.objective() == pytest.approx(reference.objective())
+    assert om.es.timeindex.equals(es.timeindex)
+    pd.testing.assert_frame_equal(
+        views.node(om.results(), 'bel')['sequences'],
+        views.node(reference.results(), 'bel')['sequences'])
+
+
+def test_least_recently_used_model_is_dropped():
+    models = cache.ModelCache(maxsize=2)
+    first = models.model(_energysystem())
+    models.model(_energysystem(nominal_value=11))
+    models.model(_energysystem(day=2))
+    models.model(_energysystem(nominal_value=12))
+    assert models.cache_info() == (1, 3, 2, 2)
+    assert models.model(_energysystem()) is first
+    assert models.model(_energysystem(nominal_value=11)) is not None
+    assert models.cache_info().misses == 4
+
+
+def test_persisted_models(tmpdir):
+    directory = str(tmpdir.join('models'))
+    models = cache.ModelCache(maxsize=1, directory=directory)
+    models.model(_energysystem())
+    models.model(_energysystem(nominal_value=11))
+    assert len(os.listdir(directory)) == 1
+
+    models = cache.ModelCache(directory=directory)
+    om = models.model(_energysystem(day=3, nominal_value=11))
+    assert models.cache_info().hits == 1
+    om.solve('cbc')
+    reference = solph.Model(_energysystem(day=3, nominal_value=11))
+    reference.solve('cbc')
+    assert om.objective() == pytest.approx(reference.objective())
+
+    models.clear()
+    assert os.listdir(directory) == []
+    assert models.cache_info().currsize == 0
+
+
+def test_unreadable_file_is_a_miss(tmpdir):
+    directory = str(tmpdir.join('models'))
+    models = cache.ModelCache(directory=directory)
+    models.model(_energysystem())
+    name, = os.listdir(directory)
+    path = os.path.join(directory, name)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:len(data) // 2])
+
+    models = cache.ModelCache(directory=directory)
+    om = models.model(_energysystem())
+    assert models.cache_info().misses == 1
+    assert om.flows
+    # the broken file is replaced and no temporary files are left
+    assert os.listdir(directory) == [name]
+    with open(path, 'rb') as f:
+        assert f.read() != data[:len(data) // 2]
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError, match="at least 1"):
+        cache.ModelCache(maxsize=0)
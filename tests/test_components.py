@@ -11,10 +11,14 @@ SPDX-License-Identifier: MIT
 
 import warnings
 
+import numpy as np
+import pandas as pd
 import pytest
 from oemof.solph import Bus
+from oemof.solph import EnergySystem
 from oemof.solph import Flow
 from oemof.solph import Investment
+from oemof.solph import Model
 from oemof.solph import NonConvex
 from oemof.solph import components
 from oemof.tools.debugging import SuspiciousUsageWarning
@@ -252,3 +256,67 @@ def test_generic_chp_without_warning():
            Q_CW_min=[10.552])},
        Beta=[0.122], back_pressure=False)
     warnings.filterwarnings("always", category=SuspiciousUsageWarning)
+
+
+def _generic_chp(**electrical):
+    return components.GenericCHP(
+        label='chp',
+        fuel_input={Bus(label='gas'): Flow(H_L_FG_share_max=0.183)},
+        electrical_output={Bus(label='el'): Flow(**electrical)},
+        heat_output={Bus(label='heat'): Flow(Q_CW_min=10.552)},
+        Beta=0.122, back_pressure=False)
+
+
+def test_generic_chp_alphas():
+    """The alphas solve the equations at minimal and maximal load."""
+    p_min, p_max = np.array([68.787, 50]), np.array([155.946, 160])
+    eta_min, eta_max = np.array([0.444, 0.4]), np.array([0.525, 0.5])
+    chp = _generic_chp(P_max_woDH=p_max, P_min_woDH=list(p_min),
+                       Eta_el_max_woDH=eta_max, Eta_el_min_woDH=eta_min)
+    for t in range(2):
+        expected = np.linalg.solve([[1, p_min[t]], [1, p_max[t]]],
+                                   [p_min[t] / eta_min[t],
+                                    p_max[t] / eta_max[t]])
+        assert [chp.alphas[0][t], chp.alphas[1][t]] == pytest.approx(
+            expected, rel=1e-15)
+
+
+def test_generic_chp_scalar_alphas():
+    chp = _generic_chp(P_max_woDH=200, P_min_woDH=[100, 100],
+                       Eta_el_max_woDH=0.44, Eta_el_min_woDH=0.4)
+    assert len(chp.alphas[0]) == 2
+    chp = _generic_chp(P_max_woDH=200, P_min_woDH=100,
+                       Eta_el_max_woDH=0.44, Eta_el_min_woDH=0.4)
+    assert chp.alphas[1][0] == chp.alphas[1][8759] == pytest.approx(
+        (200 / 0.44 - 100 / 0.4) / 100)
+
+
+def test_generic_chp_alphas_of_different_dimension():
+    chp = _generic_chp(P_max_woDH=[200, 200], P_min_woDH=[100],
+                       Eta_el_max_woDH=0.44, Eta_el_min_woDH=0.4)
+    with pytest.raises(ValueError, match="must be of same dimension"):
+        chp.alphas
+
+
+@pytest.mark.parametrize('share_min, constraints', [
+    (None, 0), (0, 0), ([0.41, 0.41, 0.41], 3)])
+def test_generic_chp_minimum_flue_gas_losses(share_min, constraints):
+    """Minimum flue gas losses are only constrained if the share is set."""
+    fuel = {'H_L_FG_share_max': 0.18}
+    if share_min is not None:
+        fuel['H_L_FG_share_min'] = share_min
+    buses = [Bus(label='gas'), Bus(label='el'), Bus(label='heat')]
+    chp = components.GenericCHP(
+        label='chp',
+        fuel_input={buses[0]: Flow(**fuel)},
+        electrical_output={buses[1]: Flow(
+            P_max_woDH=200, P_min_woDH=100,
+            Eta_el_max_woDH=0.44, Eta_el_min_woDH=0.4)},
+        heat_output={buses[2]: Flow(Q_CW_min=0)},
+        Beta=0, back_pressure=True)
+    es = EnergySystem(timeindex=pd.date_range('1/1/2020', periods=3,
+                                              freq='H'))
+    es.add(*buses, chp)
+    block = Model(es).GenericCHPBlock
+    assert len(block.H_L_FG_min_def) == constraints
+    assert len(block.Q_min_res) == constraints
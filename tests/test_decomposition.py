@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -
+
+"""Tests of the Benders decomposition of investment models.
+
+SPDX-License-Identifier: MIT
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from energysystems import single_bus
+from oemof import solph
+from oemof.solph import decomposition
+from oemof.solph import processing
+
+
+def _energysystem(periods=48, storage=False):
+    hours = np.arange(periods)
+    if storage:
+        storage = {
+            'inputs': {'investment': solph.Investment(ep_costs=1)},
+            'outputs': {'investment': solph.Investment(ep_costs=1)},
+            'loss_rate': 0.01, 'invest_relation_input_capacity': 1 / 6,
+            'invest_relation_output_capacity': 1 / 6,
+            'investment': solph.Investment(ep_costs=3)}
+    return single_bus(
+        periods=periods,
+        demand={'nominal_value': 10, 'fix': 0.5 + 0.4 * np.sin(hours / 7)},
+        sources={
+            'wind': {'max': np.random.RandomState(0).uniform(0, 1, periods),
+                     'investment': solph.Investment(ep_costs=20)},
+            'pv': {'max': np.clip(np.sin(hours / 24 * 2 * np.pi), 0, None),
+                   'investment': solph.Investment(
+                       ep_costs=15, maximum=30, minimum=5, nonconvex=True,
+                       offset=40)},
+            'gas': {'variable_costs': 8}},
+        excess=True, storage=storage or None)
+
+
+def _reference(es):
+    om = solph.Model(es)
+    om.solve('cbc')
+    return processing.convert_keys_to_strings(om.results())
+
+
+def _assert_results_equal(results, reference):
+    results = processing.convert_keys_to_strings(results)
+    # the sequences of the buses are their duals
+    assert 'duals' in results.pop(('bel', 'None'))['sequences']
+    assert sorted(results) == sorted(reference)
+    for k, v in reference.items():
+        if 'invest' in v['scalars']:
+            assert results[k]['scalars']['invest'] == pytest.approx(
+                v['scalars']['invest'], abs=1e-4)
+    pd.testing.assert_series_equal(
+        results['gas', 'bel']['sequences']['flow'],
+        reference['gas', 'bel']['sequences']['flow'], atol=1e-4)
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_time_slices_equal_model(processes):
+    reference = _reference(_energysystem())
+    es = _energysystem()
+    results = decomposition.solve(es, window=12, processes=processes,
+                                  tolerance=1e-6, solver='cbc')
+    _assert_results_equal(results, reference)
+    assert len(es.timeindex) == 48
+    assert results[es.groups['gas'], es.groups['bel']][
+        'sequences'].index.equals(es.timeindex)
+
+
+def test_timeincrement_is_sliced():
+    timeincrement = [1] * 24 + [2] * 24
+    om = solph.Model(_energysystem(), timeincrement=timeincrement)
+    om.solve('cbc')
+    reference = processing.convert_keys_to_strings(om.results())
+    results = decomposition.solve(
+        _energysystem(), window=12, tolerance=1e-6, solver='cbc',
+        model_kwargs={'timeincrement': timeincrement})
+    _assert_results_equal(results, reference)
+
+
+def test_sequences_longer_than_the_timeindex():
+    def energysystem():
+        es = _energysystem()
+        # the costs are longer than the time index, as allowed in a Model
+        es.flows()[es.groups['gas'], es.groups['bel']].variable_costs = (
+            solph.sequence([8] * 24 + [30] * 24 + [0] * 48))
+        return es
+
+    reference = _reference(energysystem())
+    results = decomposition.solve(energysystem(), window=12,
+                                  tolerance=1e-6, solver='cbc')
+    _assert_results_equal(results, reference)
+
+
+def test_single_slice_with_storage_equals_model():
+    reference = _reference(_energysystem(storage=True))
+    results = decomposition.solve(_energysystem(storage=True), window=48,
+                                  tolerance=1e-6, solver='cbc')
+    _assert_results_equal(results, reference)
+
+
+def test_no_investment_or_nonconvex_flows():
+    es = _energysystem()
+    with pytest.raises(ValueError, match='no investment'):
+        decomposition.solve(solph.EnergySystem(timeindex=es.timeindex))
+    es.add(solph.Source(label='plant', outputs={es.groups['bel']: solph.Flow(
+        nominal_value=5, min=0.5, nonconvex=solph.NonConvex())}))
+    with pytest.raises(ValueError, match='have to be linear'):
+        decomposition.solve(es)
+
+
+def test_not_converged():
+    with pytest.warns(UserWarning, match='did not converge'):
+        decomposition.solve(_energysystem(), window=12, max_iterations=1,
+                            solver='cbc')
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -
+
+"""Tests of the instrumentation hooks and the metrics sink.
+
+SPDX-License-Identifier: MIT
+"""
+
+import json
+import logging
+
+import pandas as pd
+import pytest
+from oemof import solph
+from oemof.solph import instrumentation
+
+
+def _energysystem():
+    es = solph.EnergySystem(
+        timeindex=pd.date_range('1/1/2020', periods=3, freq='H'))
+    bel = solph.Bus(label='bel')
+    es.add(bel)
+    es.add(solph.Sink(label='demand', inputs={bel: solph.Flow(
+        nominal_value=10, fix=[0.5, 1, 0.2])}))
+    es.add(solph.Source(label='source', outputs={bel: solph.Flow(
+        variable_costs=2)}))
+    return es
+
+
+@pytest.fixture
+def events():
+    recorded = []
+
+    def record(event, metrics, labels):
+        recorded.append((event, metrics, labels))
+    instrumentation.register(record)
+    yield recorded
+    instrumentation.unregister(record)
+
+
+def test_events(events):
+    om = solph.Model(_energysystem())
+    om.solve('cbc')
+    solph.processing.results(om)
+    assert [e[0] for e in events] == ['construct', 'solve', 'results']
+
+    construct, solve, results = (e[1:] for e in events)
+    assert construct[0]['variables'] == 6
+    assert construct[0]['constraints'] == 3
+    assert construct[0]['nonzeros'] == 6
+    assert construct[0]['timesteps'] == 3
+    assert construct[0]['nodes'] == 3
+    assert construct[1] == {'model': 'Model'}
+    assert solve[0]['objective'] == pytest.approx(2 * 17)
+    assert solve[0]['time_seconds'] >= solve[0]['solver_time_seconds']
+    assert solve[1]['termination_condition'] == 'optimal'
+    assert solve[1]['solver'] == 'cbc'
+    assert results[0]['entries'] == 2
+    for _, metrics, _ in events:
+        assert metrics['time_seconds'] > 0
+        assert metrics['peak_memory_bytes'] > 0
+
+
+def test_event_of_an_exception(events):
+    om = solph.Model(_energysystem())
+    with pytest.raises(ValueError):
+        om.solve('cbc', solver_io='memory')
+    assert events[-1][0] == 'solve'
+    assert events[-1][2]['error'] == 'ValueError'
+
+
+def test_failing_callback(caplog):
+    def broken(event, metrics, labels):
+        raise RuntimeError('broken sink')
+
+    instrumentation.register(broken, events='construct')
+    # logging may be disabled by other tests
+    disabled = logging.root.manager.disable
+    logging.disable(logging.NOTSET)
+    try:
+        with caplog.at_level(logging.WARNING):
+            solph.Model(_energysystem())
+    finally:
+        instrumentation.unregister(broken)
+        logging.disable(disabled)
+    assert 'failed for the event' in caplog.text
+    assert instrumentation.hooks('construct') == []
+
+
+def test_not_measured_without_callbacks():
+    with instrumentation.measure('solve') as measurement:
+        assert measurement is None
+    with pytest.raises(ValueError, match='Unknown instrumentation events'):
+        instrumentation.register(print, events=['build'])
+
+
+def test_json_lines_sink(tmpdir):
+    path = str(tmpdir.join('metrics.jsonl'))
+    sink = instrumentation.register(instrumentation.MetricsFileSink(
+        path, labels={'run': 7}))
+    try:
+        for _ in range(2):
+            om = solph.Model(_energysystem())
+            om.solve('cbc')
+    finally:
+        instrumentation.unregister(sink)
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert [r['event'] for r in records] == ['construct', 'solve'] * 2
+    assert records[0]['labels'] == {'run': '7', 'model': 'Model'}
+    assert records[1]['metrics']['objective'] == pytest.approx(34)
+
+
+def test_prometheus_sink(tmpdir):
+    path = str(tmpdir.join('solph.prom'))
+    sink = instrumentation.MetricsFileSink(path, 'prometheus',
+                                           labels={'job': 'a"b'})
+    sink('solve', {'time_seconds': 2.5, 'objective': float('inf')},
+         {'model': 'Model'})
+    sink('solve', {'time_seconds': 1.5}, {'model': 'Model'})
+    with open(path) as f:
+        lines = f.read().splitlines()
+    labels = '{job="a\\"b",model="Model"}'
+    assert '# TYPE oemof_solph_solve_time_seconds gauge' in lines
+    assert 'oemof_solph_solve_time_seconds' + labels + ' 1.5' in lines
+    assert 'oemof_solph_solve_objective' + labels + ' +Inf' in lines
+    assert '# TYPE oemof_solph_solve_total counter' in lines
+    assert 'oemof_solph_solve_total' + labels + ' 2.0' in lines
+
+    with pytest.raises(ValueError, match='Unknown metrics file format'):
+        instrumentation.MetricsFileSink(path, 'csv')
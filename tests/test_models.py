@@ -9,12 +9,16 @@ available from its original location oemof/tests/basic_tests.py
 SPDX-License-Identifier: MIT
 """
 
+import gzip
+import json
 import warnings
 
 import pandas as pd
+import pyomo.environ as po
 import pytest
 from oemof import solph
 from oemof.solph.helpers import calculate_timeincrement
+from pyomo.core.expr.numeric_expr import LinearExpression
 
 
 def test_timeincrement_with_valid_timeindex():
@@ -113,3 +117,477 @@ def test_infeasible_model():
             m.solve(solver='cbc')
             assert "Optimization ended with status" in str(w[0].message)
             solph.processing.meta_results(m)
+
+
+def test_flow_bounds():
+    es = solph.EnergySystem(timeindex=[1, 2, 3])
+    bel = solph.Bus(label='bus')
+    es.add(bel)
+    es.add(solph.Sink(label='fixed', inputs={bel: solph.Flow(
+        nominal_value=5, fix=pd.Series([1, 0.5, 0.25]))}))
+    es.add(solph.Sink(label='unbounded', inputs={bel: solph.Flow()}))
+    es.add(solph.Source(label='bounded', outputs={bel: solph.Flow(
+        nominal_value=4, min=[0.25, 0.5, 0.75, 1], max=0.9)}))
+    es.add(solph.Source(label='nonconvex', outputs={bel: solph.Flow(
+        nominal_value=2, min=0.5, nonconvex=solph.NonConvex())}))
+    m = solph.models.Model(es, timeincrement=1)
+
+    def bounds(label):
+        flow = [k for k in m.FLOWS if label in (str(k[0]), str(k[1]))][0]
+        return [(m.flow[flow, t].lb, m.flow[flow, t].ub,
+                 m.flow[flow, t].value, m.flow[flow, t].fixed)
+                for t in m.TIMESTEPS]
+
+    assert bounds('fixed') == [(None, None, 5, True),
+                               (None, None, 2.5, True),
+                               (None, None, 1.25, True)]
+    assert bounds('unbounded') == [(0, None, None, False)] * 3
+    assert bounds('bounded') == [(1, 3.6, None, False),
+                                 (2, 3.6, None, False),
+                                 (3, 3.6, None, False)]
+    assert bounds('nonconvex') == [(0, 2, None, False)] * 3
+
+
+def _nonconvex_energysystem():
+    es = solph.EnergySystem(timeindex=[1, 2, 3])
+    bel = solph.Bus(label='bus')
+    es.add(bel)
+    es.add(solph.Sink(label='demand', inputs={bel: solph.Flow(
+        nominal_value=5, fix=[1, 0.5, 0.1])}))
+    es.add(solph.Source(label='cheap', outputs={bel: solph.Flow(
+        nominal_value=5, min=0.4, variable_costs=1,
+        nonconvex=solph.NonConvex())}))
+    es.add(solph.Source(label='expensive', outputs={bel: solph.Flow(
+        variable_costs=5)}))
+    return es
+
+
+def test_linear_problem():
+    m = solph.models.Model(_nonconvex_energysystem(), timeincrement=1)
+    problem = solph.matrix.LinearProblem(m)
+    assert problem.num_col == 4 * 3
+    assert problem.num_row == len(problem.row_lower) == 3 * 3
+    assert len(problem.a_start) == problem.num_row + 1
+    assert problem.integrality.sum() == 3
+    assert sorted(problem.col_cost) == [0] * 6 + [1, 1, 1, 5, 5, 5]
+    # bus balance: cheap + expensive - demand == 0
+    row = [id(c) for c in problem.constraints].index(
+        id(m.Bus.balance[m.es.groups['bus'], 0]))
+    assert problem.row_lower[row] == problem.row_upper[row] == 0
+    # fixed demand flows are columns with equal bounds
+    bus, demand = m.es.groups['bus'], m.es.groups['demand']
+    col = [id(v) for v in problem.variables].index(
+        id(m.flow[bus, demand, 0]))
+    assert problem.col_lower[col] == problem.col_upper[col] == 5
+    assert m.flow[bus, demand, 0].fixed
+
+
+def test_to_matrix():
+    pytest.importorskip('scipy')
+    m = solph.models.Model(_nonconvex_energysystem(), timeincrement=1)
+    problem = m.to_matrix()
+    a = problem.matrix
+    assert a.shape == (problem.num_row, problem.num_col)
+    assert a.nnz == problem.num_nz
+    bus, demand = m.es.groups['bus'], m.es.groups['demand']
+    col = problem.column_map['flow', (bus, demand, 2)]
+    assert problem.variables[col] is m.flow[bus, demand, 2]
+    row = problem.row_map['Bus.balance', (bus, 2)]
+    assert problem.constraints[row] is m.Bus.balance[bus, 2]
+    assert a[row, col] == -1
+    assert ('NonConvexFlow.status', (m.es.groups['cheap'], bus, 0)) in (
+        problem.column_map)
+
+
+@pytest.mark.parametrize('filename', ['model.lp', 'model.mps'])
+@pytest.mark.parametrize('symbolic_labels', [False, True])
+def test_write_matrix(tmpdir, filename, symbolic_labels):
+    highspy = pytest.importorskip('highspy')
+    m = solph.models.Model(_nonconvex_energysystem(), timeincrement=1)
+    path = str(tmpdir.join(filename))
+    m.to_matrix().write(path, symbolic_labels=symbolic_labels)
+    highs = highspy.Highs()
+    highs.setOptionValue('output_flag', False)
+    highs.readModel(path)
+    highs.run()
+    assert highs.getLp().num_col_ == 12
+    m.solve('cbc')
+    assert highs.getInfo().objective_function_value == pytest.approx(
+        m.objective())
+
+
+def test_write_matrix_compressed(tmpdir):
+    m = solph.models.Model(_nonconvex_energysystem(), timeincrement=1)
+    problem = m.to_matrix()
+    problem.write(str(tmpdir.join('model.mps')), chunk_size=7)
+    problem.write(str(tmpdir.join('model.mps.gz')))
+    with gzip.open(str(tmpdir.join('model.mps.gz')), 'rt') as f:
+        assert f.read() == tmpdir.join('model.mps').read()
+
+
+def test_write_symbolic_labels_like_pyomo(tmpdir):
+    m = solph.models.Model(_nonconvex_energysystem(), timeincrement=1)
+    m.write(str(tmpdir.join('pyomo.lp')),
+            io_options={'symbolic_solver_labels': True})
+    m.to_matrix().write(str(tmpdir.join('model.lp')), symbolic_labels=True)
+    assert ('c_e_Bus_balance(bus_0)_:' in
+            tmpdir.join('pyomo.lp').read().split('\n'))
+    assert ('c_e_Bus_balance(bus_0)_:' in
+            tmpdir.join('model.lp').read().split('\n'))
+
+
+def test_constraints_of_standard_blocks_are_flat():
+    m = solph.models.Model(_nonconvex_energysystem(), timeincrement=1)
+    bus, cheap = m.es.groups['bus'], m.es.groups['cheap']
+    assert isinstance(m.Bus.balance[bus, 0].body, LinearExpression)
+    assert isinstance(m.NonConvexFlow.max[cheap, bus, 0].body,
+                      LinearExpression)
+
+
+def test_solve_native_writer_with_duals():
+    es = _nonconvex_energysystem()
+    reference = solph.models.Model(es, timeincrement=1)
+    reference.receive_duals()
+    reference.relax_problem()
+    reference.solve('cbc')
+    m = solph.models.Model(es, timeincrement=1)
+    m.receive_duals()
+    m.relax_problem()
+    m.solve('cbc', native_writer=True)
+    assert m.objective() == pytest.approx(reference.objective())
+    bus = es.groups['bus']
+    # the dual of the first time step is degenerate (cheap source at its
+    # nominal value), compare the unique ones
+    for t in range(1, 3):
+        assert m.dual[m.Bus.balance[bus, t]] == pytest.approx(
+            reference.dual[reference.Bus.balance[bus, t]])
+
+
+def test_write_matrix_unknown_format():
+    m = solph.models.Model(_nonconvex_energysystem(), timeincrement=1)
+    with pytest.raises(ValueError, match="Unknown file format"):
+        m.to_matrix().write('model.txt')
+
+
+def test_solve_in_memory():
+    pytest.importorskip('highspy')
+    es = _nonconvex_energysystem()
+    reference = solph.models.Model(es, timeincrement=1)
+    reference.solve('cbc')
+    m = solph.models.Model(es, timeincrement=1)
+    m.solve('highs', solver_io='memory')
+    assert m.objective() == pytest.approx(reference.objective())
+    results = m.results()
+    for k, v in reference.results().items():
+        pd.testing.assert_frame_equal(results[k]['sequences'],
+                                      v['sequences'], atol=1e-6)
+    meta = solph.processing.meta_results(m)
+    assert meta['solver']['Termination condition'] == 'optimal'
+
+
+def test_solve_in_memory_wrong_solver():
+    es = _nonconvex_energysystem()
+    m = solph.models.Model(es, timeincrement=1)
+    with pytest.raises(ValueError, match="only available for the 'highs'"):
+        m.solve('cbc', solver_io='memory')
+
+
+def test_update_parameters():
+    es = _nonconvex_energysystem()
+    bus = es.groups['bus']
+    expensive = es.groups['expensive']
+    demand = es.groups['demand']
+    m = solph.models.Model(es, timeincrement=1)
+    m.update_parameters({(expensive, bus): {'variable_costs': [1, 2, 3],
+                                            'max': 0.5,
+                                            'nominal_value': 4},
+                         (bus, demand): {'fix': [1, 1, 1]}})
+    assert [m.flow[expensive, bus, t].ub for t in m.TIMESTEPS] == [2] * 3
+    assert [m.flow[bus, demand, t].value for t in m.TIMESTEPS] == [5] * 3
+    assert str(m.objective.expr).count('flow') == 6
+
+    m.update_parameters({(bus, demand): {'fix': None, 'min': 0.2}})
+    assert not m.flow[bus, demand, 0].fixed
+    assert m.flow[bus, demand, 0].lb == 1
+
+    with pytest.raises(ValueError, match='cannot be updated'):
+        m.update_parameters({(bus, demand): {'summed_max': 3}})
+    with pytest.raises(ValueError, match='nonconvex'):
+        m.update_parameters({(es.groups['cheap'], bus): {'max': 0.5}})
+
+
+def _summed_max_energysystem(nominal_value):
+    es = solph.EnergySystem(timeindex=[1, 2, 3])
+    bel = solph.Bus(label='bus')
+    es.add(bel)
+    es.add(solph.Sink(label='demand', inputs={bel: solph.Flow(
+        nominal_value=10, fix=[1, 1, 1])}))
+    es.add(solph.Source(label='cheap', outputs={bel: solph.Flow(
+        nominal_value=nominal_value, summed_max=1, variable_costs=1,
+        positive_gradient={'ub': 0.5, 'costs': 0})}))
+    es.add(solph.Source(label='expensive', outputs={bel: solph.Flow(
+        variable_costs=10)}))
+    return es
+
+
+@pytest.mark.parametrize('solver_io', ['lp', 'memory'])
+def test_update_nominal_value_of_summed_and_gradient_flows(solver_io):
+    solver = 'highs' if solver_io == 'memory' else 'cbc'
+    if solver == 'highs':
+        pytest.importorskip('highspy')
+    es = _summed_max_energysystem(5)
+    cheap = (es.groups['cheap'], es.groups['bus'])
+    m = solph.models.Model(es, timeincrement=1)
+    m.solve(solver, solver_io=solver_io)
+    assert m.objective() == pytest.approx(255)
+
+    m.update_parameters({cheap: {'nominal_value': 20}})
+    assert m.Flow.summed_max[cheap].upper == 20
+    assert m.Flow.positive_gradient[cheap + (1,)].ub == 10
+    m.resolve()
+    reference = solph.models.Model(_summed_max_energysystem(20),
+                                   timeincrement=1)
+    reference.solve('cbc')
+    assert reference.objective() == pytest.approx(120)
+    assert m.objective() == pytest.approx(reference.objective())
+
+    with pytest.raises(ValueError, match='not from or to None'):
+        m.update_parameters({cheap: {'nominal_value': None}})
+
+
+@pytest.mark.parametrize('solver_io, native_writer, presolve', [
+    ('lp', False, False), ('memory', False, False), ('lp', True, False),
+    ('mps', True, False), ('memory', False, True), ('lp', False, True)])
+def test_resolve(solver_io, native_writer, presolve):
+    solver = 'highs' if solver_io == 'memory' else 'cbc'
+    if solver == 'highs':
+        pytest.importorskip('highspy')
+    es = _nonconvex_energysystem()
+    bus = es.groups['bus']
+    demand = es.groups['demand']
+    m = solph.models.Model(es, timeincrement=1)
+    with pytest.raises(ValueError, match='has to be solved'):
+        m.resolve()
+    m.solve(solver, solver_io=solver_io, native_writer=native_writer,
+            presolve=presolve)
+    for costs, fix in [(2, [1, 1, 1]), (10, [0.5, 0.2, 0.1])]:
+        m.update_parameters({(es.groups['expensive'], bus): {
+            'variable_costs': costs}, (bus, demand): {'fix': fix}})
+        m.resolve()
+        reference = solph.models.Model(es, timeincrement=1)
+        reference.solve('cbc')
+        assert m.objective() == pytest.approx(reference.objective())
+        for k, v in reference.results().items():
+            pd.testing.assert_frame_equal(m.results()[k]['sequences'],
+                                          v['sequences'], atol=1e-6)
+
+
+def _chain_energysystem():
+    es = solph.EnergySystem(timeindex=[1, 2, 3])
+    gas, heat, bel = (solph.Bus(label=label)
+                      for label in ('gas', 'heat', 'bel'))
+    es.add(gas, heat, bel)
+    es.add(solph.Source(label='gas_source', outputs={gas: solph.Flow(
+        variable_costs=30)}))
+    es.add(solph.Transformer(
+        label='boiler', inputs={gas: solph.Flow()},
+        outputs={heat: solph.Flow()}, conversion_factors={heat: 0.9}))
+    es.add(solph.Transformer(
+        label='heat_pump', inputs={heat: solph.Flow()},
+        outputs={bel: solph.Flow(nominal_value=8)},
+        conversion_factors={bel: 0.5}))
+    es.add(solph.Source(label='cheap', outputs={bel: solph.Flow(
+        nominal_value=3, variable_costs=10)}))
+    es.add(solph.Source(label='expensive', outputs={bel: solph.Flow(
+        variable_costs=100)}))
+    es.add(solph.Sink(label='demand', inputs={bel: solph.Flow(
+        nominal_value=10, fix=[0.5, 1.2, 0.2])}))
+    return es
+
+
+@pytest.mark.parametrize('solver, solver_io', [
+    ('cbc', 'lp'), ('highs', 'memory')])
+def test_presolve(solver, solver_io):
+    if solver == 'highs':
+        pytest.importorskip('highspy')
+    es = _chain_energysystem()
+    reference = solph.models.Model(es, timeincrement=1)
+    reference.receive_duals()
+    reference.solve('cbc')
+    m = solph.models.Model(es, timeincrement=1)
+    m.receive_duals()
+    m.solve(solver, solver_io=solver_io, presolve=True)
+
+    problem = m._solver_interface.problem
+    assert isinstance(problem, solph.matrix.PresolvedProblem)
+    # the fixed demand and the chain of transformers and buses are removed,
+    # the balances of the electricity bus are kept
+    assert (problem.num_row, problem.original.num_row) == (3, 15)
+    assert (problem.num_col, problem.original.num_col) == (9, 24)
+    assert problem.row_map == {('Bus.balance', (es.groups['bel'], t)): t
+                               for t in range(3)}
+    assert m.objective() == pytest.approx(reference.objective())
+    results = m.results()
+    for k, v in reference.results().items():
+        pd.testing.assert_frame_equal(
+            results[k]['sequences'].drop(columns='duals', errors='ignore'),
+            v['sequences'].drop(columns='duals', errors='ignore'), atol=1e-6)
+    # the duals of the other buses are degenerate, if the heat pump is off
+    bel = es.groups['bel']
+    for t in range(3):
+        assert m.dual[m.Bus.balance[bel, t]] == pytest.approx(
+            reference.dual[reference.Bus.balance[bel, t]])
+
+
+def test_presolve_infeasible_problem():
+    es = _chain_energysystem()
+    island = solph.Bus(label='island')
+    es.add(island)
+    es.add(solph.Source(label='fixed_source', outputs={island: solph.Flow(
+        nominal_value=1, fix=[1, 2, 1])}))
+    es.add(solph.Sink(label='fixed_sink', inputs={island: solph.Flow(
+        nominal_value=1, fix=[1, 1, 1])}))
+    m = solph.models.Model(es, timeincrement=1)
+    with pytest.raises(ValueError, match='infeasible'):
+        m.to_matrix().presolve()
+
+
+def test_linear_problem_infeasible_empty_row():
+    m = solph.models.Model(_nonconvex_energysystem(), timeincrement=1)
+    bus, demand = m.es.groups['bus'], m.es.groups['demand']
+    flow = m.flow[bus, demand, 0]
+    # the variables cancel out, so only the constant is left
+    m.empty_row = po.Constraint(expr=flow - flow + 1 >= 0)
+    assert solph.matrix.LinearProblem(m).num_row == 3 * 3
+    m.del_component(m.empty_row)
+    m.empty_row = po.Constraint(expr=flow - flow + 1 <= 0)
+    with pytest.raises(ValueError, match='infeasible'):
+        solph.matrix.LinearProblem(m)
+
+
+def test_build_profile(tmpdir):
+    es = _nonconvex_energysystem()
+    m = solph.models.Model(es, timeincrement=1)
+    assert m.build_profile is None
+
+    m = solph.models.Model(es, timeincrement=1, profile=True)
+    profile = m.build_profile
+    entries = {(e['name'], e['kind']): e for e in profile.entries}
+    assert [e['name'] for e in profile.entries if e['kind'] == 'phase'] == [
+        'sets', 'variables', 'child_blocks', 'objective']
+    assert entries['variables', 'phase']['variables'] == 3 * 3
+    assert entries['NonConvexFlow', 'block']['variables'] == 3
+    assert entries['Bus', 'block']['constraints'] == 3
+    assert entries['child_blocks', 'phase']['constraints'] == sum(
+        e['constraints'] for e in profile.entries if e['kind'] == 'block')
+    assert ('Flow', 'objective') in entries
+    assert all(e['memory'] > 0 for e in profile.entries
+               if e['kind'] == 'phase')
+    assert 'NonConvexFlow' in str(profile)
+
+    path = str(tmpdir.join('profile.json'))
+    profile.to_json(path)
+    with open(path) as f:
+        assert json.load(f) == profile.to_dict()
+
+
+def test_flat_objective():
+    es = _nonconvex_energysystem()
+    m = solph.models.Model(es, timeincrement=1)
+    assert isinstance(m.objective.expr, LinearExpression)
+    # variable costs of both sources
+    variables = m.objective.expr.linear_vars
+    assert len(variables) == 2 * 3
+
+    # expressions of other blocks are added to the flat expression
+    m.extra = po.Block()
+    m.extra.x = po.Var(bounds=(1, None))
+    m.extra._objective_expression = lambda: 5 * m.extra.x ** 2 + 7
+    m._add_objective(update=True)
+    m.extra.x.value = 1
+    for v in variables:
+        v.value = 0
+    assert po.value(m.objective) == 12
+
+
+def _extended_energysystem(es):
+    bus = es.groups['bus']
+    heat = solph.Bus(label='heat')
+    return [
+        solph.Sink(label='new_demand', inputs={bus: solph.Flow(
+            nominal_value=2, fix=[0.5, 1, 0.2])}),
+        heat,
+        solph.Transformer(
+            label='heat_pump', inputs={bus: solph.Flow()},
+            outputs={heat: solph.Flow(variable_costs=0.1)},
+            conversion_factors={heat: 3}),
+        solph.Sink(label='heat_demand', inputs={heat: solph.Flow(
+            nominal_value=3, fix=[1, 0.2, 0.5])}),
+        solph.components.GenericStorage(
+            label='storage', inputs={bus: solph.Flow()},
+            outputs={bus: solph.Flow()}, nominal_storage_capacity=4,
+            loss_rate=0.1),
+    ]
+
+
+def test_add_nodes():
+    es = _nonconvex_energysystem()
+    m = solph.models.Model(es, timeincrement=1)
+    m.add_nodes(*_extended_energysystem(es))
+
+    reference_es = _nonconvex_energysystem()
+    reference_es.add(*_extended_energysystem(reference_es))
+    reference = solph.models.Model(reference_es, timeincrement=1)
+    for model in [m, reference]:
+        assert model.solve('cbc').solver.termination_condition == 'optimal'
+    assert m.objective() == pytest.approx(reference.objective())
+    for component in [po.Var, po.Constraint]:
+        assert (len(list(m.component_data_objects(component))) ==
+                len(list(reference.component_data_objects(component))))
+    assert [m.flow[es.groups['heat_pump'], es.groups['heat'], t].value
+            for t in m.TIMESTEPS] == pytest.approx([3, 0.6, 1.5])
+
+
+def _investment_storage_energysystem():
+    es = _nonconvex_energysystem()
+    bus = es.groups['bus']
+    es.add(solph.components.GenericStorage(
+        label='storage', inputs={bus: solph.Flow()},
+        outputs={bus: solph.Flow()}, nominal_storage_capacity=None,
+        invest_relation_input_capacity=1, invest_relation_output_capacity=1,
+        investment=solph.Investment(ep_costs=0.1)))
+    return es
+
+
+def _investment_source(es):
+    return solph.Source(label='invest_source', outputs={
+        es.groups['bus']: solph.Flow(variable_costs=[0, 20, 20],
+                                     investment=solph.Investment(ep_costs=1))})
+
+
+def test_add_nodes_recreates_dependent_blocks():
+    es = _investment_storage_energysystem()
+    m = solph.models.Model(es, timeincrement=1)
+    storage_block = m.GenericInvestmentStorageBlock
+    m.add_nodes(_investment_source(es))
+    # the storage block refers to the investment variables of the
+    # InvestmentFlow block, which is created again for the new source
+    assert m.GenericInvestmentStorageBlock is not storage_block
+
+    reference_es = _investment_storage_energysystem()
+    reference_es.add(_investment_source(reference_es))
+    reference = solph.models.Model(reference_es, timeincrement=1)
+    for model in [m, reference]:
+        assert model.solve('cbc').solver.termination_condition == 'optimal'
+    assert m.objective() == pytest.approx(reference.objective())
+
+
+def test_add_nodes_to_unknown_nodes():
+    es = _nonconvex_energysystem()
+    m = solph.models.Model(es, timeincrement=1)
+    with pytest.raises(ValueError, match='already part'):
+        m.add_nodes(es.groups['demand'])
+    with pytest.raises(ValueError, match='not part of the energy system'):
+        m.add_nodes(solph.Sink(label='other', inputs={
+            solph.Bus(label='other_bus'): solph.Flow()}))
+    assert 'other' not in es.groups
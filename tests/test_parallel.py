@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -
+
+"""Tests of the parallel block construction.
+
+SPDX-License-Identifier: MIT
+"""
+
+import numpy as np
+import pandas as pd
+from oemof import solph
+from oemof.solph import blocks
+from oemof.solph import parallel
+from oemof.solph.components import GenericCHPBlock
+from oemof.solph.components import GenericStorageBlock
+
+
+def _energysystem():
+    es = solph.EnergySystem(
+        timeindex=pd.date_range('1/1/2020', periods=6, freq='H'))
+    rng = np.random.RandomState(3)
+    bgas = solph.Bus(label='bgas')
+    bel = solph.Bus(label='bel')
+    bth = solph.Bus(label='bth')
+    es.add(bgas, bel, bth)
+    es.add(solph.Source(label='gas', outputs={bgas: solph.Flow(
+        variable_costs=30)}))
+    es.add(solph.Sink(label='demand', inputs={bel: solph.Flow(
+        nominal_value=50, fix=rng.rand(6))}))
+    for n in range(3):
+        es.add(solph.Transformer(
+            label='pp_{0}'.format(n), inputs={bgas: solph.Flow()},
+            outputs={bel: solph.Flow(), bth: solph.Flow()},
+            conversion_factors={bel: 0.3 + 0.1 * rng.rand(6), bth: 0.5}))
+        es.add(solph.components.GenericStorage(
+            label='storage_{0}'.format(n), inputs={bel: solph.Flow()},
+            outputs={bel: solph.Flow()}, nominal_storage_capacity=20,
+            loss_rate=0.01 * rng.rand(6), fixed_losses_absolute=0.1,
+            inflow_conversion_factor=0.9, outflow_conversion_factor=0.8))
+    es.add(solph.components.GenericCHP(
+        label='chp',
+        fuel_input={bgas: solph.Flow(
+            H_L_FG_share_max=0.18, H_L_FG_share_min=0.41)},
+        electrical_output={bel: solph.Flow(
+            P_max_woDH=200, P_min_woDH=100 * (1 + rng.rand(6)),
+            Eta_el_max_woDH=0.44, Eta_el_min_woDH=0.4)},
+        heat_output={bth: solph.Flow(Q_CW_min=0)},
+        Beta=0, back_pressure=True))
+    return es
+
+
+def test_parallel_build_is_identical(tmpdir):
+    es = _energysystem()
+    lp_files = []
+    for processes in [None, 2]:
+        om = solph.Model(es, build_processes=processes, profile=True)
+        lp_files.append(str(tmpdir.join('{0}.lp'.format(processes))))
+        om.write(lp_files[-1], io_options={'symbolic_solver_labels': True})
+    with open(lp_files[0]) as serial, open(lp_files[1]) as parallel_build:
+        assert serial.read() == parallel_build.read()
+    assert 'block_coefficients' in [
+        e['name'] for e in om.build_profile.entries]
+
+
+def test_block_coefficients_in_chunks():
+    es = _energysystem()
+    timeincrement = np.ones(len(es.timeindex))
+    coefficients = parallel.block_coefficients(
+        es.groups, timeincrement, processes=2, chunksize=1)
+    assert set(coefficients) == {blocks.Transformer, GenericStorageBlock,
+                                 GenericCHPBlock}
+    for block, computed in coefficients.items():
+        expected = block._coefficients(es.groups[block], timeincrement)
+        assert len(computed) == len(expected) == len(es.groups[block])
+        for c, e in zip(computed, expected):
+            assert c.keys() == e.keys()
+            for k in c:
+                np.testing.assert_array_equal(c[k], e[k])
+
+
+def test_block_coefficients_without_parallel_blocks():
+    es = solph.EnergySystem(
+        timeindex=pd.date_range('1/1/2020', periods=2, freq='H'))
+    bel = solph.Bus(label='bel')
+    es.add(bel, solph.Sink(label='demand', inputs={bel: solph.Flow()}))
+    assert parallel.parallel_blocks(es.groups) == []
+    assert parallel.block_coefficients(es.groups, np.ones(2)) == {}
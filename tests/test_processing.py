@@ -10,6 +10,7 @@ SPDX-License-Identifier: MIT
 """
 
 import pandas
+import pytest
 from nose.tools import assert_raises
 from nose.tools import eq_
 from nose.tools import ok_
@@ -19,10 +20,14 @@ from oemof.solph import Flow
 from oemof.solph import Investment
 from oemof.solph import Model
 from oemof.solph import Sink
+from oemof.solph import Source
 from oemof.solph import Transformer
 from oemof.solph import processing
 from oemof.solph import views
 from oemof.solph.components import GenericStorage
+from oemof.solph.custom import ElectricalBus
+from oemof.solph.custom import ElectricalLine
+from oemof.solph.custom import SinkDSM
 from pandas.testing import assert_frame_equal
 from pandas.testing import assert_series_equal
 
@@ -263,6 +268,71 @@ class TestParameterResult:
         bel = views.node(results, 'b_el1', multiindex=True)
         eq_(int(bel['sequences']['b_el1', 'None', 'duals'].sum()), 48)
 
+    def test_lazy_results(self):
+        results = processing.results(self.om)
+        lazy = processing.results(self.om, lazy=True)
+        eq_(list(lazy), list(results))
+        eq_(len(lazy._cache), 0)
+        for k in results:
+            assert_series_equal(lazy[k]['scalars'], results[k]['scalars'])
+            assert_frame_equal(lazy[k]['sequences'], results[k]['sequences'])
+        # entries are cached
+        ok_(lazy[k] is lazy[k])
+
+    def test_lazy_results_with_node_view(self):
+        lazy = processing.results(self.om, lazy=True)
+        bel = views.node(lazy, 'b_el1', multiindex=True)
+        eq_(int(bel['sequences']['b_el1', 'None', 'duals'].sum()), 48)
+        eq_(int(bel['sequences'][('diesel', 'b_el1', 'flow')].sum()), 2875)
+        # only the entries containing the node are created
+        eq_(len(lazy._cache), 3)
+        views.node_input_by_type(lazy, node_type=Sink)
+        eq_(len(lazy._cache), 4)
+
+    @pytest.mark.parametrize('file_format', ['parquet', 'feather'])
+    def test_write_and_read_results(self, tmpdir, file_format):
+        pytest.importorskip('pyarrow')
+        results = processing.convert_keys_to_strings(
+            processing.results(self.om), keep_none_type=True)
+        processing.write_results(self.om, str(tmpdir),
+                                 file_format=file_format)
+        stored = processing.read_results(str(tmpdir))
+        eq_(set(stored), set(results))
+        eq_(len(stored._cache), 0)
+        for k in results:
+            assert_series_equal(stored[k]['scalars'], results[k]['scalars'])
+            assert_frame_equal(stored[k]['sequences'],
+                               results[k]['sequences'])
+
+    def test_result_files_have_a_column_per_flow(self, tmpdir):
+        pytest.importorskip('pyarrow')
+        processing.write_results(self.om, str(tmpdir))
+        flows = pandas.read_parquet(str(tmpdir.join('flow.parquet')))
+        eq_(flows.columns.names, ['source', 'target'])
+        eq_(len(flows.columns), len(self.om.flows))
+        assert_frame_equal(flows, pandas.DataFrame(
+            {(str(o), str(i)): [self.om.flow[o, i, t].value
+                                for t in self.om.TIMESTEPS]
+             for o, i in self.om.flows},
+            index=self.es.timeindex.rename('timestamp'),
+            columns=flows.columns), check_freq=False)
+        scalars = pandas.read_parquet(str(tmpdir.join('scalars.parquet')))
+        eq_(sorted(scalars['variable']),
+            ['init_content', 'invest', 'invest', 'invest', 'invest'])
+
+    def test_stored_results_with_node_view(self, tmpdir):
+        pytest.importorskip('pyarrow')
+        processing.write_results(self.om, str(tmpdir), file_format='feather')
+        stored = processing.read_results(str(tmpdir))
+        bel = views.node(stored, 'b_el1', multiindex=True)
+        eq_(int(bel['sequences']['b_el1', 'None', 'duals'].sum()), 48)
+        # only the entries containing the node are read
+        eq_(len(stored._cache), 3)
+
+    def test_write_results_unknown_format(self):
+        with assert_raises(ValueError):
+            processing.write_results(self.om, 'results', file_format='csv')
+
     def test_node_weight_by_type(self):
         results = processing.results(self.om)
         storage_content = views.node_weight_by_type(
@@ -318,3 +388,54 @@ class TestParameterResult:
         results = processing.results(self.om)
         view = views.node_weight_by_type(results, node_type=Flow)
         ok_(view is None)
+
+
+def test_results_of_banded_dsm_variable():
+    es = EnergySystem(timeindex=pandas.date_range(
+        '2020-01-01', periods=6, freq='H'))
+    bel = Bus(label='bel')
+    es.add(bel, Source(label='source', outputs={bel: Flow(
+        nominal_value=10, variable_costs=[1, 1, 5, 5, 1, 1])}))
+    es.add(SinkDSM(label='dsm', inputs={bel: Flow()}, demand=[5] * 6,
+                   capacity_up=[5] * 6, capacity_down=[5] * 6,
+                   method='delay', delay_time=1, cost_dsm_down=0.1))
+    om = Model(es)
+    # only time steps within the delay time have a load shift variable
+    eq_(len(om.SinkDSMDelayBlock.dsm_do), 6 + 2 * 5)
+    om.solve('cbc')
+
+    results = processing.results(om)
+    dsm = es.groups['dsm']
+    for t in range(6):
+        sequence = results[dsm, t]['sequences']['dsm_do']
+        eq_(len(sequence), 6)
+        for tt in range(6):
+            if abs(t - tt) <= 1:
+                eq_(sequence.iloc[tt], om.SinkDSMDelayBlock.dsm_do[
+                    dsm, t, tt].value)
+            else:
+                eq_(sequence.iloc[tt], 0)
+    # load is shifted away from the expensive time steps
+    eq_(results[bel, dsm]['sequences']['flow'].iloc[2:4].sum(), 0)
+
+
+def test_duals_of_bus_with_own_variables():
+    es = EnergySystem(timeindex=pandas.date_range(
+        '2020-01-01', periods=3, freq='H'))
+    b1 = ElectricalBus(label='b1', slack=True)
+    b2 = ElectricalBus(label='b2')
+    es.add(b1, b2)
+    es.add(ElectricalLine(input=b1, output=b2, reactance=0.5,
+                          nominal_value=10))
+    es.add(Source(label='source', outputs={b1: Flow(variable_costs=2)}))
+    es.add(Sink(label='demand', inputs={b2: Flow(
+        nominal_value=5, fix=[1, 0.5, 0.2])}))
+    om = Model(es)
+    om.receive_duals()
+    om.solve('cbc')
+
+    results = processing.results(om)
+    # the voltage angle of the bus is in the same entry as its duals
+    sequences = results[b2, None]['sequences']
+    ok_('voltage_angle' in sequences)
+    eq_(sequences['duals'].tolist(), [2, 2, 2])
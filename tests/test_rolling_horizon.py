@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -
+
+"""Tests of the rolling horizon optimisation.
+
+SPDX-License-Identifier: MIT
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from energysystems import single_bus
+from oemof import solph
+from oemof.solph import processing
+from oemof.solph import rolling_horizon
+
+
+def _energysystem(periods=12):
+    return single_bus(
+        periods=periods,
+        demand={'nominal_value': 10,
+                'fix': [0.5, 0.8, 1, 0.4] * (periods // 4)},
+        grid={'variable_costs': [1, 3, 5, 2] * (periods // 4)},
+        sources={'plant': {
+            'nominal_value': 6, 'min': 0.5, 'variable_costs': 2,
+            'nonconvex': solph.NonConvex(startup_costs=3, initial_status=1)}},
+        storage={'nominal_storage_capacity': 10, 'initial_storage_level': 0.5,
+                 'loss_rate': 0.01, 'inputs': {'nominal_value': 5},
+                 'outputs': {'nominal_value': 5}})
+
+
+def test_windows():
+    assert rolling_horizon.windows(4, 4) == [(0, 4, 4)]
+    assert rolling_horizon.windows(5, 2) == [(0, 2, 2), (2, 4, 4),
+                                             (4, 5, 5)]
+    with pytest.raises(ValueError, match='overlap'):
+        rolling_horizon.windows(5, 2, 2)
+
+
+def test_single_window_equals_model():
+    es = _energysystem()
+    storage = es.groups['storage']
+    storage.balanced = False
+    om = solph.Model(es)
+    om.solve('cbc')
+    reference = om.results()
+    results = rolling_horizon.solve(es, window=12, solver='cbc')
+    assert list(results) == list(reference)
+    for k in reference:
+        pd.testing.assert_frame_equal(results[k]['sequences'],
+                                      reference[k]['sequences'])
+
+
+def test_rolling_horizon():
+    es = _energysystem()
+    storage = es.groups['storage']
+    plant = es.groups['plant']
+    bel = es.groups['bel']
+    fix = es.flows()[bel, es.groups['demand']].fix
+    results = rolling_horizon.solve(es, window=5, overlap=2, solver='cbc')
+
+    # the original attributes are restored
+    assert storage.initial_storage_level == 0.5
+    assert storage.balanced is True
+    assert es.flows()[plant, bel].nonconvex.initial_status == 1
+    assert es.flows()[bel, es.groups['demand']].fix is fix
+    assert len(es.timeindex) == 12
+
+    content = results[storage, None]['sequences']['storage_content']
+    pd.testing.assert_index_equal(content.index, es.timeindex)
+    assert results[storage, None]['scalars']['init_content'] == 5
+
+    # storage balance is continuous at the borders of the windows
+    flow_in = results[bel, storage]['sequences']['flow']
+    flow_out = results[storage, bel]['sequences']['flow']
+    previous = content.shift(1).fillna(5) * 0.99
+    pd.testing.assert_series_equal(previous + flow_in - flow_out, content,
+                                   check_names=False, atol=1e-6)
+
+    # startups depend on the status at the end of the previous window
+    status = results[plant, bel]['sequences']['status']
+    startup = results[plant, bel]['sequences']['startup']
+    expected = (status - status.shift(1).fillna(1)).clip(lower=0)
+    pd.testing.assert_series_equal(startup, expected, check_names=False,
+                                   atol=1e-6)
+
+
+@pytest.mark.parametrize('in_model_kwargs', [False, True])
+def test_timeincrement_is_sliced(in_model_kwargs):
+    es = single_bus(
+        periods=8, demand={'nominal_value': 10, 'fix': 1},
+        grid={'variable_costs': 5}, sources={'cheap': {
+            'nominal_value': 10, 'summed_max': 1, 'variable_costs': 1}})
+    timeincrement = [1, 1, 3, 3] * 2
+    if in_model_kwargs:
+        model_kwargs = {'timeincrement': timeincrement}
+    else:
+        es.timeincrement = timeincrement
+        model_kwargs = None
+    results = rolling_horizon.solve(es, window=2, model_kwargs=model_kwargs,
+                                    solver='cbc')
+
+    # the energy of the cheap source is limited within every window
+    flow = results[es.groups['cheap'], es.groups['bel']]['sequences']['flow']
+    energy = (flow * timeincrement).groupby(np.arange(8) // 2).sum()
+    assert energy.tolist() == pytest.approx([10] * 4)
+
+
+def _long_sequence_energysystem():
+    # the costs are longer than the time index, as allowed in a Model
+    return single_bus(
+        periods=8, demand={'nominal_value': 1, 'fix': 1},
+        grid={'variable_costs': 5},
+        sources={'s': {'variable_costs': [1] * 4 + [10] * 4 + [1] * 16}})
+
+
+def test_sequences_longer_than_the_timeindex():
+    es = _long_sequence_energysystem()
+    om = solph.Model(es)
+    om.solve('cbc')
+    flow = om.results()[es.groups['s'], es.groups['bel']]['sequences']
+    assert flow['flow'].sum() == 4
+
+    results = rolling_horizon.solve(es, window=4, solver='cbc')
+    pd.testing.assert_frame_equal(
+        results[es.groups['s'], es.groups['bel']]['sequences'], flow)
+
+
+def _up_down_energysystem(periods=24):
+    prices = [1] * periods
+    prices[7:10] = prices[15:18] = [10, 3, 3]
+    return single_bus(
+        periods=periods, demand={'nominal_value': 1, 'fix': 1},
+        grid={'variable_costs': prices},
+        sources={'plant': {
+            'nominal_value': 1, 'min': 1, 'variable_costs': 2,
+            'nonconvex': solph.NonConvex(minimum_uptime=3, minimum_downtime=2,
+                                         initial_status=0)}})
+
+
+@pytest.mark.parametrize('overlap', [0, 2])
+def test_minimum_up_and_downtime_across_windows(overlap):
+    es = _up_down_energysystem()
+    om = solph.Model(es)
+    om.solve('cbc')
+    plant = es.groups['plant']
+    bel = es.groups['bel']
+    reference = om.results()[plant, bel]['sequences']['status']
+    # the plant runs for the minimum uptime when the grid is expensive,
+    # which starts at the last time step of the first two windows
+    assert reference.tolist() == [0] * 7 + [1] * 3 + [0] * 5 + [1] * 3 + [
+        0] * 6
+
+    results = rolling_horizon.solve(es, window=8, overlap=overlap,
+                                    solver='cbc')
+    status = results[plant, bel]['sequences']['status']
+    pd.testing.assert_series_equal(status, reference, check_names=False)
+
+
+def test_warmstart_from_previous_window():
+    reference = rolling_horizon.solve(_energysystem(), window=5, overlap=2,
+                                      solver='cbc')
+    results = rolling_horizon.solve(_energysystem(), window=5, overlap=2,
+                                    warmstart=True, solver='cbc')
+    reference = processing.convert_keys_to_strings(reference)
+    results = processing.convert_keys_to_strings(results)
+    assert list(results) == list(reference)
+    for k in reference:
+        pd.testing.assert_frame_equal(results[k]['sequences'],
+                                      reference[k]['sequences'], atol=1e-6)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -
+
+"""Tests of the parallel scenario runner.
+
+SPDX-License-Identifier: MIT
+"""
+
+import os
+
+import pandas as pd
+from oemof import solph
+from oemof.solph import scenarios
+
+
+def create_energysystem(price):
+    if price < 0:
+        raise ValueError('Negative price')
+    if price == 0:
+        # the worker process dies, e.g. killed for lack of memory
+        os._exit(1)
+    es = solph.EnergySystem(
+        timeindex=pd.date_range('1/1/2020', periods=3, freq='H'))
+    bel = solph.Bus(label='bel')
+    es.add(bel)
+    es.add(solph.Sink(label='demand', inputs={bel: solph.Flow(
+        nominal_value=10, fix=[0.5, 1, 0.2])}))
+    es.add(solph.Source(label='cheap', outputs={bel: solph.Flow(
+        nominal_value=6, variable_costs=price)}))
+    es.add(solph.Source(label='expensive', outputs={bel: solph.Flow(
+        variable_costs=10)}))
+    return es
+
+
+def test_run_scenarios():
+    results = scenarios.run(create_energysystem,
+                            {'low': 1, 'high': 20, 'broken': -1},
+                            processes=2)
+    assert list(results) == ['low', 'high', 'broken']
+
+    assert results['low'].success
+    assert results['low'].meta['objective'] == 13 * 1 + 4 * 10
+    assert results['high'].meta['objective'] == 17 * 10
+    assert results['low'].meta['termination_condition'] == 'optimal'
+    assert set(results['low'].timing) == {
+        'energysystem', 'model', 'solve', 'results', 'total'}
+
+    flow = results['low'].results['cheap', 'bel']['sequences']['flow']
+    assert flow.tolist() == [5, 6, 2]
+    frames = results['low'].to_dataframes()
+    pd.testing.assert_index_equal(frames['cheap', 'bel']['sequences'].index,
+                                  results['low'].timeindex)
+
+    assert not results['broken'].success
+    assert results['broken'].results is None
+    assert 'Negative price' in results['broken'].error
+
+
+def test_crashed_worker_process():
+    prices = {'a': 1, 'b': 2, 'crash': 0, 'c': 3, 'd': 4}
+    results = scenarios.run(create_energysystem, prices, processes=2)
+    assert list(results) == list(prices)
+    assert not results['crash'].success
+    assert 'terminated abruptly' in results['crash'].error
+    for name in ['a', 'b', 'c', 'd']:
+        assert results[name].success
+        assert results[name].meta['objective'] == (
+            13 * prices[name] + 4 * 10)
+
+
+def test_compact_results():
+    es = create_energysystem(1)
+    om = solph.Model(es)
+    om.solve('cbc')
+    compact = scenarios.compact_results(om.results())
+    assert set(compact) == {('bel', 'demand'), ('cheap', 'bel'),
+                            ('expensive', 'bel')}
+    assert compact['expensive', 'bel']['sequences']['flow'].tolist() == [
+        0, 4, 0]
+    assert compact['expensive', 'bel']['scalars'] == {}
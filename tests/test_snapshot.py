@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -
+
+"""Tests of the snapshots of energy systems.
+
+SPDX-License-Identifier: MIT
+"""
+
+import json
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+from energysystems import single_bus
+from oemof import solph
+from oemof.solph import processing
+from oemof.solph import snapshot
+from oemof.solph import views
+
+
+def _energysystem():
+    hours = np.arange(24)
+    es = single_bus(
+        demand={'nominal_value': 8, 'fix': 0.5 + 0.3 * np.sin(hours / 5)},
+        sources={'pv': {
+            'fix': np.clip(np.sin(hours / 24 * 2 * np.pi), 0, None),
+            'investment': solph.Investment(ep_costs=20)}},
+        excess=True,
+        storage={'nominal_storage_capacity': 20, 'loss_rate': 0.01,
+                 'inflow_conversion_factor': 0.9})
+    bel = es.groups['bel']
+    bgas = solph.Bus(label=('gas', 'bus'))
+    es.add(bgas)
+    es.add(solph.Source(label='gas', outputs={bgas: solph.Flow(
+        variable_costs=30)}))
+    es.add(solph.Transformer(
+        label='pp', inputs={bgas: solph.Flow()},
+        outputs={bel: solph.Flow(nominal_value=10, min=0.2,
+                                 nonconvex=solph.NonConvex())},
+        conversion_factors={bel: 0.5}))
+    return es
+
+
+@pytest.fixture
+def solved():
+    es = _energysystem()
+    om = solph.Model(es)
+    om.receive_duals()
+    om.solve('cbc')
+    es.results['main'] = processing.results(om)
+    es.results['meta'] = processing.meta_results(om)
+    return es, om
+
+
+def test_snapshot_round_trip(solved, tmpdir):
+    es, om = solved
+    path = str(tmpdir.join('es.npz'))
+    snapshot.write_snapshot(es, path)
+    restored = snapshot.read_snapshot(path)
+
+    assert restored.timeindex.equals(es.timeindex)
+    assert restored.timeindex.freq == es.timeindex.freq
+    assert sorted(str(n) for n in restored.nodes) == sorted(
+        str(n) for n in es.nodes)
+    assert ('gas', 'bus') in [n.label for n in restored.nodes]
+    pv = restored.groups['pv'].outputs[restored.groups['bel']]
+    assert isinstance(pv.investment, solph.Investment)
+    assert pv.investment.ep_costs == 20
+    # sequences are memory-mapped
+    assert isinstance(pv.fix.values, np.memmap)
+    np.testing.assert_array_equal(
+        pv.fix.values,
+        es.groups['pv'].outputs[es.groups['bel']].fix.values)
+    assert restored.groups['pp'].conversion_factors[
+        restored.groups['bel']][3] == 0.5
+
+    meta = restored.results['meta']
+    assert meta['objective'] == es.results['meta']['objective']
+    assert str(meta['solver']['Termination condition']) == 'optimal'
+    results = restored.results['main']
+    assert isinstance(results, snapshot.SnapshotResults)
+    assert len(results) == len(es.results['main'])
+    for name in ['bel', 'storage', 'pv']:
+        node, reference = (views.node(r, name)
+                           for r in (results, es.results['main']))
+        pd.testing.assert_frame_equal(node['sequences'],
+                                      reference['sequences'])
+        if 'scalars' in reference:
+            pd.testing.assert_series_equal(node['scalars'],
+                                           reference['scalars'])
+
+    # the restored energy system can be optimised again
+    om = solph.Model(restored)
+    om.solve('cbc')
+    assert om.objective() == pytest.approx(meta['objective'])
+
+
+def test_dump_and_restore_snapshot(solved, tmpdir):
+    es, _ = solved
+    es.dump(str(tmpdir), 'es.npz')
+    with zipfile.ZipFile(str(tmpdir.join('es.npz'))) as archive:
+        assert all(i.compress_type == zipfile.ZIP_STORED
+                   for i in archive.infolist())
+    with np.load(str(tmpdir.join('es.npz'))) as npz:
+        manifest = json.loads(npz['manifest'].tobytes().decode())
+    assert manifest['version'] == snapshot.SNAPSHOT_VERSION
+
+    restored = solph.EnergySystem()
+    restored.restore(str(tmpdir), 'es.npz')
+    assert len(restored.nodes) == len(es.nodes)
+    assert restored.results['main'][
+        (restored.groups['pv'], restored.groups['bel'])][
+            'scalars']['invest'] == pytest.approx(
+        es.results['main'][(es.groups['pv'], es.groups['bel'])][
+            'scalars']['invest'])
+
+
+def test_newer_snapshot_version(tmpdir, monkeypatch):
+    path = str(tmpdir.join('es.npz'))
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_VERSION', 2)
+    snapshot.write_snapshot(_energysystem(), path)
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_VERSION', 1)
+    with pytest.raises(ValueError, match='has version 2'):
+        snapshot.read_snapshot(path)
+
+
+def test_unsupported_attribute(tmpdir):
+    es = _energysystem()
+    es.groups['bel'].callback = lambda x: x
+    with pytest.raises(TypeError, match="'callback'"):
+        snapshot.write_snapshot(es, str(tmpdir.join('es.npz')))
@@ -11,6 +11,8 @@ SPDX-License-Identifier: MIT
 
 import warnings
 
+import numpy as np
+import pandas as pd
 import pytest
 from oemof import solph
 from oemof.tools.debugging import SuspiciousUsageWarning
@@ -97,3 +99,18 @@ def test_warning_fixed_still_used():
         solph.Flow(fixed=True)
         assert len(w) != 0
         assert msg == str(w[-1].message)
+
+
+def test_flow_sequences_are_array_backed():
+    """Iterables are stored as arrays, scalars as constant sequences."""
+    flow = solph.Flow(nominal_value=10, fix=pd.Series([0.5, 1, 0.25]),
+                      variable_costs=3)
+    assert isinstance(flow.fix.values, np.ndarray)
+    assert isinstance(flow.fix[1], float)
+    assert list(flow.fix) == [0.5, 1.0, 0.25]
+    assert flow.variable_costs.constant
+    assert flow.variable_costs[5] == 3
+    assert len(flow.variable_costs) == 6
+    np.testing.assert_array_equal(np.asarray(flow.variable_costs), [3] * 6)
+    with pytest.raises(IndexError):
+        flow.fix[3]
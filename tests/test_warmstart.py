@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -
+
+"""Tests of the start values of a model from a previous solution.
+
+SPDX-License-Identifier: MIT
+"""
+
+import pandas as pd
+import pytest
+from energysystems import single_bus
+from oemof import solph
+from oemof.solph import processing
+from oemof.solph import warmstart
+
+
+def _energysystem(hours=0, periods=6):
+    return single_bus(
+        periods=periods,
+        start=pd.Timestamp('1/1/2020') + pd.Timedelta(hours=hours),
+        demand={'nominal_value': 10,
+                'fix': [0.2, 0.8, 1, 0.4, 0.9, 0.3][:periods]},
+        grid={'variable_costs': 20},
+        sources={'plant{0}'.format(n): {
+            'nominal_value': 5, 'min': 0.5, 'variable_costs': 2 + n,
+            'nonconvex': solph.NonConvex(startup_costs=4)} for n in range(2)},
+        storage={'nominal_storage_capacity': 4, 'loss_rate': 0.1})
+
+
+@pytest.fixture(scope='module')
+def solved():
+    om = solph.Model(_energysystem())
+    om.solve('cbc')
+    return om
+
+
+def test_start_values_by_label_and_time(solved):
+    previous = processing.results(solved)
+    om = solph.Model(_energysystem(hours=2))
+    assert warmstart.set_start_values(om, previous, ['flow', 'status']) > 0
+
+    plant = om.es.groups['plant0']
+    bel = om.es.groups['bel']
+    old_plant = solved.es.groups['plant0']
+    old_bel = solved.es.groups['bel']
+    # the first four time steps overlap with the previous model
+    assert ([om.flow[plant, bel, t].value for t in range(4)] ==
+            [solved.flow[old_plant, old_bel, t].value for t in range(2, 6)])
+    assert [om.flow[plant, bel, t].value for t in [4, 5]] == [None, None]
+    assert ([om.NonConvexFlow.status[plant, bel, t].value
+             for t in range(4)] ==
+            [round(solved.NonConvexFlow.status[old_plant, old_bel, t].value)
+             for t in range(2, 6)])
+    # fixed variables and variables not asked for keep their values
+    demand = om.es.groups['demand']
+    assert om.flow[bel, demand, 0].value == 2
+    storage = om.es.groups['storage']
+    assert om.GenericStorageBlock.storage_content[storage, 0].value is None
+
+
+@pytest.mark.parametrize('solver, kwargs', [
+    ('cbc', {}), ('cbc', {'native_writer': True}),
+    ('highs', {'solver_io': 'memory'})])
+def test_solve_with_warmstart(solved, solver, kwargs):
+    if solver == 'highs':
+        pytest.importorskip('highspy')
+    om = solph.Model(_energysystem())
+    om.solve(solver, warmstart=processing.results(solved), **kwargs)
+    assert om.objective() == pytest.approx(solved.objective())
+    assert om._solve_settings[2]['warmstart'] is True
+    om.resolve()
+    assert om.objective() == pytest.approx(solved.objective())
+
+
+def test_warmstart_from_stored_results(solved, tmpdir):
+    pytest.importorskip('pyarrow')
+    path = str(tmpdir.join('results'))
+    processing.write_results(solved, path)
+    om = solph.Model(_energysystem())
+    om.solve('cbc', warmstart=path)
+    assert om.objective() == pytest.approx(solved.objective())
+
+
+def test_start_file_of_integer_columns(solved, tmpdir):
+    problem = solved.to_matrix()
+    columns, values = problem.start_values()
+    assert len(columns) == problem.num_col
+    filename = str(tmpdir.join('start.soln'))
+    problem.write_start(filename)
+    with open(filename) as f:
+        lines = f.read().splitlines()
+    integer = problem.integrality & (values != 0)
+    assert len(lines) == integer.sum()
+    assert lines[0].split()[1] == 'x{0}'.format(columns[integer][0] + 1)